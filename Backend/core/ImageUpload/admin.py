@@ -1,4 +1,14 @@
 from django.contrib import admin
-from .models import PlantHealthReport
+from .models import PlantHealthReport, DiseaseDailyCount, PlantLabel
 
 admin.site.register(PlantHealthReport)
+admin.site.register(DiseaseDailyCount)
+
+
+class PlantLabelAdmin(admin.ModelAdmin):
+    list_display = ('class_name', 'plant', 'issue', 'health')
+    list_filter = ('health', 'plant')
+    search_fields = ('class_name', 'plant', 'issue')
+
+
+admin.site.register(PlantLabel, PlantLabelAdmin)
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from core.locations import normalize_location
+
+from .models import DiseaseDailyCount
+from .utils.registry import registry
+
+# Longest window the trends endpoint serves
+MAX_TREND_DAYS = 90
+
+
+def record_prediction(report):
+    """
+    Adds one report to its (day, model version, class, location) bucket.
+    """
+    if report.class_index is None:
+        return
+    key = {
+        'day': timezone.localdate(report.created_at),
+        'model_version': report.model_version or '',
+        'class_index': report.class_index,
+        'location': normalize_location(report.location),
+    }
+    with transaction.atomic():
+        if DiseaseDailyCount.objects.filter(**key).update(count=F('count') + 1):
+            return
+        try:
+            with transaction.atomic():
+                DiseaseDailyCount.objects.create(count=1, **key)
+        except IntegrityError:
+            # Another request created the bucket first
+            DiseaseDailyCount.objects.filter(**key).update(count=F('count') + 1)
+
+
+def version_class_names(version):
+    """
+    Class map of the model version that produced a bucket. Buckets recorded
+    before versions were tracked fall back to the active model's map.
+    """
+    try:
+        return registry.class_names(version or None)
+    except (OSError, ValueError):
+        return {}
+
+
+def disease_trends(days=7, location=None):
+    """
+    Daily report counts per predicted class over the last `days` days, read
+    from the aggregate table only, so the cost depends on the window and not
+    on how many reports exist. Buckets are named with their own model
+    version's class map and summed by class name, so a retrained model with
+    a different class order doesn't mix up the series.
+    """
+    days = max(1, min(days, MAX_TREND_DAYS))
+    since = timezone.localdate() - timedelta(days=days - 1)
+    buckets = DiseaseDailyCount.objects.filter(day__gte=since)
+    if location:
+        buckets = buckets.filter(location=normalize_location(location))
+
+    rows = buckets.values('day', 'model_version', 'class_index').annotate(count=Sum('count'))
+    names_by_version = {}
+    by_day = {}
+    totals = {}
+    for row in rows:
+        version = row['model_version']
+        if version not in names_by_version:
+            names_by_version[version] = version_class_names(version)
+        name = names_by_version[version].get(row['class_index'], str(row['class_index']))
+        key = (row['day'], name)
+        by_day[key] = by_day.get(key, 0) + row['count']
+        totals[name] = totals.get(name, 0) + row['count']
+
+    return {
+        'since': since,
+        'days': days,
+        'location': normalize_location(location) if location else None,
+        'totals': dict(sorted(totals.items(), key=lambda item: item[1], reverse=True)),
+        'series': [
+            {'day': day, 'class_name': name, 'count': count}
+            for (day, name), count in sorted(by_day.items())
+        ],
+    }
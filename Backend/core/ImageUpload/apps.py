@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ImageuploadConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ImageUpload'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from .models import PlantLabel
+        from .utils.labels import invalidate
+
+        post_save.connect(invalidate, sender=PlantLabel, dispatch_uid='plant_label_saved')
+        post_delete.connect(invalidate, sender=PlantLabel, dispatch_uid='plant_label_deleted')
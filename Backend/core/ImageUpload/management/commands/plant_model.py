@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ImageUpload.utils.registry import ACTIVE_POINTER, SHADOW_POINTER, registry
+
+
+class Command(BaseCommand):
+    help = (
+        "Lists plant disease model versions and switches the active or shadow "
+        "version. Running workers pick the change up within "
+        "PLANT_MODEL_POLL_SECONDS, load it in the background and swap it in."
+    )
+
+    def add_arguments(self, parser):
+        sub = parser.add_subparsers(dest='action', required=True)
+        sub.add_parser('list', help="Show available versions and the current pointers.")
+        activate = sub.add_parser('activate', help="Serve this version.")
+        activate.add_argument('version')
+        shadow = sub.add_parser('shadow', help="Run a candidate on sampled traffic, or --off.")
+        shadow.add_argument('version', nargs='?')
+        shadow.add_argument('--rate', type=float, help="Fraction of requests to mirror (0-1).")
+        shadow.add_argument('--off', action='store_true')
+
+    def handle(self, *args, **options):
+        action = options['action']
+        if action == 'list':
+            active, shadow, rate = registry.wanted()
+            for version in registry.versions():
+                marks = []
+                if version == active:
+                    marks.append('active')
+                if version == shadow:
+                    marks.append(f'shadow {rate:.0%}')
+                self.stdout.write(f"{version}{'  (' + ', '.join(marks) + ')' if marks else ''}")
+            return
+
+        if action == 'shadow' and options['off']:
+            registry.write_pointer(SHADOW_POINTER)
+            self.stdout.write("Shadow model disabled.")
+            return
+
+        version = options.get('version')
+        if not version:
+            raise CommandError("A version is required.")
+        try:
+            model_path, class_indices_path = registry.artifact_paths(version)
+            registry.class_names(version)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Version '{version}' is not usable: {e}")
+
+        if action == 'activate':
+            registry.write_pointer(ACTIVE_POINTER, version)
+            self.stdout.write(self.style.SUCCESS(f"{version} will become active ({model_path})."))
+        else:
+            values = [version] + ([options['rate']] if options['rate'] is not None else [])
+            registry.write_pointer(SHADOW_POINTER, *values)
+            self.stdout.write(self.style.SUCCESS(f"{version} will shadow the active model."))
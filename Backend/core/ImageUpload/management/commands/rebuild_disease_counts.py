@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from core.locations import normalize_location
+from ImageUpload.models import PlantHealthReport, DiseaseDailyCount
+
+
+class Command(BaseCommand):
+    help = "Recomputes the DiseaseDailyCount aggregates from all reports that have a class index."
+
+    def handle(self, *args, **options):
+        rows = (
+            PlantHealthReport.objects.filter(class_index__isnull=False)
+            .annotate(day=TruncDate('created_at'))
+            .values('day', 'model_version', 'class_index', 'location')
+            .annotate(count=Count('id'))
+        )
+        buckets = {}
+        for row in rows.iterator():
+            key = (row['day'], row['model_version'] or '', row['class_index'], normalize_location(row['location']))
+            buckets[key] = buckets.get(key, 0) + row['count']
+
+        with transaction.atomic():
+            DiseaseDailyCount.objects.all().delete()
+            DiseaseDailyCount.objects.bulk_create(
+                [
+                    DiseaseDailyCount(day=d, model_version=v, class_index=c, location=l, count=n)
+                    for (d, v, c, l), n in buckets.items()
+                ],
+                batch_size=1000,
+            )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(buckets)} daily buckets."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ImageUpload', '0002_remove_planthealthreport_confidence_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='planthealthreport',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ImageUpload', '0003_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='planthealthreport',
+            name='class_index',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='planthealthreport',
+            name='confidence',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='planthealthreport',
+            name='location',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='planthealthreport',
+            name='model_version',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='planthealthreport',
+            name='plant',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.CreateModel(
+            name='DiseaseDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('class_index', models.PositiveSmallIntegerField()),
+                ('location', models.CharField(blank=True, default='', max_length=255)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['location', 'day'], name='disease_count_location_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'class_index', 'location'), name='disease_daily_count_unique')],
+            },
+        ),
+    ]
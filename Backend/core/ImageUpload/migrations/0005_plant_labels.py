@@ -0,0 +1,75 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:19
+
+from django.db import migrations, models
+
+
+# Catalogue at the time of this migration. Recommendations come from the old
+# RECOMMENDATIONS dict in utils/predict.py; the spider mite entry is keyed by
+# the class name actually used in class_indices.json ("Two_spotted", not
+# "Two-spotted"), which previously made it fall back to generic advice.
+INITIAL_LABELS = [
+    ("Pepper__bell___Bacterial_spot", "Pepper", "Bacterial spot", "disease",
+     "Use copper-based fungicides. Avoid overhead watering. Rotate crops and remove infected plant debris."),
+    ("Pepper__bell___healthy", "Pepper", "No disease detected", "healthy",
+     "Your pepper plant appears healthy. Ensure consistent watering and provide support as it grows."),
+    ("Potato___Early_blight", "Potato", "Early blight", "disease",
+     "Apply fungicides containing chlorothalonil or mancozeb. Ensure good air circulation and avoid water on leaves."),
+    ("Potato___Late_blight", "Potato", "Late blight", "disease",
+     "This is a serious disease. Use fungicides like metalaxyl or chlorothalonil immediately. Destroy infected plants to prevent spread."),
+    ("Potato___healthy", "Potato", "No disease detected", "healthy",
+     "Your potato plants look healthy. Continue to 'hill' soil around the base to protect tubers from sunlight."),
+    ("Tomato_Bacterial_spot", "Tomato", "Bacterial spot", "disease",
+     "Apply copper-based bactericides. Mulch around plants to prevent soil splash. Do not work with plants when they are wet."),
+    ("Tomato_Early_blight", "Tomato", "Early blight", "disease",
+     "Prune lower leaves. Use fungicides like chlorothalonil. Stake plants to improve air circulation."),
+    ("Tomato_Late_blight", "Tomato", "Late blight", "disease",
+     "A devastating disease. Act fast. Use targeted fungicides and remove all infected plants from the garden."),
+    ("Tomato_Leaf_Mold", "Tomato", "Leaf mold", "disease",
+     "Ensure good ventilation, especially in greenhouses. Use fungicides. Some tomato varieties are resistant."),
+    ("Tomato_Septoria_leaf_spot", "Tomato", "Septoria leaf spot", "disease",
+     "Remove infected leaves immediately. Apply fungicides. Mulch heavily to reduce water splashing from soil."),
+    ("Tomato_Spider_mites_Two_spotted_spider_mite", "Tomato", "Two-spotted spider mite", "disease",
+     "Use insecticidal soap or neem oil. Introduce predatory mites. Mist plants to increase humidity."),
+    ("Tomato__Target_Spot", "Tomato", "Target spot", "disease",
+     "Improve air circulation. Apply a fungicide. Remove and destroy crop debris after harvest."),
+    ("Tomato__Tomato_YellowLeaf__Curl_Virus", "Tomato", "Yellow leaf curl virus", "disease",
+     "Control whiteflies, which spread the virus. Use insecticidal soap or reflective mulch. Remove infected plants."),
+    ("Tomato__Tomato_mosaic_virus", "Tomato", "Mosaic virus", "disease",
+     "There is no cure. Remove and destroy infected plants. Disinfect tools and wash hands after handling."),
+    ("Tomato_healthy", "Tomato", "No disease detected", "healthy",
+     "Your tomato plant is healthy. Continue with regular watering and feeding, especially when fruit begins to form."),
+]
+
+
+def seed_labels(apps, schema_editor):
+    PlantLabel = apps.get_model('ImageUpload', 'PlantLabel')
+    PlantLabel.objects.bulk_create([
+        PlantLabel(class_name=c, plant=p, issue=i, health=h, recommendation=r)
+        for c, p, i, h, r in INITIAL_LABELS
+    ])
+
+
+def unseed_labels(apps, schema_editor):
+    apps.get_model('ImageUpload', 'PlantLabel').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ImageUpload', '0004_prediction_fields_and_daily_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlantLabel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('class_name', models.CharField(help_text='Exactly as in class_indices.json', max_length=100, unique=True)),
+                ('plant', models.CharField(max_length=50)),
+                ('issue', models.CharField(max_length=100)),
+                ('health', models.CharField(choices=[('healthy', 'Healthy'), ('disease', 'Disease')], max_length=10)),
+                ('recommendation', models.TextField()),
+            ],
+        ),
+        migrations.RunPython(seed_labels, unseed_labels),
+    ]
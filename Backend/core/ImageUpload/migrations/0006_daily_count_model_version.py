@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:40
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def split_buckets_by_version(apps, schema_editor):
+    """
+    Existing buckets mix every model version; recompute them from the
+    reports, which have recorded their model version all along.
+    """
+    PlantHealthReport = apps.get_model('ImageUpload', 'PlantHealthReport')
+    DiseaseDailyCount = apps.get_model('ImageUpload', 'DiseaseDailyCount')
+    rows = (
+        PlantHealthReport.objects.filter(class_index__isnull=False)
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'model_version', 'class_index', 'location')
+        .annotate(count=Count('id'))
+    )
+    buckets = {}
+    for row in rows.iterator():
+        location = ' '.join((row['location'] or '').split()).title()[:255]
+        key = (row['day'], row['model_version'] or '', row['class_index'], location)
+        buckets[key] = buckets.get(key, 0) + row['count']
+    DiseaseDailyCount.objects.all().delete()
+    DiseaseDailyCount.objects.bulk_create(
+        [
+            DiseaseDailyCount(day=d, model_version=v, class_index=c, location=l, count=n)
+            for (d, v, c, l), n in buckets.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ImageUpload', '0005_plant_labels'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='diseasedailycount',
+            name='disease_daily_count_unique',
+        ),
+        migrations.AddField(
+            model_name='diseasedailycount',
+            name='model_version',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddConstraint(
+            model_name='diseasedailycount',
+            constraint=models.UniqueConstraint(fields=('day', 'model_version', 'class_index', 'location'), name='disease_daily_count_unique'),
+        ),
+        migrations.RunPython(split_buckets_by_version, migrations.RunPython.noop),
+    ]
@@ -7,8 +7,61 @@ class PlantHealthReport(models.Model):
     issue = models.TextField(blank=True, null=True) # Can be blank for healthy plants
     recommendation = models.TextField(blank=True, null=True) # Can be blank for healthy plants
 
+    # Structured prediction output, for analytics without scanning the text
+    class_index = models.PositiveSmallIntegerField(blank=True, null=True)
+    plant = models.CharField(max_length=50, blank=True, null=True)
+    confidence = models.FloatField(blank=True, null=True)
+    model_version = models.CharField(max_length=50, blank=True, null=True)
+    location = models.CharField(max_length=255, blank=True, null=True)
+
     # Timestamp
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Report for {self.image.name} - Health: {self.health}"
+
+
+class DiseaseDailyCount(models.Model):
+    """
+    Number of reports per day, model version, predicted class and uploader
+    location, maintained incrementally as reports are created (see
+    analytics.py). Class indices only mean something within one model
+    version, so the version is part of the key.
+    """
+    day = models.DateField()
+    model_version = models.CharField(max_length=50, blank=True, default='')
+    class_index = models.PositiveSmallIntegerField()
+    location = models.CharField(max_length=255, blank=True, default='')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'model_version', 'class_index', 'location'], name='disease_daily_count_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['location', 'day'], name='disease_count_location_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.model_version or 'default'} class {self.class_index} @ {self.location or 'unknown'}: {self.count}"
+
+
+class PlantLabel(models.Model):
+    """
+    What a predicted class means to the farmer. Rows are matched to the
+    model's class_indices.json by class_name and can be edited in the admin
+    without a deploy (see utils/labels.py).
+    """
+    HEALTH_CHOICES = [
+        ('healthy', 'Healthy'),
+        ('disease', 'Disease'),
+    ]
+
+    class_name = models.CharField(max_length=100, unique=True, help_text="Exactly as in class_indices.json")
+    plant = models.CharField(max_length=50)
+    issue = models.CharField(max_length=100)
+    health = models.CharField(max_length=10, choices=HEALTH_CHOICES)
+    recommendation = models.TextField()
 
     def __str__(self):
-        return f"Report for {self.image.name} - Health: {self.health}"
\ No newline at end of file
+        return self.class_name
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from .models import PlantHealthReport
+from core.fast_serializers import SparseFieldsetMixin
 
-class PlantHealthReportSerializer(serializers.ModelSerializer):
+class PlantHealthReportSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = PlantHealthReport
         fields = '__all__'
@@ -1,3 +1,437 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from .analytics import MAX_TREND_DAYS, disease_trends, record_prediction
+from .models import DiseaseDailyCount, PlantHealthReport
+from .utils import admission, leaf
+from .utils.admission import BULK, INTERACTIVE, AdmissionController, RateLimiter, Rejected, TokenBucket
+from .utils.predict import crop_to_leaf
+from .utils.registry import MAX_PENDING_SHADOW, ModelRegistry, ModelVersion
+
+
+def soil(width, height, rng):
+    # Brightness noise only, so the hue stays soil-brown
+    noise = rng.integers(-30, 30, (height, width, 1))
+    return np.clip(np.array((130, 100, 70)) + noise, 0, 255).astype(np.uint8)
+
+
+def foliage(width, height, rng):
+    noise = rng.integers(-40, 40, (height, width, 3))
+    return np.clip(np.array((60, 150, 50)) + noise, 0, 255).astype(np.uint8)
+
+
+class LeafCropTests(SimpleTestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def field_shot(self):
+        """
+        A 1200x900 photo of soil with a 300x300 leaf low on the right.
+        """
+        pixels = soil(1200, 900, self.rng)
+        pixels[500:800, 750:1050] = foliage(300, 300, self.rng)
+        return Image.fromarray(pixels)
+
+    def test_crops_to_the_leaf(self):
+        analysis = leaf.analyse(self.field_shot())
+        self.assertIsNotNone(analysis.box)
+        left, upper, right, lower = analysis.box
+        # Contains the leaf, padded, and stays inside the photo
+        self.assertTrue(left <= 750 and upper <= 500 and right >= 1050 and lower >= 800)
+        self.assertTrue(left >= 0 and upper >= 0 and right <= 1200 and lower <= 900)
+        self.assertLess((right - left) * (lower - upper), 0.25 * 1200 * 900)
+        self.assertAlmostEqual((right - left) / (lower - upper), 1, delta=0.05)
+
+    def test_photo_filled_by_leaf_is_kept_whole(self):
+        analysis = leaf.analyse(Image.fromarray(foliage(1200, 900, self.rng)))
+        self.assertIsNone(analysis.box)
+        self.assertGreater(analysis.coverage, 0.9)
+
+    def test_photo_without_leaf_is_kept_whole(self):
+        analysis = leaf.analyse(Image.fromarray(soil(1200, 900, self.rng)))
+        self.assertIsNone(analysis.box)
+        self.assertLess(analysis.coverage, leaf.MIN_COVERAGE)
+
+    def test_tiles_skip_bare_soil(self):
+        img = self.field_shot()
+        tiles = leaf.tile_boxes(img, leaf.analyse(img).mask, 3)
+        boxes = [box for box, _ in tiles]
+        self.assertIn((800, 600, 1200, 900), boxes)
+        self.assertNotIn((0, 0, 400, 300), boxes)
+        self.assertTrue(all(share >= leaf.MIN_COVERAGE for _, share in tiles))
+
+    def test_crop_to_leaf_follows_setting(self):
+        img = self.field_shot()
+        with override_settings(PREDICTION_LEAF_CROP=False):
+            self.assertEqual(crop_to_leaf(img), (img, None))
+        with override_settings(PREDICTION_LEAF_CROP=True):
+            cropped, analysis = crop_to_leaf(img)
+        box = analysis.box
+        self.assertEqual(cropped.size, (box[2] - box[0], box[3] - box[1]))
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+@override_settings(
+    INFERENCE_USER_LIMITS={INTERACTIVE: (60, 2), BULK: (600, 20)},
+    INFERENCE_TYPE_LIMITS={'Government': (60, 3)},
+    INFERENCE_LATENCY_TARGET_MS={INTERACTIVE: 5000, BULK: 5000},
+)
+class AdmissionTests(SimpleTestCase):
+    def test_bucket_allows_burst_then_refills(self):
+        bucket = TokenBucket(60, 2)
+        now = bucket.updated
+        bucket.tokens -= 2
+        bucket.refill(now)
+        self.assertAlmostEqual(bucket.wait_time(), 1.0)
+        bucket.refill(now + 0.5)
+        self.assertAlmostEqual(bucket.wait_time(), 0.5)
+        bucket.refill(now + 10)
+        self.assertEqual(bucket.tokens, 2)
+        self.assertEqual(bucket.wait_time(), 0)
+
+    def test_caller_limit_is_a_429_with_retry_after(self):
+        limiter = RateLimiter()
+        limiter.take('user:1', 'Farmer', INTERACTIVE)
+        limiter.take('user:1', 'Farmer', INTERACTIVE)
+        with self.assertRaises(Rejected) as rejected:
+            limiter.take('user:1', 'Farmer', INTERACTIVE)
+        self.assertEqual(rejected.exception.status, 429)
+        self.assertGreaterEqual(rejected.exception.retry_after, 1)
+        # Other callers have their own bucket
+        limiter.take('user:2', 'Farmer', INTERACTIVE)
+
+    def test_type_limit_is_shared_and_takes_nothing_on_reject(self):
+        limiter = RateLimiter()
+        for user in range(3):
+            limiter.take(f'user:{user}', 'Government', BULK)
+        with self.assertRaises(Rejected):
+            limiter.take('user:3', 'Government', BULK)
+        self.assertAlmostEqual(limiter.users['user:3'].tokens, 20, places=2)
+
+    def test_interactive_lane_is_served_before_bulk(self):
+        controller = AdmissionController(slots=1)
+        served = []
+
+        def predict(lane):
+            with controller.slot(lane):
+                served.append(lane)
+
+        with controller.slot(INTERACTIVE):
+            bulk = threading.Thread(target=predict, args=(BULK,))
+            bulk.start()
+            wait_until(lambda: controller.waiting[BULK])
+            interactive = threading.Thread(target=predict, args=(INTERACTIVE,))
+            interactive.start()
+            wait_until(lambda: controller.waiting[INTERACTIVE])
+        bulk.join()
+        interactive.join()
+        self.assertEqual(served, [INTERACTIVE, BULK])
+
+    def test_shed_request_gets_its_tokens_back(self):
+        user = SimpleNamespace(is_authenticated=True, pk=1, individual_type='Farmer')
+        request = SimpleNamespace(user=user, META={})
+        controller = AdmissionController(slots=1)
+        controller.in_flight = 1
+        limiter = RateLimiter()
+        with mock.patch.multiple(admission, limiter=limiter, controller=controller), \
+                self.settings(INFERENCE_LATENCY_TARGET_MS={INTERACTIVE: 0, BULK: 0}):
+            with self.assertRaises(Rejected) as rejected:
+                with admission.admit(request):
+                    pass
+        self.assertEqual(rejected.exception.status, 503)
+        self.assertAlmostEqual(limiter.users['user:1'].tokens, 2, places=2)
+
+
+CLASS_NAMES = {0: 'Tomato_healthy', 1: 'Tomato_Early_blight', 2: 'Potato___Late_blight'}
+
+
+class FixedModel:
+    """
+    Keras-style stub that always predicts `winner`, optionally blocking until
+    `gate` is set.
+    """
+    def __init__(self, winner, gate=None, classes=len(CLASS_NAMES)):
+        self.winner = winner
+        self.gate = gate
+        self.classes = classes
+        self.calls = 0
+
+    def predict(self, batch, verbose=0):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        probabilities = np.full((len(batch), self.classes), 0.1, dtype='float32')
+        probabilities[:, self.winner] = 0.8
+        return probabilities
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        overrides = self.settings(PLANT_MODEL_REGISTRY_DIR=self.directory, PLANT_MODEL_POLL_SECONDS=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.registry = ModelRegistry()
+        self.batch = np.zeros((1, 128, 128, 3), dtype='float32')
+
+    def shadow(self, version, model, rate=1.0):
+        self.registry._set_shadow(ModelVersion(version, model, CLASS_NAMES))
+        self.registry._shadow_rate = rate
+
+    def drain_shadow(self):
+        self.registry._shadow_executor.submit(lambda: None).result(5)
+
+    def test_active_pointer_swaps_version_in_background(self):
+        models = {'v1': FixedModel(0), 'v2': FixedModel(1)}
+        loads = []
+
+        def load(version):
+            loads.append(version)
+            return ModelVersion(version, models[version], CLASS_NAMES)
+
+        with mock.patch.object(self.registry, 'load', side_effect=load):
+            self.assertEqual(self.registry.active().version, 'v1')
+            held = self.registry.active()
+
+            self.registry.write_pointer('ACTIVE', 'v2')
+            wait_until(lambda: self.registry.active().version == 'v2')
+
+        self.assertEqual(loads, ['v1', 'v2'])
+        # A request that picked up v1 keeps using it
+        self.assertIs(held.model, models['v1'])
+        self.assertEqual(self.registry.wanted(), ('v2', None, 0.1))
+
+    def test_install_pins_the_model(self):
+        self.registry.install(FixedModel(0), CLASS_NAMES, version='stub')
+        self.registry.write_pointer('ACTIVE', 'v2')
+        with mock.patch.object(self.registry, 'load') as load:
+            self.assertEqual(self.registry.active().version, 'stub')
+        load.assert_not_called()
+
+    def test_shadow_compares_raw_top_classes_on_the_same_batch(self):
+        self.registry.install(FixedModel(1), CLASS_NAMES, version='v1')
+        primary = self.registry.active()
+        candidate = FixedModel(2)
+        self.shadow('v2', candidate)
+
+        with self.assertLogs('ImageUpload.utils.registry', level='INFO') as logs:
+            self.registry.shadow_compare(primary, self.batch, primary.predict(self.batch)[0], 0.02)
+            self.drain_shadow()
+
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['primary_class'], 'Tomato_Early_blight')
+        self.assertEqual(record['candidate_class'], 'Potato___Late_blight')
+        self.assertFalse(record['agree'])
+        self.assertEqual(record['primary_ms'], 20.0)
+        self.assertIn('candidate_ms', record)
+        self.assertEqual(candidate.calls, 1)
+
+    def test_shadow_sampling_and_self_comparison(self):
+        self.registry.install(FixedModel(0), CLASS_NAMES, version='v1')
+        primary = self.registry.active()
+        candidate = FixedModel(0)
+        self.shadow('v2', candidate, rate=0.0)
+        self.registry.shadow_compare(primary, self.batch, np.array([1, 0, 0]), 0.01)
+        self.registry._shadow = primary
+        self.registry._shadow_rate = 1.0
+        self.registry.shadow_compare(primary, self.batch, np.array([1, 0, 0]), 0.01)
+        self.assertIsNone(self.registry._shadow_executor)
+        self.assertEqual(candidate.calls, 0)
+
+    def test_pending_shadow_runs_are_capped(self):
+        self.registry.install(FixedModel(0), CLASS_NAMES, version='v1')
+        primary = self.registry.active()
+        gate = threading.Event()
+        candidate = FixedModel(0, gate=gate)
+        self.shadow('v2', candidate)
+
+        with self.assertLogs('ImageUpload.utils.registry', level='INFO'):
+            for _ in range(MAX_PENDING_SHADOW + 5):
+                self.registry.shadow_compare(primary, self.batch, np.array([1, 0, 0]), 0.01)
+            self.assertEqual(self.registry._pending_shadow, MAX_PENDING_SHADOW)
+            gate.set()
+            self.drain_shadow()
+
+        self.assertEqual(candidate.calls, MAX_PENDING_SHADOW)
+        self.assertEqual(self.registry._pending_shadow, 0)
+
+    def write_version(self, version, class_names):
+        path = os.path.join(self.directory, version)
+        os.makedirs(path)
+        open(os.path.join(path, 'model.keras'), 'w').close()
+        with open(os.path.join(path, 'class_indices.json'), 'w') as f:
+            json.dump({name: index for index, name in class_names.items()}, f)
+
+    def test_load_checks_outputs_and_builds_catalogue(self):
+        self.write_version('v2', CLASS_NAMES)
+        self.write_version('v3', {0: 'Tomato_healthy', 1: 'Tomato_Early_blight'})
+        tensorflow = SimpleNamespace(keras=SimpleNamespace(models=SimpleNamespace(
+            load_model=lambda path: FixedModel(0),
+        )))
+        with mock.patch.dict('sys.modules', {'tensorflow': tensorflow}), \
+                mock.patch('ImageUpload.utils.labels.catalogue_for') as catalogue_for:
+            loaded = self.registry.load('v2')
+            catalogue_for.assert_called_once_with(loaded)
+            with self.assertRaisesMessage(ValueError, 'outputs 3 classes'):
+                self.registry.load('v3')
+        self.assertEqual(loaded.class_names, CLASS_NAMES)
+        self.assertEqual(catalogue_for.call_count, 1)
+
+    def test_mismatched_version_is_not_activated(self):
+        models = {'v1': FixedModel(0), 'v2': FixedModel(0, classes=5)}
+
+        def load(version):
+            return self.registry.warm_up(ModelVersion(version, models[version], CLASS_NAMES))
+
+        with mock.patch.object(self.registry, 'load', side_effect=load):
+            self.assertEqual(self.registry.active().version, 'v1')
+            self.registry.write_pointer('ACTIVE', 'v2')
+            with self.assertLogs('ImageUpload.utils.registry', level='ERROR') as logs:
+                self.registry.poll(force=True)
+                wait_until(lambda: not self.registry._loading)
+        self.assertIn('outputs 5 classes', logs.output[0])
+        self.assertEqual(self.registry._active.version, 'v1')
+
+    def test_install_refuses_mismatched_model(self):
+        self.registry.install(FixedModel(0), CLASS_NAMES, version='v1')
+        with self.assertRaisesMessage(ValueError, 'outputs 2 classes'):
+            self.registry.install(FixedModel(0, classes=2), CLASS_NAMES, version='v2')
+        gapped = {0: 'Tomato_healthy', 1: 'Tomato_Early_blight', 3: 'Potato___Late_blight'}
+        with self.assertRaisesMessage(ValueError, 'not numbered 0 to 2'):
+            self.registry.install(FixedModel(0), gapped, version='v3')
+        self.assertEqual(self.registry.active().version, 'v1')
+
+
+# Two versions of a model trained with different class orders
+VERSION_CLASSES = {
+    'v1': {0: 'Tomato Early blight', 1: 'Tomato healthy'},
+    'v2': {0: 'Tomato healthy', 1: 'Tomato Early blight'},
+}
+
+
+def report(class_index, model_version='v1', location='anand', **fields):
+    return PlantHealthReport.objects.create(
+        image='plant_images/leaf.jpg', health='Diseased', class_index=class_index,
+        model_version=model_version, location=location, **fields,
+    )
+
+
+class DiseaseTrendsTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch(
+            'ImageUpload.analytics.registry.class_names', side_effect=lambda version: VERSION_CLASSES[version],
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def buckets(self):
+        return {
+            (b.model_version, b.class_index, b.location): b.count for b in DiseaseDailyCount.objects.all()
+        }
+
+    def test_record_prediction_counts_per_version_class_and_location(self):
+        for r in (report(0), report(0, location=' Anand '), report(1), report(0, 'v2'), report(0, location='Surat')):
+            record_prediction(r)
+        record_prediction(report(None))
+        self.assertEqual(self.buckets(), {
+            ('v1', 0, 'Anand'): 2,
+            ('v1', 1, 'Anand'): 1,
+            ('v2', 0, 'Anand'): 1,
+            ('v1', 0, 'Surat'): 1,
+        })
+
+    def test_trends_sum_versions_by_class_name(self):
+        for r in (report(0), report(0), report(1, 'v2'), report(0, 'v2'), report(1, location='Surat')):
+            record_prediction(r)
+        trends = disease_trends(7)
+        today = timezone.localdate()
+        self.assertEqual(trends['totals'], {'Tomato Early blight': 3, 'Tomato healthy': 2})
+        self.assertEqual(trends['series'], [
+            {'day': today, 'class_name': 'Tomato Early blight', 'count': 3},
+            {'day': today, 'class_name': 'Tomato healthy', 'count': 2},
+        ])
+        self.assertEqual(disease_trends(7, ' surat')['totals'], {'Tomato healthy': 1})
+
+    def test_trends_window(self):
+        today = timezone.localdate()
+        for age in (0, 6, 7):
+            DiseaseDailyCount.objects.create(
+                day=today - timedelta(days=age), model_version='v1', class_index=0, location='Anand', count=1,
+            )
+        trends = disease_trends(7)
+        self.assertEqual(trends['since'], today - timedelta(days=6))
+        self.assertEqual(trends['totals'], {'Tomato Early blight': 2})
+        self.assertEqual(disease_trends(1000)['days'], MAX_TREND_DAYS)
+        self.assertEqual(disease_trends(0)['days'], 1)
+
+    def test_trends_endpoint(self):
+        record_prediction(report(1, location='Surat'))
+        response = self.client.get('/api/plant-health/trends/', {'days': 3, 'location': 'surat'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['days'], data['location']), (3, 'Surat'))
+        self.assertEqual(data['totals'], {'Tomato healthy': 1})
+        self.assertEqual(self.client.get('/api/plant-health/trends/', {'days': 'week'}).status_code, 400)
+
+    def test_rebuild_matches_incremental_counts(self):
+        for r in (report(0), report(1), report(0, 'v2'), report(0, None, location='Surat')):
+            record_prediction(r)
+        incremental = self.buckets()
+        DiseaseDailyCount.objects.update(count=99)
+        call_command('rebuild_disease_counts', stdout=StringIO())
+        self.assertEqual(self.buckets(), incremental)
+        self.assertEqual(incremental[('', 0, 'Surat')], 1)
+
+
+class DailyCountVersionMigrationTests(TransactionTestCase):
+    before = [('ImageUpload', '0005_plant_labels')]
+    after = [('ImageUpload', '0006_daily_count_model_version')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_buckets_are_split_by_model_version(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        Report = apps.get_model('ImageUpload', 'PlantHealthReport')
+        Count = apps.get_model('ImageUpload', 'DiseaseDailyCount')
+        for version in ('v1', 'v1', 'v2', None):
+            Report.objects.create(image='plant_images/leaf.jpg', health='Diseased', class_index=0,
+                                  model_version=version, location='anand')
+        # Before 0006 one bucket mixed every version
+        Count.objects.create(day=timezone.localdate(), class_index=0, location='Anand', count=4)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        apps = executor.loader.project_state(self.after).apps
+        Count = apps.get_model('ImageUpload', 'DiseaseDailyCount')
+        self.assertEqual(
+            sorted(Count.objects.values_list('model_version', 'class_index', 'location', 'count')),
+            [('', 0, 'Anand', 1), ('v1', 0, 'Anand', 2), ('v2', 0, 'Anand', 1)],
+        )
@@ -1,7 +1,9 @@
 from django.urls import path
-from .views import PlantHealthReportAPIView
+from .views import PlantHealthReportAPIView, DiseaseTrendsAPIView, PlantHealthReportExportAPIView
 
 urlpatterns = [
     # This single endpoint now handles both GET (list) and POST (upload and predict)
     path('plant-health/', PlantHealthReportAPIView.as_view(), name='plant-health-api'),
+    path('plant-health/trends/', DiseaseTrendsAPIView.as_view(), name='plant-health-trends'),
+    path('plant-health/export.<str:fmt>', PlantHealthReportExportAPIView.as_view(), name='plant-health-export'),
 ]
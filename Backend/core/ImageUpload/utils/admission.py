@@ -0,0 +1,229 @@
+"""
+Admission control in front of the inference engine.
+
+Every prediction first passes two token buckets, one for the caller and one
+for the caller's individual_type (INFERENCE_USER_LIMITS,
+INFERENCE_TYPE_LIMITS); an empty bucket is a 429. It then queues for one of
+INFERENCE_CONCURRENCY inference slots. The queue has two priority lanes:
+"interactive" (farmers and everyone else) is always served before "bulk"
+(partner accounts, see accounts.permissions.PARTNER_TYPES). When the
+expected wait in a lane exceeds its INFERENCE_LATENCY_TARGET_MS, or a
+request has waited that long, the request is shed with a 503 and its
+rate-limit tokens are given back. Both rejections carry Retry-After.
+
+Buckets and queue live in the worker process, so limits apply per worker
+(see the INFERENCE_* settings for what that means under gunicorn).
+"""
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+
+from accounts.permissions import PARTNER_TYPES
+from core.metrics import Counter, Gauge, Histogram
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+# Highest priority first
+LANES = (INTERACTIVE, BULK)
+
+QUEUE_DEPTH = Gauge('inference_queue_depth', 'Predictions waiting for an inference slot.', ('lane',))
+IN_FLIGHT = Gauge('inference_in_flight', 'Predictions holding an inference slot.')
+DECISIONS = Counter(
+    'inference_admission_total', 'Admission decisions per lane.', ('lane', 'outcome'),
+)
+QUEUE_WAIT = Histogram('inference_queue_wait_seconds', 'Time spent waiting for an inference slot.', ('lane',))
+
+
+class Rejected(Exception):
+    def __init__(self, status, message, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    """
+    `rate` tokens per minute, holding at most `burst`.
+    """
+    def __init__(self, rate, burst):
+        self.rate = rate / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        """
+        Seconds until a token is available (0 if one is now).
+        """
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+def lane_for(user):
+    if getattr(user, 'is_authenticated', False) and user.individual_type in PARTNER_TYPES:
+        return BULK
+    return INTERACTIVE
+
+
+def caller_key(request):
+    user = request.user
+    if getattr(user, 'is_authenticated', False):
+        return f'user:{user.pk}', user.individual_type or 'Unknown'
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}", 'Anonymous'
+
+
+class RateLimiter:
+    max_buckets = 10000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = OrderedDict()
+        self.types = {}
+
+    def bucket(self, buckets, key, limits):
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(*limits)
+        return bucket
+
+    def take(self, key, individual_type, lane):
+        """
+        Takes one token from the caller's and the type's bucket, or raises
+        Rejected(429) without taking either. Returns the buckets for refund().
+        """
+        now = time.monotonic()
+        with self.lock:
+            user_bucket = self.bucket(self.users, key, settings.INFERENCE_USER_LIMITS[lane])
+            self.users.move_to_end(key)
+            if len(self.users) > self.max_buckets:
+                self.users.popitem(last=False)
+            type_limits = settings.INFERENCE_TYPE_LIMITS.get(individual_type)
+            buckets = [user_bucket]
+            if type_limits:
+                buckets.append(self.bucket(self.types, individual_type, type_limits))
+
+            for bucket in buckets:
+                bucket.refill(now)
+            wait = max(bucket.wait_time() for bucket in buckets)
+            if wait:
+                raise Rejected(429, 'Too many image uploads. Please try again shortly.', wait)
+            for bucket in buckets:
+                bucket.tokens -= 1
+            return buckets
+
+    def refund(self, buckets):
+        with self.lock:
+            for bucket in buckets:
+                bucket.tokens = min(bucket.burst, bucket.tokens + 1)
+
+
+class AdmissionController:
+    """
+    A fixed number of inference slots with strict-priority lanes and
+    latency-based shedding.
+    """
+    def __init__(self, slots=None):
+        self.slots = slots
+        self.cond = threading.Condition()
+        self.in_flight = 0
+        self.waiting = {lane: deque() for lane in LANES}
+        # Running average of how long a prediction holds its slot
+        self.service_time = 0.5
+
+    def capacity(self):
+        return self.slots or settings.INFERENCE_CONCURRENCY
+
+    def expected_wait(self, lane):
+        """
+        Seconds a new request in `lane` would wait: everyone queued in this
+        lane or a higher one goes first.
+        """
+        ahead = sum(len(self.waiting[l]) for l in LANES[:LANES.index(lane) + 1])
+        if ahead == 0 and self.in_flight < self.capacity():
+            return 0.0
+        return (ahead + 1) * self.service_time / self.capacity()
+
+    def next_ticket(self):
+        for lane in LANES:
+            if self.waiting[lane]:
+                return self.waiting[lane][0]
+        return None
+
+    @contextmanager
+    def slot(self, lane):
+        target = settings.INFERENCE_LATENCY_TARGET_MS[lane] / 1000.0
+        enqueued = time.monotonic()
+        with self.cond:
+            expected = self.expected_wait(lane)
+            if expected > target:
+                DECISIONS.inc(lane=lane, outcome='shed')
+                raise Rejected(503, 'The image analysis service is busy. Please try again shortly.', expected)
+
+            ticket = object()
+            self.waiting[lane].append(ticket)
+            QUEUE_DEPTH.inc(lane=lane)
+            try:
+                while not (self.in_flight < self.capacity() and self.next_ticket() is ticket):
+                    remaining = enqueued + target - time.monotonic()
+                    if remaining <= 0:
+                        DECISIONS.inc(lane=lane, outcome='timed_out')
+                        raise Rejected(
+                            503, 'The image analysis service is busy. Please try again shortly.',
+                            self.expected_wait(lane),
+                        )
+                    self.cond.wait(remaining)
+            finally:
+                self.waiting[lane].remove(ticket)
+                QUEUE_DEPTH.dec(lane=lane)
+                # Someone else may be at the head now
+                self.cond.notify_all()
+            self.in_flight += 1
+            IN_FLIGHT.set(self.in_flight)
+
+        DECISIONS.inc(lane=lane, outcome='admitted')
+        started = time.monotonic()
+        QUEUE_WAIT.observe(started - enqueued, lane=lane)
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.in_flight -= 1
+                IN_FLIGHT.set(self.in_flight)
+                self.service_time = 0.8 * self.service_time + 0.2 * (time.monotonic() - started)
+                self.cond.notify_all()
+
+
+limiter = RateLimiter()
+controller = AdmissionController()
+
+
+@contextmanager
+def admit(request):
+    """
+    Holds an inference slot for the body of the with-block, or raises
+    Rejected (429 rate limited, 503 shed).
+    """
+    lane = lane_for(request.user)
+    key, individual_type = caller_key(request)
+    try:
+        taken = limiter.take(key, individual_type, lane)
+    except Rejected:
+        DECISIONS.inc(lane=lane, outcome='rate_limited')
+        raise
+    stack = ExitStack()
+    try:
+        stack.enter_context(controller.slot(lane))
+    except Rejected:
+        # A shed request did no work, so it shouldn't count against the caller
+        limiter.refund(taken)
+        raise
+    with stack:
+        yield
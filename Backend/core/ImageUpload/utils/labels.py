@@ -0,0 +1,100 @@
+"""
+Label catalogue: what each model output index means.
+
+For a model version the catalogue is a list addressed by class index, each
+entry a LabelRecord built from the PlantLabel table (editable in the admin).
+Classes without a row fall back to values derived from the class name and
+are reported when the catalogue is built, as are rows that match no class.
+
+Catalogues are built when the registry loads a model version, memoised per
+process and rebuilt when a PlantLabel is saved or deleted, or at the latest
+after LABEL_CACHE_SECONDS. The change stamp lives in the Django cache: with
+the per-process default cache an edit only reaches the worker that made it,
+and the others after LABEL_CACHE_SECONDS; set REDIS_URL to share it.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+LabelRecord = namedtuple('LabelRecord', 'class_name plant issue health recommendation')
+
+GENERIC_RECOMMENDATION = "General care is advised. No specific recommendation available."
+STAMP_KEY = 'plant_labels:stamp'
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def derive(class_name):
+    """
+    Fallback record for a class with no PlantLabel row, e.g.
+    "Tomato_Leaf_Mold" -> plant "Tomato", issue "Leaf Mold".
+    """
+    parts = [p for p in class_name.split('_') if p]
+    plant = parts[0] if parts else class_name
+    issue = ' '.join(parts[1:])
+    health = "healthy" if "healthy" in issue.lower() else "disease"
+    if health == "healthy":
+        issue = "No disease detected"
+    return LabelRecord(class_name, plant, issue, health, GENERIC_RECOMMENDATION)
+
+
+def build_catalogue(class_names):
+    """
+    [LabelRecord] indexed by class index for a {index: class name} map.
+    """
+    from ImageUpload.models import PlantLabel
+
+    rows = {label.class_name: label for label in PlantLabel.objects.all()}
+    size = max(class_names) + 1 if class_names else 0
+    catalogue = [None] * size
+    missing = []
+    for index, name in class_names.items():
+        label = rows.pop(name, None)
+        if label is None:
+            missing.append(name)
+            catalogue[index] = derive(name)
+        else:
+            catalogue[index] = LabelRecord(name, label.plant, label.issue, label.health, label.recommendation)
+
+    if missing:
+        logger.warning("No PlantLabel for classes %s; using generic advice.", ', '.join(missing))
+    if rows:
+        logger.warning("PlantLabel rows match no model class (typo?): %s", ', '.join(sorted(rows)))
+    return catalogue
+
+
+def current_stamp():
+    return cache.get(STAMP_KEY, 0)
+
+
+def catalogue_for(version):
+    """
+    The memoised catalogue for a registry.ModelVersion.
+    """
+    stamp = current_stamp()
+    now = time.monotonic()
+    entry = _memo.get(version.version)
+    if entry is not None and entry[0] == stamp and now - entry[1] < settings.LABEL_CACHE_SECONDS:
+        return entry[2]
+    with _memo_lock:
+        catalogue = build_catalogue(version.class_names)
+        _memo[version.version] = (stamp, now, catalogue)
+    return catalogue
+
+
+def invalidate(**kwargs):
+    """
+    post_save/post_delete receiver for PlantLabel.
+    """
+    try:
+        cache.incr(STAMP_KEY)
+    except ValueError:
+        cache.set(STAMP_KEY, 1, timeout=None)
+    _memo.clear()
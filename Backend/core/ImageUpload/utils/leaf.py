@@ -0,0 +1,157 @@
+"""
+Leaf-region detection for field photos, in NumPy on a small copy of the
+image so it stays cheap next to inference.
+
+Pixels are classed as vegetation by the excess-green index (2g - r - b on
+chromaticity), which keeps green and yellowing leaves but drops soil, sky
+and shadow. The mask is pooled into a coarse grid; cells count as leaf when
+they are leafy enough and not smoother than the photo's typical cell (an
+out-of-focus green background is), and the largest connected block of leaf
+cells is the crop. Photos where the leaf already
+fills the frame, or no leaf is found, are left alone.
+"""
+from collections import deque, namedtuple
+
+import numpy as np
+from PIL import Image
+
+ANALYSIS_SIDE = 256
+GRID = 32
+EXG_THRESHOLD = 0.06
+DARK_THRESHOLD = 120
+CELL_THRESHOLD = 0.25
+# Cells with less edge energy than this share of the median cell are treated as blur
+TEXTURE_THRESHOLD = 0.5
+MIN_COVERAGE = 0.02
+# A crop covering more than this share of the photo isn't worth making
+MAX_CROP_AREA = 0.8
+PADDING = 0.1
+
+LeafAnalysis = namedtuple('LeafAnalysis', ['box', 'mask', 'coverage'])
+
+
+def vegetation_mask(pixels):
+    """
+    uint8 HxWx3 array -> boolean HxW mask of leaf-coloured pixels.
+    """
+    rgb = pixels.astype(np.float32)
+    total = rgb.sum(axis=2)
+    exg = (2 * rgb[..., 1] - rgb[..., 0] - rgb[..., 2]) / np.maximum(total, 1)
+    return (exg > EXG_THRESHOLD) & (total > DARK_THRESHOLD)
+
+
+def cell_coverage(mask, grid=GRID):
+    """
+    Mean of a HxW array over each cell of a grid x grid pooling, plus the
+    cell height and width.
+    """
+    height, width = mask.shape
+    cell_h, cell_w = height // grid, width // grid
+    trimmed = mask[:cell_h * grid, :cell_w * grid]
+    return trimmed.reshape(grid, cell_h, grid, cell_w).mean(axis=(1, 3)), cell_h, cell_w
+
+
+def edge_energy(pixels):
+    """
+    Absolute horizontal plus vertical gradient of the grey image.
+    """
+    grey = pixels.astype(np.float32).mean(axis=2)
+    energy = np.zeros_like(grey)
+    energy[:, 1:] += np.abs(np.diff(grey, axis=1))
+    energy[1:, :] += np.abs(np.diff(grey, axis=0))
+    return energy
+
+
+def largest_region(cells):
+    """
+    (top, left, bottom, right) cell bounds, inclusive, of the 4-connected
+    region of True cells with the most cells, or None.
+    """
+    seen = np.zeros_like(cells, dtype=bool)
+    rows, cols = cells.shape
+    best, best_size = None, 0
+    for start in zip(*np.nonzero(cells)):
+        if seen[start]:
+            continue
+        seen[start] = True
+        queue = deque([start])
+        top, left, bottom, right = start[0], start[1], start[0], start[1]
+        size = 0
+        while queue:
+            r, c = queue.popleft()
+            size += 1
+            top, bottom = min(top, r), max(bottom, r)
+            left, right = min(left, c), max(right, c)
+            for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if 0 <= nr < rows and 0 <= nc < cols and cells[nr, nc] and not seen[nr, nc]:
+                    seen[nr, nc] = True
+                    queue.append((nr, nc))
+        if size > best_size:
+            best, best_size = (top, left, bottom, right), size
+    return best
+
+
+def square_box(left, upper, right, lower, width, height):
+    """
+    Pads a box and grows its shorter side towards a square (the model input
+    is square), as far as the image allows, keeping it inside the image.
+    """
+    box_w, box_h = (right - left) * (1 + 2 * PADDING), (lower - upper) * (1 + 2 * PADDING)
+    side = max(box_w, box_h)
+    new_w, new_h = min(side, width), min(side, height)
+    cx, cy = (left + right) / 2, (lower + upper) / 2
+    left = int(min(max(cx - new_w / 2, 0), width - new_w))
+    upper = int(min(max(cy - new_h / 2, 0), height - new_h))
+    return left, upper, left + int(new_w), upper + int(new_h)
+
+
+def analyse(img):
+    """
+    LeafAnalysis for a decoded RGB image. box is the crop in img coordinates,
+    or None to keep the whole photo; mask is the vegetation mask of the
+    analysis-sized copy.
+    """
+    width, height = img.size
+    scale = ANALYSIS_SIDE / max(width, height)
+    small = img.resize((max(1, round(width * scale)), max(1, round(height * scale))), Image.NEAREST)
+    pixels = np.asarray(small)
+    mask = vegetation_mask(pixels)
+    coverage = float(mask.mean())
+    if coverage < MIN_COVERAGE or min(mask.shape) < GRID:
+        return LeafAnalysis(None, mask, coverage)
+
+    cells, cell_h, cell_w = cell_coverage(mask)
+    texture = cell_coverage(edge_energy(pixels))[0]
+    region = largest_region((cells > CELL_THRESHOLD) & (texture >= TEXTURE_THRESHOLD * np.median(texture)))
+    if region is None:
+        return LeafAnalysis(None, mask, coverage)
+
+    top, left, bottom, right = region
+    sx, sy = width / small.width, height / small.height
+    box = square_box(
+        left * cell_w * sx, top * cell_h * sy, (right + 1) * cell_w * sx, (bottom + 1) * cell_h * sy, width, height,
+    )
+    if (box[2] - box[0]) * (box[3] - box[1]) > MAX_CROP_AREA * width * height:
+        box = None
+    return LeafAnalysis(box, mask, coverage)
+
+
+def tile_boxes(img, mask, grid):
+    """
+    grid x grid tiles of the image that contain some leaf, as
+    ((left, upper, right, lower), leaf share) pairs.
+    """
+    width, height = img.size
+    if min(mask.shape) >= grid:
+        coverage = cell_coverage(mask, grid)[0]
+    else:
+        coverage = np.ones((grid, grid))
+    tiles = []
+    for row in range(grid):
+        for col in range(grid):
+            share = float(coverage[row, col])
+            if share < MIN_COVERAGE:
+                continue
+            box = (col * width // grid, row * height // grid, (col + 1) * width // grid, (row + 1) * height // grid)
+            tiles.append((box, share))
+    return tiles
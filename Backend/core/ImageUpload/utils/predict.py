@@ -1,88 +1,242 @@
-import tensorflow as tf
-from tensorflow.keras.preprocessing import image
 import numpy as np
+from PIL import Image
 import json
-import os
+import logging
+import time
 
-# --- Load Model and Class Indices ---
-MODEL_PATH = 'ImageUpload/cnn_model/plant_disease_model.h5'
-CLASS_INDICES_PATH = 'ImageUpload/cnn_model/class_indices.json'
+from django.conf import settings
 
-if not os.path.exists(MODEL_PATH) or not os.path.exists(CLASS_INDICES_PATH):
-    raise FileNotFoundError(
-        "Model file 'plant_disease_model.h5' or 'class_indices.json' not found. "
-        "Please run the updated train_model.py first."
-        f"{MODEL_PATH}, {CLASS_INDICES_PATH}"
+from core.metrics import Counter, Histogram, phase
+from . import leaf
+from .labels import catalogue_for
+from .registry import INPUT_SIZE, registry
+
+logger = logging.getLogger(__name__)
+
+TTA_RUNS = Counter(
+    'prediction_tta_total', 'Predictions by whether the low-confidence TTA pass ran.', ('triggered',),
+)
+TTA_CHANGED = Counter('prediction_tta_changed_total', 'TTA passes that changed the predicted class.')
+TTA_LATENCY = Histogram('prediction_tta_seconds', 'Extra latency added by the TTA pass.')
+LEAF_LATENCY = Histogram('prediction_leaf_crop_seconds', 'Time spent finding the leaf region.')
+LEAF_CROPS = Counter('prediction_leaf_crop_total', 'Photos by whether they were cropped to a leaf.', ('cropped',))
+TILED = Counter('prediction_tiled_total', 'Predictions that also classified image tiles.')
+OVER_BUDGET = Counter(
+    'prediction_preprocess_over_budget_total', 'Predictions that skipped tiling because preprocessing ran long.',
+)
+
+IMAGE_SIZE = INPUT_SIZE
+
+
+def get_model():
+    """
+    The active model. Loading and version switching are handled by
+    registry.ModelRegistry; TensorFlow is only imported when a model is
+    actually loaded.
+    """
+    return registry.active().model
+
+
+def set_model(model, class_names=None):
+    """
+    Replaces the model used for predictions. Anything with a Keras-style
+    predict(batch) method works, e.g. the stub used by the benchmark suite.
+    """
+    registry.install(model, class_names or registry.class_names())
+
+
+def decode(image_path):
+    """
+    Opens an image (path or an open file such as an upload) as RGB. JPEGs are
+    decoded at a reduced scale when they are much larger than
+    PREDICTION_DECODE_SIDE.
+    """
+    img = Image.open(image_path)
+    side = settings.PREDICTION_DECODE_SIDE
+    img.draft('RGB', (side, side))
+    img.load()
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    return img
+
+
+def crop_to_leaf(img):
+    """
+    Crops a decoded image to its dominant leaf region when one is found
+    (PREDICTION_LEAF_CROP). Returns the image and the leaf.LeafAnalysis, or
+    None when cropping is off.
+    """
+    if not settings.PREDICTION_LEAF_CROP:
+        return img, None
+    start = time.perf_counter()
+    analysis = leaf.analyse(img)
+    LEAF_LATENCY.observe(time.perf_counter() - start)
+    LEAF_CROPS.inc(cropped='yes' if analysis.box else 'no')
+    if analysis.box:
+        img = img.crop(analysis.box)
+    return img, analysis
+
+
+def load_image(image_path):
+    """
+    Decodes, crops to the leaf and resizes the same way keras' load_img does
+    (RGB, nearest-neighbour resize).
+    """
+    img, _ = crop_to_leaf(decode(image_path))
+    return img.resize(IMAGE_SIZE, Image.NEAREST)
+
+
+def preprocess(img):
+    """
+    PIL image -> normalised float32 batch of one.
+    """
+    img_array = np.asarray(img, dtype='float32')
+    img_array = np.expand_dims(img_array, axis=0)
+    return img_array / 255.0
+
+
+def augment(img):
+    """
+    Test-time augmentations of a decoded image: horizontal and vertical
+    flips plus a centre crop, as one preprocessed batch.
+    """
+    width, height = img.size
+    margin_x, margin_y = width // 10, height // 10
+    crop = img.crop((margin_x, margin_y, width - margin_x, height - margin_y)).resize(IMAGE_SIZE, Image.NEAREST)
+    variants = [
+        img.transpose(Image.FLIP_LEFT_RIGHT),
+        img.transpose(Image.FLIP_TOP_BOTTOM),
+        crop,
+    ]
+    return np.concatenate([preprocess(v) for v in variants])
+
+
+def second_opinion(version, img, probabilities):
+    """
+    Runs the augmentations through the model in one batched call and averages
+    them with the original prediction.
+    """
+    start = time.perf_counter()
+    with phase('tta'):
+        augmented = version.predict(augment(img), role='tta')
+    averaged = np.vstack([probabilities[np.newaxis, :], augmented]).mean(axis=0)
+    TTA_LATENCY.observe(time.perf_counter() - start)
+    if np.argmax(averaged) != np.argmax(probabilities):
+        TTA_CHANGED.inc()
+    return averaged
+
+
+def tile_batch(img, analysis):
+    """
+    Preprocessed PREDICTION_TILE_GRID x PREDICTION_TILE_GRID tiles of a
+    photo that contain leaf, or None if none do.
+    """
+    mask = analysis.mask if analysis else leaf.vegetation_mask(
+        np.asarray(img.resize((leaf.ANALYSIS_SIDE, leaf.ANALYSIS_SIDE), Image.NEAREST))
     )
+    tiles = leaf.tile_boxes(img, mask, settings.PREDICTION_TILE_GRID)
+    if not tiles:
+        return None
+    return np.concatenate([preprocess(img.crop(box).resize(IMAGE_SIZE, Image.NEAREST)) for box, _ in tiles])
 
-model = tf.keras.models.load_model(MODEL_PATH)
-with open(CLASS_INDICES_PATH, 'r') as f:
-    class_indices = json.load(f)
-
-# Invert the dictionary to map index to class name
-class_names = {v: k for k, v in class_indices.items()}
-
-# --- New Recommendations for PlantVillage Dataset ---
-RECOMMENDATIONS = {
-    "Pepper__bell___Bacterial_spot": "Use copper-based fungicides. Avoid overhead watering. Rotate crops and remove infected plant debris.",
-    "Pepper__bell___healthy": "Your pepper plant appears healthy. Ensure consistent watering and provide support as it grows.",
-    "Potato___Early_blight": "Apply fungicides containing chlorothalonil or mancozeb. Ensure good air circulation and avoid water on leaves.",
-    "Potato___Late_blight": "This is a serious disease. Use fungicides like metalaxyl or chlorothalonil immediately. Destroy infected plants to prevent spread.",
-    "Potato___healthy": "Your potato plants look healthy. Continue to 'hill' soil around the base to protect tubers from sunlight.",
-    "Tomato_Bacterial_spot": "Apply copper-based bactericides. Mulch around plants to prevent soil splash. Do not work with plants when they are wet.",
-    "Tomato_Early_blight": "Prune lower leaves. Use fungicides like chlorothalonil. Stake plants to improve air circulation.",
-    "Tomato_Late_blight": "A devastating disease. Act fast. Use targeted fungicides and remove all infected plants from the garden.",
-    "Tomato_Leaf_Mold": "Ensure good ventilation, especially in greenhouses. Use fungicides. Some tomato varieties are resistant.",
-    "Tomato_Septoria_leaf_spot": "Remove infected leaves immediately. Apply fungicides. Mulch heavily to reduce water splashing from soil.",
-    "Tomato_Spider_mites_Two-spotted_spider_mite": "Use insecticidal soap or neem oil. Introduce predatory mites. Mist plants to increase humidity.",
-    "Tomato__Target_Spot": "Improve air circulation. Apply a fungicide. Remove and destroy crop debris after harvest.",
-    "Tomato__Tomato_YellowLeaf__Curl_Virus": "Control whiteflies, which spread the virus. Use insecticidal soap or reflective mulch. Remove infected plants.",
-    "Tomato__Tomato_mosaic_virus": "There is no cure. Remove and destroy infected plants. Disinfect tools and wash hands after handling.",
-    "Tomato_healthy": "Your tomato plant is healthy. Continue with regular watering and feeding, especially when fruit begins to form."
-}
+
+def aggregate(probabilities):
+    """
+    Combines [main image, tile, tile, ...] predictions: the main (leaf-crop)
+    prediction and the mean of the tiles count equally.
+    """
+    if len(probabilities) == 1:
+        return probabilities[0]
+    return (probabilities[0] + probabilities[1:].mean(axis=0)) / 2
+
+
+def top_k(probabilities, class_names, k):
+    indices = np.argsort(probabilities)[::-1][:k]
+    return [
+        {
+            "class_index": int(i),
+            "class_name": class_names[int(i)],
+            "confidence": round(float(probabilities[i]) * 100, 2),
+        }
+        for i in indices
+    ]
 
 
 def predict_plant_disease(image_path):
     """
     Loads an image, preprocesses it, and predicts the plant disease using the PlantVillage model.
+
+    Field shots are cropped to the dominant leaf region first. Large photos
+    are also cut into tiles that go through the model in the same batch as
+    the main image, unless the leaf crop already used up
+    PREDICTION_PREPROCESS_BUDGET_MS.
+
+    When the top class is below PREDICTION_TTA_THRESHOLD percent, flipped and
+    cropped variants are classified in one extra batch and averaged in. If the
+    result is still below PREDICTION_MIN_CONFIDENCE it is marked
+    "low_confidence" for the view's PREDICTION_LOW_CONFIDENCE_POLICY.
     """
     try:
         # Load and preprocess the image
-        img = image.load_img(image_path, target_size=(128, 128))
-        img_array = image.img_to_array(img)
-        img_array = np.expand_dims(img_array, axis=0)
-        img_array /= 255.0
-
-        # Make prediction
-        predictions = model.predict(img_array)
-        predicted_class_index = np.argmax(predictions[0])
-        confidence = float(np.max(predictions[0])) * 100
-
-        # Get class name
-        predicted_class_name = class_names[predicted_class_index]
-        
-        # Format the output
-        parts = predicted_class_name.split('_')
-        plant = parts[0]
-        issue = ' '.join(parts[1:])
-
-        health = "healthy" if "healthy" in issue.lower() else "disease"
-        if health == "healthy":
-            issue = "No disease detected"
-
-        # Get recommendation
-        recommendation = RECOMMENDATIONS.get(predicted_class_name, "General care is advised. No specific recommendation available.")
+        with phase('decode'):
+            original = decode(image_path)
+        start = time.perf_counter()
+        with phase('leaf_crop'):
+            cropped, analysis = crop_to_leaf(original)
+        with phase('preprocess'):
+            img = cropped.resize(IMAGE_SIZE, Image.NEAREST)
+            img_array = preprocess(img)
+
+        tiles = None
+        if settings.PREDICTION_TILING and min(original.size) >= settings.PREDICTION_TILE_MIN_SIDE:
+            if (time.perf_counter() - start) * 1000 > settings.PREDICTION_PREPROCESS_BUDGET_MS:
+                OVER_BUDGET.inc()
+            else:
+                with phase('tiles'):
+                    tiles = tile_batch(original, analysis)
+
+        # Make prediction. Hold on to this version for the whole request so a
+        # swap in the background doesn't mix two models' outputs.
+        version = registry.active()
+        class_names = version.class_names
+        batch = img_array if tiles is None else np.concatenate([img_array, tiles])
+        with phase('inference'):
+            inference_start = time.perf_counter()
+            predictions = version.predict(batch)
+            inference_seconds = time.perf_counter() - inference_start
+        probabilities = aggregate(np.asarray(predictions, dtype='float32'))
+        if tiles is not None:
+            TILED.inc()
+
+        tta = settings.PREDICTION_TTA_ENABLED and float(np.max(probabilities)) * 100 < settings.PREDICTION_TTA_THRESHOLD
+        TTA_RUNS.inc(triggered='yes' if tta else 'no')
+        if tta:
+            probabilities = second_opinion(version, img, probabilities)
+
+        predicted_class_index = int(np.argmax(probabilities))
+        confidence = float(probabilities[predicted_class_index]) * 100
+
+        # Look up what the class means
+        label = catalogue_for(version)[predicted_class_index]
+        registry.shadow_compare(version, batch, predictions[0], inference_seconds)
 
         return {
-            "health": health,
+            "health": label.health,
             "confidence": round(confidence, 2),
-            "plant": plant,
-            "issue": issue,
-            "recommendation": recommendation
+            "plant": label.plant,
+            "issue": label.issue,
+            "recommendation": label.recommendation,
+            "class_index": predicted_class_index,
+            "model_version": version.version,
+            "top_k": top_k(probabilities, class_names, settings.PREDICTION_TOP_K),
+            "tta": tta,
+            "low_confidence": confidence < settings.PREDICTION_MIN_CONFIDENCE,
+            "leaf_box": analysis.box if analysis else None,
+            "tiles": 0 if tiles is None else len(tiles),
         }
 
     except Exception as e:
-        print(f"An error occurred during prediction: {e}")
+        logger.exception("An error occurred during prediction")
         return {
             "error": "Failed to analyze image.",
             "details": str(e)
@@ -0,0 +1,330 @@
+"""
+Versioned plant disease models.
+
+Each version lives in PLANT_MODEL_REGISTRY_DIR/<version>/ with a Keras model
+file (model.keras, model.h5 or plant_disease_model.h5) and its
+class_indices.json. The original artifact in PLANT_MODEL_DIR is always
+available as version "v1".
+
+Which version serves traffic is read from the ACTIVE pointer file in the
+registry directory, and an optional candidate from SHADOW ("<version>
+[<sample rate>]"). Workers poll the pointers every PLANT_MODEL_POLL_SECONDS,
+load and warm up a new version in a background thread and then swap it in
+with a single assignment. Requests that already hold the previous version
+finish on it. Use `manage.py plant_model` to change the pointers.
+
+A version whose model doesn't output exactly one score per class in its
+class_indices.json is refused when it is loaded: the previous version keeps
+serving and the error is logged.
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+
+from core.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VERSION = 'v1'
+# (width, height) the models expect
+INPUT_SIZE = (128, 128)
+MODEL_FILENAMES = ('model.keras', 'model.h5', 'plant_disease_model.h5')
+CLASS_INDICES_FILENAME = 'class_indices.json'
+ACTIVE_POINTER = 'ACTIVE'
+SHADOW_POINTER = 'SHADOW'
+# Shadow comparisons waiting beyond this are dropped rather than queued
+MAX_PENDING_SHADOW = 8
+
+MODEL_LATENCY = Histogram('model_inference_seconds', 'Model forward pass time.', ('version', 'role'))
+SHADOW_SLOWDOWN = Histogram(
+    'model_shadow_latency_ratio', 'Candidate inference time relative to the primary on the same batch.',
+    ('candidate',), buckets=(0.5, 0.75, 0.9, 1.0, 1.1, 1.25, 1.5, 2.0, 3.0),
+)
+SHADOW_RUNS = Counter('model_shadow_total', 'Shadow comparisons by candidate and agreement.', ('candidate', 'agree'))
+ACTIVE_VERSION = Gauge('model_active_info', 'Currently active model version (value is always 1).', ('version',))
+
+
+class ModelVersion:
+    def __init__(self, version, model, class_names):
+        self.version = version
+        self.model = model
+        # index -> class name
+        self.class_names = class_names
+        self.loaded_at = time.time()
+
+    def predict(self, batch, role='primary'):
+        start = time.perf_counter()
+        predictions = self.model.predict(batch, verbose=0)
+        MODEL_LATENCY.observe(time.perf_counter() - start, version=self.version, role=role)
+        return predictions
+
+
+def read_class_names(path):
+    with open(path, 'r') as f:
+        class_indices = json.load(f)
+    # Invert the dictionary to map index to class name
+    return {v: k for k, v in class_indices.items()}
+
+
+def check_outputs(loaded, outputs):
+    """
+    Raises ValueError unless the warm-up `outputs` have one score per class
+    and the class indices run from 0 without gaps.
+    """
+    count = len(loaded.class_names)
+    if sorted(loaded.class_names) != list(range(count)):
+        raise ValueError(f"Class indices of model {loaded.version} are not numbered 0 to {count - 1}.")
+    width = np.shape(outputs)[-1]
+    if width != count:
+        raise ValueError(
+            f"Model {loaded.version} outputs {width} classes but its {CLASS_INDICES_FILENAME} lists {count}."
+        )
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._initial_load_lock = threading.Lock()
+        self._active = None
+        self._shadow = None
+        self._shadow_rate = 0.0
+        self._pinned = False
+        self._loading = set()
+        self._last_poll = 0.0
+        self._pending_shadow = 0
+        self._shadow_executor = None
+
+    # --- Artifacts and pointers ---
+
+    @property
+    def directory(self):
+        return str(settings.PLANT_MODEL_REGISTRY_DIR)
+
+    def version_dir(self, version):
+        if version == DEFAULT_VERSION:
+            return str(settings.PLANT_MODEL_DIR)
+        return os.path.join(self.directory, version)
+
+    def artifact_paths(self, version):
+        """
+        (model path, class indices path) for a version, or FileNotFoundError.
+        """
+        base = self.version_dir(version)
+        for filename in MODEL_FILENAMES:
+            model_path = os.path.join(base, filename)
+            if os.path.exists(model_path):
+                return model_path, os.path.join(base, CLASS_INDICES_FILENAME)
+        raise FileNotFoundError(
+            f"No model file ({', '.join(MODEL_FILENAMES)}) for version '{version}' in {base}. "
+            "Please run the updated train_model.py first."
+        )
+
+    def versions(self):
+        found = []
+        if any(os.path.exists(os.path.join(str(settings.PLANT_MODEL_DIR), f)) for f in MODEL_FILENAMES):
+            found.append(DEFAULT_VERSION)
+        if os.path.isdir(self.directory):
+            found += sorted(
+                entry.name for entry in os.scandir(self.directory)
+                if entry.is_dir() and any(os.path.exists(os.path.join(entry.path, f)) for f in MODEL_FILENAMES)
+            )
+        return found
+
+    def read_pointer(self, name):
+        try:
+            with open(os.path.join(self.directory, name)) as f:
+                return f.read().split()
+        except OSError:
+            return []
+
+    def write_pointer(self, name, *values):
+        """
+        Atomically replaces a pointer file; an empty value removes it.
+        """
+        path = os.path.join(self.directory, name)
+        if not values:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(' '.join(str(v) for v in values) + '\n')
+        os.replace(tmp, path)
+
+    def wanted(self):
+        """
+        (active version, shadow version or None, shadow sample rate) as
+        configured by the pointer files.
+        """
+        active = self.read_pointer(ACTIVE_POINTER)
+        shadow = self.read_pointer(SHADOW_POINTER)
+        rate = float(shadow[1]) if len(shadow) > 1 else settings.PLANT_MODEL_SHADOW_RATE
+        return (active[0] if active else DEFAULT_VERSION), (shadow[0] if shadow else None), rate
+
+    def class_names(self, version=None):
+        """
+        Class map of a version (the active one by default) without loading
+        the model.
+        """
+        if version is None:
+            if self._active is not None:
+                return self._active.class_names
+            version = self.wanted()[0]
+        return read_class_names(os.path.join(self.version_dir(version), CLASS_INDICES_FILENAME))
+
+    # --- Loading and swapping ---
+
+    def load(self, version):
+        """
+        Loads and warms up a version. Runs in the caller's thread.
+        """
+        model_path, class_indices_path = self.artifact_paths(version)
+        import tensorflow as tf
+
+        model = tf.keras.models.load_model(model_path)
+        loaded = self.warm_up(ModelVersion(version, model, read_class_names(class_indices_path)))
+        # Builds the label catalogue and logs classes it can't match
+        from .labels import catalogue_for
+        catalogue_for(loaded)
+        logger.info("Loaded plant disease model %s from %s", version, model_path)
+        return loaded
+
+    def warm_up(self, loaded):
+        """
+        Runs a first prediction (which builds the graph, so no request pays
+        for it) and checks its width against the class map.
+        """
+        width, height = INPUT_SIZE
+        check_outputs(loaded, loaded.predict(np.zeros((1, height, width, 3), dtype='float32'), role='warmup'))
+        return loaded
+
+    def load_in_background(self, version, on_ready):
+        with self._lock:
+            if version in self._loading:
+                return
+            self._loading.add(version)
+
+        def run():
+            try:
+                on_ready(self.load(version))
+            except Exception:
+                logger.exception("Could not load plant disease model %s", version)
+            finally:
+                with self._lock:
+                    self._loading.discard(version)
+
+        threading.Thread(target=run, name=f'load-model-{version}', daemon=True).start()
+
+    def _swap_active(self, loaded):
+        with self._lock:
+            previous = self._active
+            self._active = loaded
+        if previous is not None:
+            ACTIVE_VERSION.set(0, version=previous.version)
+        ACTIVE_VERSION.set(1, version=loaded.version)
+        logger.info("Plant disease model %s is now active", loaded.version)
+
+    def _set_shadow(self, loaded):
+        with self._lock:
+            self._shadow = loaded
+
+    def poll(self, force=False):
+        now = time.monotonic()
+        if self._pinned or (not force and now - self._last_poll < settings.PLANT_MODEL_POLL_SECONDS):
+            return
+        self._last_poll = now
+
+        active_name, shadow_name, self._shadow_rate = self.wanted()
+        if self._active is not None and self._active.version != active_name:
+            self.load_in_background(active_name, self._swap_active)
+
+        current_shadow = self._shadow.version if self._shadow is not None else None
+        if shadow_name is None:
+            self._shadow = None
+        elif shadow_name != current_shadow:
+            self.load_in_background(shadow_name, self._set_shadow)
+
+    def active(self):
+        """
+        The version to serve this request with. The first call in a process
+        loads it synchronously; later version changes happen in the
+        background.
+        """
+        self.poll()
+        if self._active is None:
+            with self._initial_load_lock:
+                if self._active is None:
+                    self._swap_active(self.load(self.wanted()[0]))
+                    self.poll(force=True)
+        return self._active
+
+    def install(self, model, class_names, version='custom'):
+        """
+        Serves `model` (anything with a Keras-style predict) and stops
+        following the pointer files, e.g. for the benchmark's stub model.
+        """
+        loaded = self.warm_up(ModelVersion(version, model, class_names))
+        self._pinned = True
+        self._shadow = None
+        self._swap_active(loaded)
+
+    # --- Shadow traffic ---
+
+    def shadow_compare(self, primary, batch, primary_predictions, primary_seconds):
+        """
+        On a sampled fraction of requests, runs the shadow candidate on the
+        batch the primary model just classified, in a background thread, and
+        records whether the two models' raw top classes for the main image
+        agree and how long each took. Tiling, TTA and aggregation are left
+        out on both sides so only the models are compared.
+        """
+        shadow = self._shadow
+        if shadow is None or shadow is primary or random.random() >= self._shadow_rate:
+            return
+        with self._lock:
+            if self._pending_shadow >= MAX_PENDING_SHADOW:
+                return
+            self._pending_shadow += 1
+            if self._shadow_executor is None:
+                self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shadow-model')
+        primary_class = primary.class_names.get(int(np.argmax(primary_predictions)))
+        self._shadow_executor.submit(
+            self._run_shadow, shadow, primary.version, batch, primary_class, primary_seconds,
+        )
+
+    def _run_shadow(self, shadow, primary_version, batch, primary_class, primary_seconds):
+        try:
+            start = time.perf_counter()
+            predictions = shadow.predict(batch, role='shadow')
+            elapsed = time.perf_counter() - start
+            # Classes are compared by name, the two versions may order them differently
+            shadow_class = shadow.class_names.get(int(np.argmax(predictions[0])))
+            agree = shadow_class == primary_class
+            SHADOW_RUNS.inc(candidate=shadow.version, agree='yes' if agree else 'no')
+            SHADOW_SLOWDOWN.observe(elapsed / primary_seconds if primary_seconds else 0, candidate=shadow.version)
+            logger.info(json.dumps({
+                'event': 'shadow_prediction',
+                'primary': primary_version,
+                'candidate': shadow.version,
+                'primary_class': primary_class,
+                'candidate_class': shadow_class,
+                'agree': agree,
+                'primary_ms': round(primary_seconds * 1000, 2),
+                'candidate_ms': round(elapsed * 1000, 2),
+            }))
+        except Exception:
+            logger.exception("Shadow prediction with %s failed", shadow.version)
+        finally:
+            with self._lock:
+                self._pending_shadow -= 1
+
+
+registry = ModelRegistry()
@@ -2,26 +2,48 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .models import PlantHealthReport
+from .analytics import record_prediction, disease_trends
 from .serializers import PlantHealthReportSerializer
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 from django.conf import settings
-import os
+import json
+import logging
+from core.export import ExportAPIView
+from core.fast_serializers import FastSerializer, requested_fields
+from core.locations import normalize_location
+from core.metrics import phase
 
 # Import the prediction function
 from .utils.predict import predict_plant_disease
+from .utils.admission import Rejected, admit
+
+logger = logging.getLogger(__name__)
 
 class PlantHealthReportAPIView(APIView):
     """
     Handles listing existing reports and creating new ones with predictions.
     """
+    def get_queryset(self):
+        return PlantHealthReport.objects.all().order_by('-created_at')
+
     def get(self, request):
         """
         Returns a list of all saved plant health reports.
         """
-        reports = PlantHealthReport.objects.all().order_by('-created_at')
-        serializer = PlantHealthReportSerializer(reports, many=True)
-        return Response(serializer.data)
+        fast = FastSerializer(PlantHealthReportSerializer, fields=requested_fields(request))
+        rows = fast.rows(self.get_queryset())
+        with phase('serialize'):
+            data = fast.serialize(rows)
+        return Response(data)
+
+    @staticmethod
+    def uploader_location(request):
+        """
+        The location sent with the upload, else the uploader's profile location.
+        """
+        location = request.data.get('location')
+        if not location and request.user.is_authenticated:
+            location = request.user.location
+        return normalize_location(location) or None
 
     def post(self, request):
         """
@@ -31,18 +53,23 @@ class PlantHealthReportAPIView(APIView):
         if not image_file:
             return Response({"error": "No image file provided."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Save the uploaded file temporarily to process it
+        # Predict straight from the upload; the only copy written to storage
+        # is the one the ImageField saves with the report.
         try:
-            file_name = default_storage.save(image_file.name, ContentFile(image_file.read()))
-            image_path = os.path.join(settings.MEDIA_ROOT, file_name)
-
-            # Get prediction from the model
-            prediction_result = predict_plant_disease(image_path)
+            with admit(request):
+                prediction_result = predict_plant_disease(image_file)
+        except Rejected as e:
+            return Response({"error": e.message}, status=e.status, headers={"Retry-After": str(e.retry_after)})
 
+        try:
             if "error" in prediction_result:
-                 # Clean up the temp file
-                default_storage.delete(file_name)
                 return Response(prediction_result, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+            if prediction_result['low_confidence'] and settings.PREDICTION_LOW_CONFIDENCE_POLICY == 'reject':
+                return Response({
+                    "error": "The image could not be classified confidently. Please upload a closer photo of the leaf.",
+                    "top_k": prediction_result['top_k'],
+                }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
             
             image_file.seek(0)
             
@@ -52,9 +79,13 @@ class PlantHealthReportAPIView(APIView):
                 'confidence': prediction_result.get('confidence'),
                 'issue': prediction_result.get('issue'),
                 'recommendation': prediction_result.get('recommendation'),
+                'class_index': prediction_result.get('class_index'),
+                'plant': prediction_result.get('plant'),
+                'model_version': prediction_result.get('model_version'),
+                'location': self.uploader_location(request),
                 # The image will be handled by the serializer
             }
-            print(f"Prediction Result: {prediction_result}")
+            logger.info(json.dumps({'event': 'prediction', **prediction_result}))
             # We need to include the image file in the data for the serializer
             # The serializer expects a file object, not just a path
             request.data['image'] = image_file
@@ -65,25 +96,35 @@ class PlantHealthReportAPIView(APIView):
 
             serializer = PlantHealthReportSerializer(data=mutable_data)
             if serializer.is_valid():
-                serializer.save()
-                 # We can now delete the temp file if it's not the one saved by the model
-                # The ImageField already saved it to the correct location.
-                if default_storage.exists(file_name):
-                    # Check if the path is different from the saved instance's path
-                    # This logic can be tricky; for simplicity, we assume ImageField handles it.
-                    # The main point is not to leave orphaned files.
-                    # If MEDIA_ROOT is the same as the upload_to folder, this might delete the file.
-                    # A safer approach is to let a cleanup job handle old files in a temp directory.
-                    pass
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
+                with phase('save'):
+                    report = serializer.save()
+                    record_prediction(report)
+                with phase('serialize'):
+                    data = serializer.data
+                # Not stored on the report, but useful to the client
+                data['top_k'] = prediction_result['top_k']
+                data['low_confidence'] = prediction_result['low_confidence']
+                return Response(data, status=status.HTTP_201_CREATED)
             else:
-                 # Clean up the temp file if validation fails
-                default_storage.delete(file_name)
-                print("Serializer validation failed:", serializer.errors)
+                logger.warning("Serializer validation failed: %s", serializer.errors)
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         except Exception as e:
-            # Ensure temp file is deleted on any exception
-            if 'file_name' in locals() and default_storage.exists(file_name):
-                default_storage.delete(file_name)
-            return Response({"error": "An unexpected error occurred.", "details": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({"error": "An unexpected error occurred.", "details": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class DiseaseTrendsAPIView(APIView):
+    """
+    Disease counts per day and class, e.g. /api/plant-health/trends/?days=7&location=Anand
+    """
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            return Response({"error": "days must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(disease_trends(days, request.query_params.get('location')))
+
+
+class PlantHealthReportExportAPIView(ExportAPIView):
+    serializer_class = PlantHealthReportSerializer
+    filename = 'plant_health_reports'
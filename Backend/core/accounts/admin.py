@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser
+from .models import CustomUser, WeatherSnapshot
 
 # We create a custom admin class to display your new fields
 class CustomUserAdmin(UserAdmin):
@@ -20,4 +20,12 @@ class CustomUserAdmin(UserAdmin):
     )
 
 # Register your CustomUser model with the custom admin class
-admin.site.register(CustomUser, CustomUserAdmin)
\ No newline at end of file
+admin.site.register(CustomUser, CustomUserAdmin)
+
+
+class WeatherSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('location', 'latitude', 'longitude', 'fetched_at', 'error')
+    search_fields = ('location',)
+
+
+admin.site.register(WeatherSnapshot, WeatherSnapshotAdmin)
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.weather import WeatherNotConfigured, refresh
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetches current weather for every distinct user location into WeatherSnapshot. "
+        "Run it from cron, or keep it running with --every."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Refetch even fresh snapshots.")
+        parser.add_argument('--workers', type=int, help="Concurrent upstream requests (WEATHER_FETCH_WORKERS).")
+        parser.add_argument('--every', type=int, help="Repeat every N seconds instead of running once.")
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.perf_counter()
+            try:
+                refreshed, failed = refresh(force=options['force'], workers=options['workers'])
+            except WeatherNotConfigured as e:
+                raise CommandError(str(e))
+            self.stdout.write(
+                f"Refreshed {refreshed} locations, {failed} failed, in {time.perf_counter() - start:.1f}s."
+            )
+            if not options['every']:
+                return
+            time.sleep(options['every'])
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='individual_type',
+            field=models.CharField(choices=[('Farmer', 'Farmer'), ('Government', 'Government'), ('Bank', 'Bank'), ('Corporate', 'Corporate'), ('Event', 'Event')], db_index=True, max_length=20),
+        ),
+    ]
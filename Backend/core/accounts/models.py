@@ -10,9 +10,25 @@ class CustomUser(AbstractUser):
         ('Event', 'Event'),
     ]
 
-    individual_type = models.CharField(max_length=20, choices=INDIVIDUAL_TYPE_CHOICES)
+    individual_type = models.CharField(max_length=20, choices=INDIVIDUAL_TYPE_CHOICES, db_index=True)
     id_proof = models.FileField(upload_to='id_proofs/', blank=True, null=True)
     location = models.CharField(max_length=255, blank=True, null=True)
 
     def __str__(self):
         return self.username
+
+
+class WeatherSnapshot(models.Model):
+    """
+    Latest current-weather payload for one normalized location, refreshed by
+    `manage.py refresh_weather`. Coordinates are geocoded once and reused.
+    """
+    location = models.CharField(max_length=255, unique=True)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    data = models.JSONField(blank=True, null=True)
+    fetched_at = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return self.location
@@ -0,0 +1,15 @@
+from rest_framework.permissions import BasePermission
+
+# Account types allowed to push data to us in bulk
+PARTNER_TYPES = ('Government', 'Bank', 'Corporate')
+
+
+class IsPartnerOrStaff(BasePermission):
+    """
+    Allows staff users and partner organisations (see PARTNER_TYPES).
+    """
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        return user.is_staff or user.individual_type in PARTNER_TYPES
@@ -0,0 +1,106 @@
+from datetime import timedelta
+from unittest import mock
+
+import requests
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .models import CustomUser, WeatherSnapshot
+from .weather import GEOCODE_URL, WEATHER_URL, refresh
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+def fake_get(url, params, timeout):
+    if url == GEOCODE_URL:
+        return FakeResponse([{'lat': 22.56, 'lon': 72.95}])
+    return FakeResponse({'main': {'temp': 31.0}, 'coord': {'lat': params['lat'], 'lon': params['lon']}})
+
+
+@override_settings(OPENWEATHER_API_KEY='test-key', WEATHER_MAX_AGE_SECONDS=3600)
+class WeatherTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('farmer', password='pw', location='  anand ')
+        self.client.force_authenticate(self.user)
+        patcher = mock.patch('accounts.weather.requests.get', side_effect=fake_get)
+        self.get = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def urls(self):
+        return [call.args[0] for call in self.get.call_args_list]
+
+    def test_refresh_geocodes_each_location_once(self):
+        CustomUser.objects.create_user('neighbour', password='pw', location='Anand')
+        self.assertEqual(refresh(), (1, 0))
+        self.assertEqual(self.urls(), [GEOCODE_URL, WEATHER_URL])
+
+        snapshot = WeatherSnapshot.objects.get()
+        self.assertEqual(snapshot.location, 'Anand')
+        self.assertEqual((snapshot.latitude, snapshot.longitude), (22.56, 72.95))
+
+        self.get.reset_mock()
+        self.assertEqual(refresh(), (0, 0))
+        self.assertEqual(refresh(force=True), (1, 0))
+        self.assertEqual(self.urls(), [WEATHER_URL])
+
+    def test_view_serves_fresh_snapshot_without_calling_upstream(self):
+        WeatherSnapshot.objects.create(location='Anand', data={'main': {'temp': 25.0}}, fetched_at=timezone.now())
+        response = self.client.get('/api/weather/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'main': {'temp': 25.0}})
+        self.get.assert_not_called()
+
+    def test_stale_snapshot_is_served_when_upstream_fails(self):
+        stale = timezone.now() - timedelta(hours=2)
+        WeatherSnapshot.objects.create(
+            location='Anand', latitude=22.56, longitude=72.95, data={'main': {'temp': 25.0}}, fetched_at=stale,
+        )
+        self.get.side_effect = requests.exceptions.ConnectionError('upstream down')
+        response = self.client.get('/api/weather/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'main': {'temp': 25.0}})
+        self.assertEqual(self.urls(), [WEATHER_URL])
+
+        snapshot = WeatherSnapshot.objects.get()
+        self.assertEqual(snapshot.fetched_at, stale)
+        self.assertIn('upstream down', snapshot.error)
+
+    def test_upstream_failure_without_snapshot_is_500(self):
+        self.get.side_effect = requests.exceptions.ConnectionError('upstream down')
+        self.assertEqual(self.client.get('/api/weather/').status_code, 500)
+
+    @override_settings(OPENWEATHER_API_KEY='')
+    def test_missing_api_key_is_503(self):
+        WeatherSnapshot.objects.create(location='Anand', data={'main': {'temp': 25.0}}, fetched_at=timezone.now())
+        self.assertEqual(self.client.get('/api/weather/').status_code, 503)
+        with self.assertRaisesMessage(CommandError, 'OPENWEATHER_API_KEY'):
+            call_command('refresh_weather')
+        self.get.assert_not_called()
+
+    def test_bulk_weather(self):
+        WeatherSnapshot.objects.create(location='Anand', data={'main': {'temp': 25.0}}, fetched_at=timezone.now())
+        WeatherSnapshot.objects.create(location='Surat')
+        response = self.client.get('/api/weather/bulk/', {'locations': 'anand, Surat,Nadiad'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {'Anand', 'Surat', 'Nadiad'})
+        self.assertEqual(response.data['Anand']['weather'], {'main': {'temp': 25.0}})
+        self.assertIsNone(response.data['Surat'])
+        self.assertIsNone(response.data['Nadiad'])
+        self.get.assert_not_called()
+
+    def test_bulk_weather_caps_locations(self):
+        locations = ','.join(f'Place {i}' for i in range(500))
+        self.assertEqual(self.client.get('/api/weather/bulk/', {'locations': locations}).status_code, 200)
+        response = self.client.get('/api/weather/bulk/', {'locations': locations + ',One More'})
+        self.assertEqual(response.status_code, 400)
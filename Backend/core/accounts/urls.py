@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import RegisterView, LoginView, WeatherView
+from .views import RegisterView, LoginView, WeatherView, BulkWeatherView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('weather/', WeatherView.as_view(), name='weather'),
+    path('weather/bulk/', BulkWeatherView.as_view(), name='weather-bulk'),
 ]
\ No newline at end of file
@@ -6,8 +6,9 @@ from django.contrib.auth import authenticate
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authentication import TokenAuthentication
-from .models import CustomUser
-import requests
+from .models import CustomUser, WeatherSnapshot
+from .weather import WeatherError, WeatherNotConfigured, weather_for
+from core.locations import normalize_location
 
 class RegisterView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()
@@ -65,13 +66,40 @@ class WeatherView(APIView):
         if not city:
             return Response({'error': 'Location not set for user'}, status=status.HTTP_400_BAD_REQUEST)
 
-        api_key = 'a43d48e2c6398946dd5515d9a1e4a208'
-        url = f'http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric'
-
+        # Served from the snapshot kept fresh by `manage.py refresh_weather`
         try:
-            response = requests.get(url)
-            response.raise_for_status() 
-            weather_data = response.json()
-            return Response(weather_data)
-        except requests.exceptions.RequestException as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response(weather_for(city))
+        except WeatherNotConfigured as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except WeatherError as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BulkWeatherView(APIView):
+    """
+    Stored weather for many locations at once (?locations=Anand,Surat, or
+    every known location when omitted), for regional dashboards. Never calls
+    the upstream API; locations without a snapshot map to null.
+    """
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    max_locations = 500
+
+    def get(self, request):
+        requested = [
+            normalize_location(name) for name in request.query_params.get('locations', '').split(',') if name.strip()
+        ]
+        if len(requested) > self.max_locations:
+            return Response(
+                {'error': f'At most {self.max_locations} locations per request.'}, status=status.HTTP_400_BAD_REQUEST,
+            )
+        snapshots = WeatherSnapshot.objects.exclude(data__isnull=True)
+        if requested:
+            snapshots = snapshots.filter(location__in=requested)
+        found = {
+            location: {'fetched_at': fetched_at, 'weather': data}
+            for location, fetched_at, data in snapshots.values_list('location', 'fetched_at', 'data')[:self.max_locations]
+        }
+        if requested:
+            return Response({location: found.get(location) for location in requested})
+        return Response(found)
\ No newline at end of file
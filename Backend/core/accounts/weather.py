@@ -0,0 +1,148 @@
+"""
+Weather prefetching. Users mostly share a small set of district locations,
+so current weather is fetched per distinct location by `manage.py
+refresh_weather` (in parallel, WEATHER_FETCH_WORKERS at a time) and stored in
+WeatherSnapshot; WeatherView then answers from the table. Locations are
+geocoded once and later fetched by coordinates.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+from core.metrics import Counter
+from core.locations import normalize_location
+
+from .models import CustomUser, WeatherSnapshot
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM = Counter('weather_upstream_requests_total', 'Calls to the weather API.', ('kind', 'outcome'))
+
+GEOCODE_URL = 'http://api.openweathermap.org/geo/1.0/direct'
+WEATHER_URL = 'http://api.openweathermap.org/data/2.5/weather'
+
+
+class WeatherError(Exception):
+    pass
+
+
+class WeatherNotConfigured(WeatherError):
+    pass
+
+
+def require_api_key():
+    if not settings.OPENWEATHER_API_KEY:
+        raise WeatherNotConfigured("OPENWEATHER_API_KEY is not set; weather data is unavailable.")
+
+
+def call(kind, url, params):
+    require_api_key()
+    try:
+        response = requests.get(
+            url, params={**params, 'appid': settings.OPENWEATHER_API_KEY}, timeout=settings.WEATHER_TIMEOUT,
+        )
+        response.raise_for_status()
+        data = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        UPSTREAM.inc(kind=kind, outcome='error')
+        raise WeatherError(str(e))
+    UPSTREAM.inc(kind=kind, outcome='ok')
+    return data
+
+
+def geocode(location):
+    results = call('geocode', GEOCODE_URL, {'q': location, 'limit': 1})
+    if not results:
+        raise WeatherError(f"Unknown location: {location}")
+    return results[0]['lat'], results[0]['lon']
+
+
+def fetch(location, latitude=None, longitude=None):
+    """
+    (latitude, longitude, payload) for one location; geocodes only when no
+    coordinates are known yet. Makes no database queries, so it is safe to
+    run from worker threads.
+    """
+    if latitude is None or longitude is None:
+        latitude, longitude = geocode(location)
+    data = call('weather', WEATHER_URL, {'lat': latitude, 'lon': longitude, 'units': 'metric'})
+    return latitude, longitude, data
+
+
+def user_locations():
+    """
+    The distinct normalized locations of all users.
+    """
+    raw = CustomUser.objects.exclude(location__isnull=True).exclude(location='').values_list('location', flat=True)
+    return {normalize_location(location) for location in raw.distinct().iterator()} - {''}
+
+
+def store(snapshot, result):
+    if isinstance(result, Exception):
+        snapshot.error = str(result)
+        snapshot.save(update_fields=['error'])
+        return snapshot
+    snapshot.latitude, snapshot.longitude, snapshot.data = result
+    snapshot.fetched_at = timezone.now()
+    snapshot.error = ''
+    snapshot.save()
+    return snapshot
+
+
+def refresh(force=False, workers=None):
+    """
+    Fetches current weather for every user location whose snapshot is older
+    than WEATHER_REFRESH_SECONDS (all of them with force=True). Returns
+    (refreshed, failed) counts. Raises WeatherNotConfigured without an API key.
+    """
+    require_api_key()
+    locations = user_locations()
+    existing = {s.location: s for s in WeatherSnapshot.objects.filter(location__in=locations)}
+    missing = [WeatherSnapshot(location=location) for location in locations - set(existing)]
+    WeatherSnapshot.objects.bulk_create(missing, ignore_conflicts=True)
+    if missing:
+        existing = {s.location: s for s in WeatherSnapshot.objects.filter(location__in=locations)}
+
+    cutoff = timezone.now() - timedelta(seconds=settings.WEATHER_REFRESH_SECONDS)
+    due = [s for s in existing.values() if force or s.fetched_at is None or s.fetched_at < cutoff]
+
+    def task(snapshot):
+        try:
+            return fetch(snapshot.location, snapshot.latitude, snapshot.longitude)
+        except WeatherError as e:
+            return e
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers or settings.WEATHER_FETCH_WORKERS) as pool:
+        for snapshot, result in zip(due, pool.map(task, due)):
+            if isinstance(result, Exception):
+                failed += 1
+                logger.warning("Weather refresh for %s failed: %s", snapshot.location, result)
+            store(snapshot, result)
+    return len(due) - failed, failed
+
+
+def weather_for(location):
+    """
+    The stored payload for a location, fetched on demand (and stored) when
+    the location has never been fetched or its snapshot is older than
+    WEATHER_MAX_AGE_SECONDS. If that fetch fails the stale payload is
+    returned, or WeatherError raised when there is none. A missing API key
+    always raises WeatherNotConfigured rather than serving stale data.
+    """
+    require_api_key()
+    location = normalize_location(location)
+    snapshot, _ = WeatherSnapshot.objects.get_or_create(location=location)
+    cutoff = timezone.now() - timedelta(seconds=settings.WEATHER_MAX_AGE_SECONDS)
+    if snapshot.data is None or snapshot.fetched_at < cutoff:
+        try:
+            store(snapshot, fetch(location, snapshot.latitude, snapshot.longitude))
+        except WeatherError as e:
+            store(snapshot, e)
+            if snapshot.data is None:
+                raise
+    return snapshot.data
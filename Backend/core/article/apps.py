@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class ArticleConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'article'
+
+    def ready(self):
+        from functools import partial
+        from django.db.models.signals import post_delete, post_save
+        from core.compression import invalidate_variants
+        from .models import Article
+
+        invalidate = partial(invalidate_variants, 'articles')
+        post_save.connect(invalidate, sender=Article, weak=False, dispatch_uid='article_variants_saved')
+        post_delete.connect(invalidate, sender=Article, weak=False, dispatch_uid='article_variants_deleted')
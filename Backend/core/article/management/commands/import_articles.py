@@ -0,0 +1,28 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ingest import iter_file
+from article.views import article_ingestor
+
+
+class Command(BaseCommand):
+    help = "Imports articles from CSV, JSON (array) or NDJSON files, upserting on title. Images are given as storage names."
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument('--format', choices=['csv', 'json', 'ndjson'], help="Override detection by file extension.")
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for path in options['paths']:
+            ingestor = article_ingestor(chunk_size=options['chunk_size'])
+            try:
+                result = ingestor.ingest(iter_file(path, options['format']))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"{path}: {e}")
+            self.stdout.write(
+                f"{path}: {result['created']} created, {result['updated']} updated, {result['error_count']} rejected"
+            )
+            for error in result['errors']:
+                self.stderr.write(f"  row {error['row']}: {json.dumps(error['errors'])}")
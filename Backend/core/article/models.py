@@ -20,7 +20,15 @@ class Article(models.Model):
     description = models.TextField()
     total_mins = models.PositiveIntegerField(help_text="Estimated reading time in minutes")
     popular_tags = models.CharField(max_length=255, blank=True, null=True)
+    # Set by bulk imports (core.ingest) to upsert on ARTICLE_NATURAL_KEY
+    import_key = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
 
+    class Meta:
+        indexes = [
+            # Feed ordering (-date) and the category-filtered feed
+            models.Index(fields=['-date'], name='article_date_idx'),
+            models.Index(fields=['category', '-date'], name='article_category_date_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -37,5 +45,10 @@ class Like(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='likes')
     article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='likes')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'article'], name='like_user_article_idx'),
+        ]
+
     def __str__(self):
         return f'Like by {self.user} on {self.article}'
@@ -1,10 +1,26 @@
 from rest_framework import serializers
 from .models import Article, Comment, Like
+from core.fast_serializers import SparseFieldsetMixin
 
-class ArticleSerializer(serializers.ModelSerializer):
+class ArticleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Article
-        fields = '__all__'
+        exclude = ['import_key']
+
+# Natural key used to upsert bulk-imported articles
+ARTICLE_NATURAL_KEY = ('title',)
+
+
+class ArticleImportSerializer(serializers.ModelSerializer):
+    """
+    Bulk imports reference images already in storage by name
+    (e.g. "article_images/wheat.jpg") instead of uploading them.
+    """
+    image = serializers.CharField(max_length=100)
+
+    class Meta:
+        model = Article
+        exclude = ['import_key']
 
 class CommentSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)  # or use `PrimaryKeyRelatedField`
@@ -1,3 +1,72 @@
-from django.test import TestCase
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from accounts.models import CustomUser
+
+from .models import Article, Comment
+
+
+def article_record(**overrides):
+    record = {
+        'title': 'Managing Late Blight in Potato',
+        'category': 'diseases',
+        'image': 'article_images/late_blight.jpg',
+        'description': 'Spray schedule and resistant varieties.',
+        'total_mins': 5,
+    }
+    record.update(overrides)
+    return record
+
+
+class ArticleBulkIngestTests(APITestCase):
+    def setUp(self):
+        self.staff = CustomUser.objects.create_user('editor', password='pw', individual_type='Farmer', is_staff=True)
+        self.client.force_authenticate(self.staff)
+
+    def test_rows_are_upserted_on_title(self):
+        response = self.client.post('/api/articles/bulk/', [article_record()], format='json')
+        self.assertEqual(response.data['created'], 1)
+        article = Article.objects.get()
+        Comment.objects.create(user=self.staff, article=article, description='Useful, thanks.')
+
+        response = self.client.post('/api/articles/bulk/', [
+            article_record(total_mins=8),
+            article_record(title='Drip Irrigation Basics', category='techniques'),
+        ], format='json')
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+
+        # Updated in place, so comments stay attached
+        article.refresh_from_db()
+        self.assertEqual(article.total_mins, 8)
+        self.assertEqual(article.comments.count(), 1)
+        self.assertEqual(Article.objects.count(), 2)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        response = self.client.post('/api/articles/bulk/', [
+            article_record(category='weather'),
+            article_record(title='Drip Irrigation Basics'),
+        ], format='json')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['error_count'], 1)
+        self.assertIn('category', response.data['errors'][0]['errors'])
+
+    def test_import_updates_oldest_article_created_outside_imports(self):
+        # Titles aren't unique outside imports, e.g. two articles made in the admin
+        first = Article.objects.create(**article_record(total_mins=1))
+        second = Article.objects.create(**article_record(total_mins=2))
+
+        response = self.client.post('/api/articles/bulk/', [article_record(total_mins=9)], format='json')
+        self.assertEqual((response.data['created'], response.data['updated']), (0, 1))
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.total_mins, second.total_mins), (9, 2))
+
+        # From now on the claimed row is matched on its import key
+        self.client.post('/api/articles/bulk/', [article_record(total_mins=10)], format='json')
+        first.refresh_from_db()
+        self.assertEqual(first.total_mins, 10)
+        self.assertEqual(Article.objects.count(), 2)
+
+    def test_import_key_is_not_exposed(self):
+        self.client.post('/api/articles/bulk/', [article_record()], format='json')
+        response = self.client.get(f'/api/articles/{Article.objects.get().pk}/')
+        self.assertNotIn('import_key', response.data)
@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import ArticleListAPIView, ArticleDetailAPIView, AddCommentAPIView, AddLikeAPIView, RemoveLikeAPIView
+from .views import ArticleListAPIView, ArticleDetailAPIView, AddCommentAPIView, AddLikeAPIView, RemoveLikeAPIView, ArticleBulkAPIView, ArticleExportAPIView
 
 urlpatterns = [
     path('articles/', ArticleListAPIView.as_view(), name='article-list'),
+    path('articles/bulk/', ArticleBulkAPIView.as_view(), name='article-bulk'),
+    path('articles/export.<str:fmt>', ArticleExportAPIView.as_view(), name='article-export'),
     path('articles/<int:id>/', ArticleDetailAPIView.as_view(), name='article-detail'),
     path('articles/<int:article_id>/comment/', AddCommentAPIView.as_view(), name='add-comment'),
     path('articles/<int:article_id>/like/', AddLikeAPIView.as_view(), name='add-like'),
@@ -5,13 +5,20 @@ from rest_framework.permissions import IsAuthenticated
 from .models import Comment, Like, Article
 from .serializers import CommentSerializer, LikeSerializer
 from rest_framework import generics
-from .serializers import ArticleSerializer
+from .serializers import ArticleSerializer, ArticleImportSerializer, ARTICLE_NATURAL_KEY
+from accounts.permissions import IsPartnerOrStaff
+from core.ingest import BulkIngestor, iter_request
+from core.export import ExportAPIView
+from core.compression import PrecompressedCacheMixin, invalidate_variants
+from core.fast_serializers import FastListMixin
+from core.metrics import TimedSerializationMixin
 
-class ArticleListAPIView(generics.ListAPIView):
+class ArticleListAPIView(PrecompressedCacheMixin, FastListMixin, generics.ListAPIView):
+    variant_group = 'articles'
     queryset = Article.objects.all().order_by('-date')
     serializer_class = ArticleSerializer
 
-class ArticleDetailAPIView(generics.RetrieveAPIView):
+class ArticleDetailAPIView(TimedSerializationMixin, generics.RetrieveAPIView):
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
     lookup_field = 'id'
@@ -61,3 +68,33 @@ class RemoveLikeAPIView(APIView):
         except Like.DoesNotExist:
             return Response({'error': 'Like not found'}, status=status.HTTP_404_NOT_FOUND)
 
+
+
+
+def article_ingestor(chunk_size=500):
+    # bulk_create/bulk_update send no signals, so drop the cached list variants here
+    return BulkIngestor(
+        ArticleImportSerializer, ARTICLE_NATURAL_KEY, chunk_size=chunk_size,
+        after_write=lambda articles: invalidate_variants('articles'),
+    )
+
+
+class ArticleBulkAPIView(APIView):
+    """
+    Creates or updates many articles at once from a JSON array or an NDJSON
+    body, matched on title. Invalid rows are reported and skipped.
+    """
+    permission_classes = [IsPartnerOrStaff]
+
+    def post(self, request):
+        try:
+            records = iter_request(request)
+        except TypeError:
+            return Response({'error': 'Expected a JSON array or NDJSON body.'}, status=status.HTTP_400_BAD_REQUEST)
+        result = article_ingestor().ingest(records)
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class ArticleExportAPIView(ExportAPIView):
+    serializer_class = ArticleSerializer
+    filename = 'articles'
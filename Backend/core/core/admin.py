@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import StoredObject
+
+
+class StoredObjectAdmin(admin.ModelAdmin):
+    list_display = ('key', 'state', 'size', 'attempts', 'created_at', 'uploaded_at')
+    list_filter = ('state',)
+    search_fields = ('key', 'sha256')
+
+
+admin.site.register(StoredObject, StoredObjectAdmin)
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import checks  # noqa: F401 - registers the system checks
+        from .db import configure_sqlite
+
+        connection_created.connect(configure_sqlite, dispatch_uid='core.configure_sqlite')
@@ -0,0 +1,121 @@
+"""
+Seeds a database with realistic volumes for the benchmark command.
+Only meant for throwaway databases (SQLITE_PATH=/tmp/bench.sqlite3 or a
+scratch Postgres database).
+"""
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from accounts.models import CustomUser
+from article.models import Article, Comment, Like, CATEGORY_CHOICES
+from ImageUpload.models import PlantHealthReport
+from scheme.models import Scheme
+
+FULL_VOLUMES = {
+    'users': 100_000,
+    'articles': 50_000,
+    'likes': 1_000_000,
+    'comments': 200_000,
+    'reports': 500_000,
+    'schemes': 5_000,
+}
+BATCH_SIZE = 5000
+USER_PREFIX = 'bench_user_'
+
+LOCATIONS = ['Anand', 'Rajkot', 'Surat', 'Nashik', 'Indore', 'Ludhiana', 'Guntur', 'Mysuru']
+PROVIDERS = ['Government', 'Bank', 'Corporate', 'NGO']
+TAGS = ['subsidy', 'loan', 'insurance', 'irrigation', 'seeds', 'training', 'organic']
+HEALTH = [
+    ('healthy', 'No disease detected'),
+    ('disease', 'Early blight'),
+    ('disease', 'Late blight'),
+    ('disease', 'Bacterial spot'),
+]
+LOREM = (
+    "Healthy soil and timely irrigation are the foundation of a good harvest. "
+    "Farmers should monitor leaves for spots and discolouration every week. "
+)
+
+
+def volumes(scale):
+    return {name: max(1, int(count * scale)) for name, count in FULL_VOLUMES.items()}
+
+
+def _batched(factory, total):
+    for start in range(0, total, BATCH_SIZE):
+        yield [factory(i) for i in range(start, min(start + BATCH_SIZE, total))]
+
+
+def seed(scale=1.0, log=print):
+    """
+    Inserts users, articles, likes, comments, reports and schemes. Returns the
+    volumes that were created.
+    """
+    rng = random.Random(42)
+    counts = volumes(scale)
+    password = make_password('bench-pass')
+
+    def user(i):
+        return CustomUser(
+            username=f'{USER_PREFIX}{i}', password=password,
+            individual_type='Farmer' if i % 10 else rng.choice(['Government', 'Bank', 'Corporate']),
+            location=rng.choice(LOCATIONS),
+        )
+
+    def article(i):
+        return Article(
+            category=CATEGORY_CHOICES[i % len(CATEGORY_CHOICES)][0], title=f'Bench article {i}',
+            summary=LOREM[:200], image='article_images/wheat.jpg', description=LOREM * 20,
+            total_mins=rng.randint(2, 15), popular_tags=','.join(rng.sample(TAGS, 3)),
+        )
+
+    def scheme(i):
+        return Scheme(
+            title=f'Bench scheme {i}', provider=PROVIDERS[i % len(PROVIDERS)], organizationName='Bench Org',
+            contactName='Officer', contactEmail='officer@example.com', contactPhone='0000000000',
+            deadline=date.today() + timedelta(days=rng.randint(-365, 365)),
+            description=LOREM * 10, eligibility=LOREM * 3, benefits=LOREM * 3, documents=LOREM,
+            applicationProcess=LOREM * 3, tags=','.join(rng.sample(TAGS, 2)),
+        )
+
+    def report(i):
+        health, issue = HEALTH[i % len(HEALTH)]
+        return PlantHealthReport(
+            image='plant_images/bench.jpg', health=health, issue=issue, recommendation=LOREM[:120],
+            class_index=i % 15, plant='Tomato', confidence=90.0, model_version='bench', location=rng.choice(LOCATIONS),
+        )
+
+    for name, model, factory in [
+        ('users', CustomUser, user), ('articles', Article, article),
+        ('schemes', Scheme, scheme), ('reports', PlantHealthReport, report),
+    ]:
+        for batch in _batched(factory, counts[name]):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+        log(f"seeded {counts[name]} {name}")
+
+    Scheme.sync_tags_bulk(list(Scheme.objects.only('id', 'tags')))
+
+    user_ids = list(CustomUser.objects.filter(username__startswith=USER_PREFIX).values_list('id', flat=True))
+    article_ids = list(Article.objects.values_list('id', flat=True))
+    users, articles = len(user_ids), len(article_ids)
+
+    def like(i):
+        # Walks (user, article) pairs so every like is distinct
+        u = i % users
+        return Like(user_id=user_ids[u], article_id=article_ids[(i // users + u * 131) % articles])
+
+    def comment(i):
+        return Comment(user_id=user_ids[i % users], article_id=article_ids[rng.randrange(articles)], description=LOREM[:80])
+
+    counts['likes'] = min(counts['likes'], users * articles)
+    for name, model, factory in [('likes', Like, like), ('comments', Comment, comment)]:
+        for batch in _batched(factory, counts[name]):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+        log(f"seeded {counts[name]} {name}")
+
+    return counts
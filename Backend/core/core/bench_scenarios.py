@@ -0,0 +1,241 @@
+"""
+Microbenchmarks and the concurrent load driver used by the benchmark command.
+"""
+import io
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+from django.test import override_settings
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from article.models import Article
+from article.serializers import ArticleSerializer
+from ImageUpload.models import PlantHealthReport
+from ImageUpload.serializers import PlantHealthReportSerializer
+from ImageUpload.utils import leaf, predict
+from scheme.models import Scheme
+from scheme.serializers import SchemeSummarySerializer, SCHEME_SUMMARY_FIELDS
+
+from .bench_data import USER_PREFIX
+from .fast_serializers import FastSerializer
+from .renderers import FastJSONRenderer
+from .benchmark import run_concurrent, summarize
+
+
+class StubModel:
+    """
+    Stands in for the CNN: returns a deterministic probability vector per
+    image after an optional fixed delay, so the rest of the upload path can be
+    measured without TensorFlow or the model file.
+    """
+    def __init__(self, num_classes, delay_ms=0):
+        self.num_classes = num_classes
+        self.delay = delay_ms / 1000.0
+
+    def predict(self, batch, verbose=0):
+        if self.delay:
+            time.sleep(self.delay)
+        batch = np.asarray(batch)
+        probs = np.full((batch.shape[0], self.num_classes), 0.01, dtype='float32')
+        winners = (batch.reshape(batch.shape[0], -1).mean(axis=1) * 1000).astype(int) % self.num_classes
+        probs[np.arange(batch.shape[0]), winners] = 1.0
+        return probs / probs.sum(axis=1, keepdims=True)
+
+
+def sample_jpeg(width=1024, height=768, seed=0):
+    """
+    A camera-sized JPEG with some texture, as bytes.
+    """
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8)
+    img = Image.fromarray(pixels).resize((width, height))
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def time_repeated(fn, repeat):
+    samples = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    return summarize(samples, time.perf_counter() - start)
+
+
+def run_micro(repeat=20, page_size=100):
+    """
+    Times serializers over one page of rows (rows are fetched up front so
+    only serialization is measured), image preprocessing and the prediction
+    function with whatever model is installed.
+    """
+    results = {}
+    articles = list(Article.objects.order_by('-date')[:page_size])
+    schemes = list(Scheme.objects.only(*SCHEME_SUMMARY_FIELDS).order_by('-id')[:page_size])
+    reports = list(PlantHealthReport.objects.order_by('-created_at')[:page_size])
+
+    results['serialize_articles'] = time_repeated(lambda: ArticleSerializer(articles, many=True).data, repeat)
+    results['serialize_scheme_summaries'] = time_repeated(lambda: SchemeSummarySerializer(schemes, many=True).data, repeat)
+    results['serialize_reports'] = time_repeated(lambda: PlantHealthReportSerializer(reports, many=True).data, repeat)
+
+    jpeg = sample_jpeg()
+    results['decode_and_preprocess'] = time_repeated(
+        lambda: predict.preprocess(predict.load_image(io.BytesIO(jpeg))), repeat,
+    )
+
+    decoded = predict.decode(io.BytesIO(jpeg))
+    results['leaf_analysis'] = time_repeated(lambda: leaf.analyse(decoded), repeat)
+
+    with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as f:
+        f.write(jpeg)
+    try:
+        results['predict_plant_disease'] = time_repeated(lambda: predict.predict_plant_disease(f.name), repeat)
+    finally:
+        os.unlink(f.name)
+
+    # A 12 MP field shot: reduced-scale decode, then the overhead of the leaf
+    # crop and the tiles on top of it
+    large = sample_jpeg(4000, 3000, seed=1)
+    results['decode_12mp'] = time_repeated(lambda: predict.decode(io.BytesIO(large)), repeat)
+    decoded = predict.decode(io.BytesIO(large))
+    results['leaf_crop_12mp'] = time_repeated(lambda: predict.crop_to_leaf(decoded), repeat)
+    analysis = leaf.analyse(decoded)
+    results['tiles_12mp'] = time_repeated(lambda: predict.tile_batch(decoded, analysis), repeat)
+    results['predict_plant_disease_12mp'] = time_repeated(
+        lambda: predict.predict_plant_disease(io.BytesIO(large)), repeat,
+    )
+    return results
+
+
+def fill(rows, count):
+    """
+    Repeats rows up to `count` so page sizes beyond the seeded data can be
+    measured.
+    """
+    rows = list(rows)
+    if not rows:
+        return rows
+    return (rows * (count // len(rows) + 1))[:count]
+
+
+def run_serializers(sizes=(1000, 10000), repeat=5):
+    """
+    Serializes and renders pages of `sizes` rows through the ModelSerializer
+    + JSONRenderer path ("drf") and the FastSerializer + FastJSONRenderer
+    path ("fast"). Rows are fetched up front. Returns the stats and the
+    speedup of the fast path per page.
+    """
+    cases = [
+        ('articles', ArticleSerializer, Article.objects.order_by('-date')),
+        ('scheme_summaries', SchemeSummarySerializer, Scheme.objects.only(*SCHEME_SUMMARY_FIELDS).order_by('-id')),
+        ('reports', PlantHealthReportSerializer, PlantHealthReport.objects.order_by('-created_at')),
+    ]
+    drf_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+    results, speedups = {}, {}
+    for name, serializer_class, queryset in cases:
+        fast = FastSerializer(serializer_class)
+        for size in sizes:
+            instances = fill(queryset[:size], size)
+            rows = fill(fast.rows(queryset)[:size], size)
+            if not rows:
+                continue
+            drf = results[f'{name}_{size}_drf'] = time_repeated(
+                lambda: drf_renderer.render(serializer_class(instances, many=True).data), repeat,
+            )
+            quick = results[f'{name}_{size}_fast'] = time_repeated(
+                lambda: fast_renderer.render(fast.serialize(rows)), repeat,
+            )
+            speedups[f'{name}_{size}'] = round(drf['p50_ms'] / max(quick['p50_ms'], 0.001), 1)
+    return results, speedups
+
+
+def load_scenarios():
+    """
+    (name, method, path, needs_user) for every endpoint the load driver hits.
+    Paths are callables so each request can pick a different article.
+    """
+    article_ids = list(Article.objects.order_by('?').values_list('id', flat=True)[:1000])
+
+    def some_article():
+        return random.choice(article_ids)
+
+    return [
+        ('GET /api/articles/', 'get', lambda: '/api/articles/', False),
+        ('GET /api/scheme/', 'get', lambda: '/api/scheme/?open=1', False),
+        ('GET /api/dashboard/stats/', 'get', lambda: '/api/dashboard/stats/', False),
+        ('GET /api/plant-health/', 'get', lambda: '/api/plant-health/', False),
+        ('POST /api/plant-health/', 'upload', lambda: '/api/plant-health/', False),
+        ('POST like', 'post', lambda: f'/api/articles/{some_article()}/like/', True),
+        ('POST comment', 'comment', lambda: f'/api/articles/{some_article()}/comment/', True),
+    ]
+
+
+def run_load(workers=8, requests_per_endpoint=80, only=None):
+    """
+    Drives each endpoint from `workers` threads and reports latency
+    percentiles and throughput. Uploads are written to a temporary
+    MEDIA_ROOT.
+    """
+    users = list(CustomUser.objects.filter(username__startswith=USER_PREFIX)[:workers])
+    if not users:
+        users = [CustomUser.objects.create_user(username=f'{USER_PREFIX}load', password='bench-pass')]
+    jpeg = sample_jpeg()
+    iterations = max(1, requests_per_endpoint // workers)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+        for name, kind, path, needs_user in load_scenarios():
+            if only and not any(o in name for o in only):
+                continue
+
+            def request(index, iteration, kind=kind, path=path, needs_user=needs_user):
+                client = APIClient(SERVER_NAME='localhost')
+                if needs_user:
+                    client.force_authenticate(users[index % len(users)])
+                if kind == 'get':
+                    response = client.get(path())
+                elif kind == 'upload':
+                    upload = io.BytesIO(jpeg)
+                    upload.name = f'bench_{index}_{iteration}.jpg'
+                    response = client.post(path(), {'image': upload}, format='multipart')
+                elif kind == 'comment':
+                    response = client.post(path(), {'description': 'benchmark comment'})
+                else:
+                    response = client.post(path())
+                # "Already liked" is an expected answer once the table is dense
+                return name, response.status_code < 500
+
+            stats, _ = run_concurrent(request, workers, iterations)
+            results[name] = stats[name]
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns a list of human-readable regressions, in every section: p95
+    latency above the baseline or throughput below it by more than
+    `tolerance` (0.2 = 20%), and more failed requests than the baseline had.
+    Entries that weren't run this time (--skip-*, --only) are not compared.
+    """
+    regressions = []
+    for section, entries in baseline.items():
+        for name, base in entries.items():
+            current = results.get(section, {}).get(name)
+            if current is None:
+                continue
+            if base.get('p95_ms') and current['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{section}/{name}: p95 {current['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+            if base.get('rps') and current['rps'] < base['rps'] * (1 - tolerance):
+                regressions.append(f"{section}/{name}: {current['rps']} rps vs baseline {base['rps']} rps")
+            if current.get('errors', 0) > base.get('errors', 0):
+                regressions.append(
+                    f"{section}/{name}: {current['errors']} errors vs baseline {base.get('errors', 0)}"
+                )
+    return regressions
@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.db import connections
+
+
+def percentile(samples, pct):
+    """
+    Nearest-rank percentile of a list of numbers (pct between 0 and 100).
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples, elapsed):
+    """
+    Turns a list of latencies (seconds) into the numbers we report.
+    """
+    return {
+        'requests': len(samples),
+        'rps': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(samples, 50) * 1000, 2),
+        'p95_ms': round(percentile(samples, 95) * 1000, 2),
+        'p99_ms': round(percentile(samples, 99) * 1000, 2),
+    }
+
+
+def run_concurrent(worker, workers, iterations):
+    """
+    Runs worker(worker_index, iteration) from `workers` threads, `iterations`
+    times each, and collects per-operation latencies.
+
+    The worker returns (operation_name, ok). Every thread gets its own DB
+    connection, which is closed when the thread finishes.
+    """
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def loop(index):
+        try:
+            for iteration in range(iterations):
+                start = time.perf_counter()
+                try:
+                    name, ok = worker(index, iteration)
+                except Exception as e:
+                    name, ok = type(e).__name__, False
+                duration = time.perf_counter() - start
+                with lock:
+                    latencies[name].append(duration)
+                    if not ok:
+                        errors[name] += 1
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=loop, args=(i,)) for i in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    results = {}
+    for name, samples in latencies.items():
+        results[name] = summarize(samples, elapsed)
+        results[name]['errors'] = errors[name]
+    return results, elapsed
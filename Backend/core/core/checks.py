@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Cache stamps (compressed variants, label catalogue) only invalidate
+    across workers when the default cache is shared between them.
+    """
+    if settings.CACHES['default']['BACKEND'] not in LOCAL_CACHES:
+        return []
+    return [Warning(
+        'The default cache is local to each worker process.',
+        hint=(
+            'Set REDIS_URL so cache invalidation reaches every worker; otherwise workers serve '
+            f'stale article/scheme lists for up to {settings.COMPRESSION_CACHE_SECONDS}s and a '
+            f'stale label catalogue for up to {settings.LABEL_CACHE_SECONDS:g}s after a change.'
+        ),
+        id='core.W001',
+    )]
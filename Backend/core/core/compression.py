@@ -0,0 +1,184 @@
+"""
+Negotiated response compression for low-bandwidth clients.
+
+CompressionMiddleware compresses text responses larger than
+COMPRESSION_MIN_BYTES with the best encoding the client accepts: zstd
+(needs `zstandard`), brotli (needs `brotli`), then gzip.
+
+PrecompressedCacheMixin keeps compressed variants of public GET responses
+(the article and scheme lists) in the Django cache, so repeat requests skip
+the view and the compressor entirely. Variants are dropped when
+invalidate_variants(group) bumps the group's stamp (on model saves and bulk
+imports), and expire after COMPRESSION_CACHE_SECONDS in any case. The stamp
+only reaches every worker through a shared cache (REDIS_URL); with the
+per-process LocMem default, other workers keep serving their variants until
+they expire.
+"""
+import gzip
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .metrics import Counter
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+BYTES_IN = Counter('compression_bytes_in_total', 'Response bytes before compression.', ('encoding',))
+BYTES_OUT = Counter('compression_bytes_out_total', 'Response bytes sent after compression.', ('encoding',))
+VARIANT_CACHE = Counter('compression_variant_cache_total', 'Precompressed variant lookups.', ('group', 'result'))
+
+COMPRESSIBLE = re.compile(r'^(text/|application/(json|javascript|xml|x-ndjson)|image/svg)')
+
+
+def _gzip(data):
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+COMPRESSORS = {'gzip': _gzip}
+if brotli is not None:
+    COMPRESSORS['br'] = lambda data: brotli.compress(data, quality=5)
+if zstandard is not None:
+    COMPRESSORS['zstd'] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+
+# Server preference when the client gives several encodings the same weight
+PREFERENCE = ('zstd', 'br', 'gzip')
+
+
+def negotiate(request, encodings=None):
+    """
+    The encoding to use for this request's response, or None. `encodings`
+    limits the choice (e.g. to what a streaming response can produce).
+    """
+    weights = {}
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        match = re.search(r'q=([0-9.]+)', params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in PREFERENCE:
+        if encoding not in COMPRESSORS or (encodings is not None and encoding not in encodings):
+            continue
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(response, encoding):
+    """
+    Compresses a rendered, non-streaming response in place when it's worth it.
+    """
+    if (
+        encoding is None or response.streaming or response.has_header('Content-Encoding')
+        or len(response.content) < settings.COMPRESSION_MIN_BYTES
+        or not COMPRESSIBLE.match(response.get('Content-Type', ''))
+    ):
+        return response
+
+    original = response.content
+    compressed = COMPRESSORS[encoding](original)
+    BYTES_IN.inc(len(original), encoding=encoding)
+    if len(compressed) >= len(original):
+        BYTES_OUT.inc(len(original), encoding=encoding)
+        return response
+    BYTES_OUT.inc(len(compressed), encoding=encoding)
+
+    response.content = compressed
+    response['Content-Length'] = str(len(compressed))
+    response['Content-Encoding'] = encoding
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    return response
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming:
+            return response
+        return compress(response, negotiate(request))
+
+
+def stamp_key(group):
+    return f'compressed_variants:{group}:stamp'
+
+
+def invalidate_variants(group, **kwargs):
+    """
+    Drops every cached variant of `group`. Usable as a signal receiver.
+    """
+    try:
+        cache.incr(stamp_key(group))
+    except ValueError:
+        cache.set(stamp_key(group), 1, timeout=None)
+
+
+def variant_key(group, request, encoding):
+    raw = '|'.join([
+        request.get_host(), request.get_full_path(), request.META.get('HTTP_ACCEPT', ''), encoding or 'identity',
+    ])
+    stamp = cache.get(stamp_key(group), 0)
+    return f'compressed_variants:{group}:{stamp}:{hashlib.sha256(raw.encode()).hexdigest()}'
+
+
+class PrecompressedCacheMixin:
+    """
+    For public GET views whose response doesn't depend on the user. Set
+    variant_group to the name passed to invalidate_variants().
+    """
+    variant_group = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or self.variant_group is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        encoding = negotiate(request)
+        key = variant_key(self.variant_group, request, encoding)
+        cached = cache.get(key)
+        if cached is not None:
+            VARIANT_CACHE.inc(group=self.variant_group, result='hit')
+            content_type, content_encoding, body = cached
+            response = HttpResponse(body, content_type=content_type)
+            if content_encoding:
+                response['Content-Encoding'] = content_encoding
+            return response
+
+        VARIANT_CACHE.inc(group=self.variant_group, result='miss')
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code != 200 or response.streaming:
+            return response
+        if hasattr(response, 'render'):
+            response.render()
+        if not response.get('Content-Type', '').startswith('application/json'):
+            # e.g. the browsable API, which embeds per-user details
+            return response
+        compress(response, encoding)
+        cache.set(
+            key, (response['Content-Type'], response.get('Content-Encoding'), response.content),
+            settings.COMPRESSION_CACHE_SECONDS,
+        )
+        return response
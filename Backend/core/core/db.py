@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+def _integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _one_of(*choices):
+    return lambda value: str(value).upper() in choices
+
+
+# PRAGMAs SQLITE_PRAGMAS may set, with a check for their value. Values are
+# interpolated into the statement (PRAGMA takes no bound parameters), so
+# nothing outside this list reaches the database.
+ALLOWED_PRAGMAS = {
+    'journal_mode': _one_of('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'),
+    'synchronous': _one_of('OFF', 'NORMAL', 'FULL', 'EXTRA', '0', '1', '2', '3'),
+    'temp_store': _one_of('DEFAULT', 'FILE', 'MEMORY', '0', '1', '2'),
+    'busy_timeout': lambda value: _integer(value) and value >= 0,
+    'mmap_size': lambda value: _integer(value) and value >= 0,
+    'cache_size': _integer,
+    'wal_autocheckpoint': lambda value: _integer(value) and value >= 0,
+}
+
+
+def pragma_statements(pragmas):
+    """
+    The PRAGMA statements for a SQLITE_PRAGMAS mapping. Raises
+    ImproperlyConfigured for names or values outside ALLOWED_PRAGMAS.
+    """
+    statements = []
+    for pragma, value in pragmas.items():
+        check = ALLOWED_PRAGMAS.get(pragma)
+        if check is None:
+            raise ImproperlyConfigured(f"SQLITE_PRAGMAS: '{pragma}' is not an allowed PRAGMA.")
+        if not check(value):
+            raise ImproperlyConfigured(f"SQLITE_PRAGMAS: invalid value {value!r} for '{pragma}'.")
+        statements.append(f'PRAGMA {pragma} = {value}')
+    return statements
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Applies settings.SQLITE_PRAGMAS to every new SQLite connection.
+
+    WAL lets readers keep going while a like/comment/report write holds the
+    lock, and busy_timeout makes writers queue instead of failing with
+    "database is locked".
+    """
+    if connection.vendor != 'sqlite' or not settings.SQLITE_TUNING:
+        return
+
+    statements = pragma_statements(settings.SQLITE_PRAGMAS)
+    cursor = connection.connection.cursor()
+    try:
+        for statement in statements:
+            cursor.execute(statement)
+    finally:
+        cursor.close()
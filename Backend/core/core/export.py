@@ -0,0 +1,107 @@
+"""
+Streaming exports of whole tables as NDJSON or CSV.
+
+Rows are read with QuerySet.iterator(chunk_size) and serialized one chunk
+at a time through FastSerializer, so memory stays flat however large the
+table is. The body is gzip-compressed on the fly when the client accepts it.
+"""
+import csv
+import io
+import zlib
+from itertools import islice
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.views import APIView
+
+from accounts.permissions import IsPartnerOrStaff
+
+from .compression import negotiate
+from .fast_serializers import FastSerializer, requested_fields
+from .renderers import FastJSONRenderer
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def chunks(fast, queryset, chunk_size):
+    """
+    Yields lists of serialized items, `chunk_size` rows at a time.
+    """
+    rows = fast.rows(queryset).iterator(chunk_size=chunk_size)
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        yield fast.serialize(batch)
+
+
+def ndjson(fast, batches):
+    render = FastJSONRenderer().render
+    for batch in batches:
+        yield b''.join(render(item) + b'\n' for item in batch)
+
+
+def csv_rows(fast, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fast.names)
+    for batch in batches:
+        writer.writerows([item[name] for name in fast.names] for item in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzipped(parts):
+    """
+    Compresses a stream of byte strings, flushing after each part so the
+    client receives every chunk as soon as it is ready.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for part in parts:
+        yield compressor.compress(part) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def export_response(request, serializer_class, queryset, fmt, filename, chunk_size=None):
+    if fmt not in CONTENT_TYPES:
+        raise Http404
+    fast = FastSerializer(serializer_class, {'request': request}, fields=requested_fields(request))
+    batches = chunks(fast, queryset, chunk_size or settings.EXPORT_CHUNK_SIZE)
+    body = ndjson(fast, batches) if fmt == 'ndjson' else csv_rows(fast, batches)
+
+    # Streams can only be gzipped; honours q-values like the middleware does
+    compress = negotiate(request, ('gzip',)) == 'gzip'
+    response = StreamingHttpResponse(gzipped(body) if compress else body, content_type=CONTENT_TYPES[fmt])
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    response['Vary'] = 'Accept-Encoding'
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+class ExportAPIView(APIView):
+    """
+    Base for export endpoints (/<collection>/export.ndjson or .csv).
+    Subclasses set serializer_class, filename and get_queryset().
+    """
+    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    permission_classes = [IsPartnerOrStaff]
+    serializer_class = None
+    filename = 'export'
+
+    def get_queryset(self):
+        return self.serializer_class.Meta.model.objects.order_by('pk')
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is NDJSON/CSV whatever the Accept header says
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, fmt):
+        return export_response(request, self.serializer_class, self.get_queryset(), fmt, self.filename)
@@ -0,0 +1,159 @@
+"""
+Read-only fast path for list endpoints.
+
+FastSerializer mirrors a plain ModelSerializer (model-backed fields only)
+but builds each item straight from a values_list() tuple, converting only
+the columns that need it (dates, file URLs, decimals). The output is the
+same as the ModelSerializer's for the same rows.
+
+Both paths honour sparse fieldsets: ?fields=id,title returns only those
+fields (SparseFieldsetMixin for serializers, the `fields` argument here,
+which also narrows the SELECT).
+"""
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .metrics import phase
+
+_specs = {}
+
+
+def requested_fields(request):
+    """
+    The set of field names in a GET request's ?fields=a,b, or None.
+    """
+    if request is None or request.method != 'GET':
+        return None
+    params = getattr(request, 'query_params', request.GET)
+    names = {name.strip() for name in params.get('fields', '').split(',') if name.strip()}
+    return names or None
+
+
+class SparseFieldsetMixin:
+    """
+    For serializers: keeps only the fields named in the request's ?fields=.
+    Unknown names are ignored; if none match, every field is returned.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = requested_fields(self.context.get('request'))
+        if wanted and wanted & set(self.fields):
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
+
+def _file_converter(model_field, request):
+    url = model_field.storage.url
+    if request is not None:
+        build = request.build_absolute_uri
+        return lambda name: build(url(name)) if name else None
+    return lambda name: url(name) if name else None
+
+
+def _spec(serializer_class):
+    """
+    (names, columns, converters) for a serializer class. converters lists
+    (name, kind, field) for the columns whose database value is not already
+    the rendered value: kind 'file' carries the model field (its storage
+    builds the URL), 'drf' the serializer field to call, 'iso' nothing.
+    """
+    spec = _specs.get(serializer_class)
+    if spec is not None:
+        return spec
+
+    serializer = serializer_class()
+    model = serializer.Meta.model
+    names, columns, converters = [], [], []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        unsupported = ImproperlyConfigured(f"{serializer_class.__name__}.{name} is not a plain model column")
+        if field.source == '*' or '.' in field.source or isinstance(field, serializers.BaseSerializer):
+            raise unsupported
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            raise unsupported
+        if model_field.many_to_many or model_field.one_to_many:
+            raise unsupported
+
+        names.append(name)
+        columns.append(field.source)
+        if isinstance(field, serializers.FileField):
+            converters.append((name, 'file', model_field))
+        elif isinstance(field, serializers.DateField) and not isinstance(field, serializers.DateTimeField):
+            converters.append((name, 'iso', None))
+        elif isinstance(field, (
+            serializers.DateTimeField, serializers.TimeField, serializers.DecimalField, serializers.UUIDField,
+        )):
+            converters.append((name, 'drf', field))
+
+    spec = _specs[serializer_class] = (tuple(names), tuple(columns), tuple(converters))
+    return spec
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+class FastSerializer:
+    """
+    Usage: fast = FastSerializer(ArticleSerializer, context)
+           data = fast.serialize(fast.rows(queryset))
+    rows() returns a values_list queryset, so it can be sliced or paginated
+    before serialize() consumes it. `fields` restricts the output (and the
+    columns selected) the same way SparseFieldsetMixin does.
+    """
+    def __init__(self, serializer_class, context=None, fields=None):
+        self.names, self.columns, spec_converters = _spec(serializer_class)
+        if fields and fields & set(self.names):
+            keep = [i for i, name in enumerate(self.names) if name in fields]
+            self.names = tuple(self.names[i] for i in keep)
+            self.columns = tuple(self.columns[i] for i in keep)
+            spec_converters = [c for c in spec_converters if c[0] in fields]
+        request = (context or {}).get('request')
+        self.converters = []
+        for name, kind, field in spec_converters:
+            if kind == 'file':
+                convert = _file_converter(field, request)
+            elif kind == 'iso':
+                convert = _isoformat
+            else:
+                convert = field.to_representation
+            self.converters.append((name, convert))
+
+    def rows(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def serialize(self, rows):
+        names = self.names
+        converters = self.converters
+        data = []
+        append = data.append
+        for row in rows:
+            item = dict(zip(names, row))
+            for name, convert in converters:
+                value = item[name]
+                if value is not None:
+                    item[name] = convert(value)
+            append(item)
+        return data
+
+
+class FastListMixin:
+    """
+    For generic list views whose serializer_class is a plain ModelSerializer:
+    lists through FastSerializer and times it as the "serialize" phase.
+    """
+    def list(self, request, *args, **kwargs):
+        fast = FastSerializer(
+            self.get_serializer_class(), self.get_serializer_context(), fields=requested_fields(request),
+        )
+        rows = fast.rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        with phase('serialize'):
+            data = fast.serialize(rows if page is None else page)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
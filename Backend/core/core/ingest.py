@@ -0,0 +1,217 @@
+import csv
+import hashlib
+import json
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+# Per-row errors beyond this are counted but not returned.
+MAX_REPORTED_ERRORS = 100
+
+
+def iter_json_array(stream):
+    for row in json.load(stream):
+        yield row
+
+
+def iter_ndjson(lines):
+    """
+    Yields one record per non-empty line. Undecodable lines are yielded as
+    exceptions so the ingestor can report them against their row number.
+    """
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield e
+
+
+def iter_csv(stream):
+    # Empty cells become missing keys so nullable/blank fields fall back to
+    # their defaults instead of failing to parse ''.
+    for row in csv.DictReader(stream):
+        yield {key: value for key, value in row.items() if value not in ('', None)}
+
+
+def iter_file(path, fmt=None):
+    """
+    Streams records from a .csv, .json (array) or .ndjson/.jsonl file.
+    """
+    fmt = fmt or path.rsplit('.', 1)[-1].lower()
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            yield from iter_csv(f)
+        elif fmt == 'json':
+            yield from iter_json_array(f)
+        elif fmt in ('ndjson', 'jsonl'):
+            yield from iter_ndjson(f)
+        else:
+            raise ValueError(f"Unsupported import format '{fmt}'.")
+
+
+def iter_request(request):
+    """
+    Records from a bulk API request: NDJSON bodies are read line by line from
+    the underlying request stream, anything else goes through DRF's parsers
+    and must be a JSON array (or a single object).
+    """
+    media_type = request.content_type.split(';')[0].strip().lower()
+    if media_type in ('application/x-ndjson', 'application/jsonl'):
+        return iter_ndjson(request._request)
+    data = request.data
+    if isinstance(data, dict):
+        data = [data]
+    return iter(data)
+
+
+def natural_key_digest(values):
+    """
+    The import_key stored for a natural key tuple.
+    """
+    return hashlib.sha256(json.dumps([str(v) for v in values]).encode('utf-8')).hexdigest()
+
+
+class BulkIngestor:
+    """
+    Validates records one at a time with a serializer and writes them in
+    transactional chunks as a single upsert per chunk
+    (INSERT ... ON CONFLICT DO UPDATE) on the model's unique `key_field`,
+    which holds a digest of the natural key. Concurrent imports of the same
+    record therefore update one row instead of racing to insert two, while
+    rows created elsewhere (admin, API) stay free to share a title.
+
+    Rows that exist but were never imported have no key yet; the oldest row
+    matching the natural key is claimed for it on first import.
+
+    One bad record never aborts the batch: validation errors are reported
+    per row, and if a chunk fails at the database the chunk is retried row
+    by row to isolate the failing records.
+    """
+
+    def __init__(self, serializer_class, natural_key, chunk_size=500, after_write=None, key_field='import_key'):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.natural_key = tuple(natural_key)
+        self.key_field = key_field
+        self.chunk_size = chunk_size
+        self.after_write = after_write
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+
+    def ingest(self, records):
+        chunk = []
+        for row_number, record in enumerate(records, start=1):
+            instance = self.validate(row_number, record)
+            if instance is None:
+                continue
+            chunk.append((row_number, instance))
+            if len(chunk) >= self.chunk_size:
+                self.flush(chunk)
+                chunk = []
+        if chunk:
+            self.flush(chunk)
+        return self.result()
+
+    def validate(self, row_number, record):
+        if isinstance(record, Exception):
+            self.add_error(row_number, {'non_field_errors': [f"Invalid JSON: {record}"]})
+            return None
+        if not isinstance(record, dict):
+            self.add_error(row_number, {'non_field_errors': ["Expected an object."]})
+            return None
+        serializer = self.serializer_class(data=record)
+        if not serializer.is_valid():
+            self.add_error(row_number, serializer.errors)
+            return None
+        return self.model(**serializer.validated_data)
+
+    def key_of(self, instance):
+        return tuple(getattr(instance, field) for field in self.natural_key)
+
+    def flush(self, chunk):
+        try:
+            with transaction.atomic():
+                self.write([instance for _, instance in chunk])
+        except IntegrityError:
+            for row_number, instance in chunk:
+                try:
+                    with transaction.atomic():
+                        self.write([instance])
+                except IntegrityError as e:
+                    self.add_error(row_number, {'non_field_errors': [str(e)]})
+
+    def write(self, instances):
+        # Later rows win when the same natural key appears twice in a chunk;
+        # an upsert can't touch the same row twice in one statement.
+        by_digest = {}
+        for instance in instances:
+            digest = natural_key_digest(self.key_of(instance))
+            setattr(instance, self.key_field, digest)
+            by_digest[digest] = instance
+
+        existing = set(
+            self.model.objects.filter(**{f'{self.key_field}__in': list(by_digest)})
+            .values_list(self.key_field, flat=True)
+        )
+        unclaimed = {self.key_of(i): d for d, i in by_digest.items() if d not in existing}
+        if unclaimed:
+            existing |= self.claim(unclaimed)
+
+        written = self.model.objects.bulk_create(
+            list(by_digest.values()),
+            update_conflicts=True,
+            unique_fields=[self.key_field],
+            update_fields=self.update_fields(),
+        )
+        if self.after_write:
+            self.after_write(written)
+
+        updated = sum(1 for digest in by_digest if digest in existing)
+        self.created += len(by_digest) - updated
+        self.updated += updated
+
+    def claim(self, unclaimed):
+        """
+        Gives the oldest keyless row matching each natural key its import key,
+        so the upsert updates it. Returns the digests that were claimed.
+        """
+        lookup = Q()
+        for key in unclaimed:
+            lookup |= Q(**dict(zip(self.natural_key, key)))
+        matches = (
+            self.model.objects.filter(lookup, **{f'{self.key_field}__isnull': True})
+            .order_by('pk').values_list(*self.natural_key, 'pk')
+        )
+        oldest = {}
+        for values in matches:
+            oldest.setdefault(tuple(values[:-1]), values[-1])
+        for key, pk in oldest.items():
+            self.model.objects.filter(pk=pk).update(**{self.key_field: unclaimed[key]})
+        return {unclaimed[key] for key in oldest}
+
+    def update_fields(self):
+        return [
+            f.name for f in self.model._meta.concrete_fields
+            if not f.primary_key and f.name not in self.natural_key and f.name != self.key_field
+            and not getattr(f, 'auto_now_add', False)
+        ]
+
+    def add_error(self, row_number, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def result(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
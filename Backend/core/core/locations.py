@@ -0,0 +1,11 @@
+"""
+User-entered place names (profile and report locations), shared by the
+weather prefetch in accounts and the disease analytics in ImageUpload.
+"""
+
+
+def normalize_location(location):
+    """
+    "  anand " and "Anand" count as the same place.
+    """
+    return ' '.join((location or '').split()).title()[:255]
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.query_audit import audit
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs every list/detail endpoint's queryset through EXPLAIN and flags "
+        "filters or sorts that are not backed by an index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help="Print the plan for every query.")
+        parser.add_argument(
+            '--fail-on-scan', action='store_true',
+            help="Exit with an error if any query is flagged (for CI).",
+        )
+
+    def handle(self, *args, **options):
+        results = audit()
+        flagged = [r for r in results if r['full_scan']]
+
+        for result in results:
+            status = self.style.ERROR('SCAN') if result['full_scan'] else self.style.SUCCESS('ok  ')
+            self.stdout.write(f"{status} {result['route']} ({result['view']})")
+            if result['allowed']:
+                self.stdout.write(f"     known scan: {result['allowed']}")
+            if result['full_scan'] or options['verbose_plans']:
+                self.stdout.write(f"     {result['sql']}")
+                for line in result['plan'].splitlines():
+                    self.stdout.write(f"       {line}")
+
+        self.stdout.write(f"{len(results)} queries audited, {len(flagged)} flagged.")
+        if flagged and options['fail_on_scan']:
+            raise CommandError(f"{len(flagged)} queries are not index-backed.")
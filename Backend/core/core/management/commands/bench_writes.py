@@ -0,0 +1,76 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from article.models import Article, Comment
+from ImageUpload.models import PlantHealthReport
+from core.benchmark import run_concurrent
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammers the like/comment/report write paths from concurrent threads "
+        "against the configured database. Run it once per configuration, e.g. "
+        "SQLITE_TUNING=0, the default tuned SQLite, and DB_ENGINE=postgres, "
+        "and compare the numbers. Rows it creates are removed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        users = [
+            CustomUser.objects.create_user(username=f'bench_writer_{i}', password='bench-pass', individual_type='Farmer')
+            for i in range(workers)
+        ]
+        article = Article.objects.create(
+            category='crops', title='bench article', image='article_images/bench.jpg',
+            description='benchmark', total_mins=1,
+        )
+
+        def write(index, iteration):
+            client = APIClient(SERVER_NAME='localhost')
+            client.force_authenticate(users[index])
+            step = iteration % 3
+            if step == 0:
+                response = client.post(f'/api/articles/{article.id}/like/')
+                return 'like', response.status_code == 201
+            if step == 1:
+                response = client.post(f'/api/articles/{article.id}/comment/', {'description': 'bench'})
+                return 'comment', response.status_code == 201
+            # The upload endpoint is dominated by inference; this measures only
+            # the report insert that competes with likes/comments for the lock.
+            PlantHealthReport.objects.create(image='plant_images/bench.jpg', health='healthy')
+            client.delete(f'/api/articles/{article.id}/unlike/')
+            return 'report', True
+
+        try:
+            results, elapsed = run_concurrent(write, workers, options['iterations'])
+        finally:
+            PlantHealthReport.objects.filter(image='plant_images/bench.jpg').delete()
+            Comment.objects.filter(article=article).delete()
+            article.delete()
+            CustomUser.objects.filter(id__in=[u.id for u in users]).delete()
+
+        report = {
+            'vendor': connection.vendor,
+            'workers': workers,
+            'elapsed_s': round(elapsed, 2),
+            'operations': results,
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{connection.vendor}: {workers} workers, {elapsed:.2f}s")
+        for name, stats in sorted(results.items()):
+            self.stdout.write(
+                f"  {name:<8} n={stats['requests']:<5} rps={stats['rps']:<8} "
+                f"p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms errors={stats['errors']}"
+            )
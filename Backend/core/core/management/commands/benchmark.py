@@ -0,0 +1,123 @@
+import json
+import logging
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bench_data import seed
+from core.bench_scenarios import StubModel, compare, run_load, run_micro, run_serializers
+from ImageUpload.utils import predict
+from ImageUpload.utils.registry import registry
+
+# Timings depend on the machine, so the baseline is not checked in: save one
+# with --save-baseline on the machine that runs the comparisons.
+DEFAULT_BASELINE = settings.BASE_DIR / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        "Offline benchmark suite: optionally seeds the database, runs "
+        "microbenchmarks and a concurrent load driver, and compares p95 latency "
+        "and throughput against a stored baseline. Use a scratch database, e.g. "
+        "SQLITE_PATH=/tmp/bench.sqlite3 python manage.py migrate && "
+        "SQLITE_PATH=/tmp/bench.sqlite3 python manage.py benchmark --seed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help="Seed the database before running.")
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help="Fraction of the full volumes (100k users, 50k articles, 1M likes, 500k reports) to seed.",
+        )
+        parser.add_argument('--skip-micro', action='store_true')
+        parser.add_argument('--skip-load', action='store_true')
+        parser.add_argument(
+            '--serializer-rows', type=int, nargs='*',
+            help="Compare ModelSerializer and FastSerializer on pages of these sizes, e.g. 1000 10000.",
+        )
+        parser.add_argument('--only', nargs='*', help="Only load-test endpoints whose name contains one of these.")
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=80, help="Requests per endpoint in the load run.")
+        parser.add_argument('--repeat', type=int, default=20, help="Repetitions per microbenchmark.")
+        parser.add_argument(
+            '--real-model', action='store_true',
+            help="Use the real CNN instead of the stub model.",
+        )
+        parser.add_argument('--stub-delay-ms', type=float, default=0, help="Simulated inference time for the stub.")
+        parser.add_argument(
+            '--baseline', default=str(DEFAULT_BASELINE),
+            help="Baseline results from this machine (created with --save-baseline; not checked in).",
+        )
+        parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline.")
+        parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed regression, 0.2 = 20%%.")
+        parser.add_argument('--output', help="Also write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            seed(options['scale'], log=self.stdout.write)
+
+        if options['verbosity'] < 2:
+            # One JSON line per request would drown the report
+            logging.getLogger('core.requests').setLevel(logging.WARNING)
+            logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        if not options['real_model']:
+            class_names = registry.class_names()
+            predict.set_model(StubModel(len(class_names), options['stub_delay_ms']), class_names)
+
+        results = {}
+        if not options['skip_micro']:
+            results['micro'] = run_micro(repeat=options['repeat'])
+            self.print_section('micro', results['micro'])
+            crop_p95 = results['micro']['leaf_crop_12mp']['p95_ms']
+            budget = settings.PREDICTION_PREPROCESS_BUDGET_MS
+            self.stdout.write(
+                f"  12 MP leaf crop p95 {crop_p95}ms, budget {budget}ms"
+                + ('' if crop_p95 <= budget else ' (over budget: tiling would be skipped)')
+            )
+        if options['serializer_rows']:
+            results['serializers'], speedups = run_serializers(options['serializer_rows'], options['repeat'])
+            self.print_section('serializers', results['serializers'])
+            for name, speedup in speedups.items():
+                self.stdout.write(f"  {name:<30} fast path {speedup}x faster (p50)")
+        if not options['skip_load']:
+            results['load'] = run_load(options['workers'], options['requests'], options['only'])
+            self.print_section('load', results['load'])
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+
+        baseline_path = options['baseline']
+        if options['save_baseline']:
+            os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+            with open(baseline_path, 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Saved baseline to {baseline_path}")
+            return
+
+        try:
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            self.stdout.write(
+                f"No baseline at {baseline_path}; baselines are per machine, run with --save-baseline to create one."
+            )
+            return
+
+        regressions = compare(results, baseline, options['tolerance'])
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(regression)
+            raise CommandError(f"{len(regressions)} benchmark regressions against {baseline_path}")
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def print_section(self, title, entries):
+        self.stdout.write(title)
+        for name, stats in entries.items():
+            self.stdout.write(
+                f"  {name:<30} p50={stats['p50_ms']:>9}ms p95={stats['p95_ms']:>9}ms "
+                f"p99={stats['p99_ms']:>9}ms rps={stats['rps']:>8}"
+                + (f" errors={stats['errors']}" if 'errors' in stats else '')
+            )
@@ -0,0 +1,72 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from article.models import Article
+from core.compression import COMPRESSORS, PREFERENCE
+from scheme.models import Scheme
+
+# (path, sparse fieldset a low-bandwidth client would ask for)
+ENDPOINTS = [
+    ('/api/articles/', 'id,title,category,date,image'),
+    ('/api/articles/{article}/', 'id,title,summary,image'),
+    ('/api/scheme/', 'id,title,deadline'),
+    ('/api/scheme/{scheme}/', 'id,title,deadline,website'),
+    ('/api/plant-health/', 'id,health,issue,confidence,created_at'),
+    ('/api/plant-health/trends/', None),
+    ('/api/dashboard/stats/', None),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetches the main GET endpoints uncompressed, with each available encoding and with a "
+        "sparse fieldset, and reports the bytes on the wire."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', help="Report on this path instead (repeatable).")
+
+    def handle(self, *args, **options):
+        logging.getLogger('core.requests').setLevel(logging.WARNING)
+        ids = {
+            'article': Article.objects.values_list('id', flat=True).first() or 0,
+            'scheme': Scheme.objects.values_list('id', flat=True).first() or 0,
+        }
+        endpoints = [(p, None) for p in options['path']] if options['path'] else ENDPOINTS
+        encodings = [e for e in PREFERENCE if e in COMPRESSORS]
+        client = APIClient(SERVER_NAME='localhost')
+
+        header = f"{'endpoint':<32}{'identity':>11}" + ''.join(f"{e:>16}" for e in encodings) + f"{'fields+gzip':>16}"
+        self.stdout.write(header)
+        total_raw = total_best = 0
+        for path, fields in endpoints:
+            path = path.format(**ids)
+            response = client.get(path, HTTP_ACCEPT_ENCODING='identity')
+            if response.status_code != 200:
+                self.stdout.write(f"{path:<32}  HTTP {response.status_code}")
+                continue
+            raw = len(response.content)
+            line = f"{path:<32}{raw:>11}"
+            best = raw
+            for encoding in encodings:
+                size = len(client.get(path, HTTP_ACCEPT_ENCODING=encoding).content)
+                best = min(best, size)
+                line += f"{size:>9} {saving(raw, size):>6}"
+            if fields:
+                size = len(client.get(path, {'fields': fields}, HTTP_ACCEPT_ENCODING='gzip').content)
+                best = min(best, size)
+                line += f"{size:>9} {saving(raw, size):>6}"
+            self.stdout.write(line)
+            total_raw += raw
+            total_best += best
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Total: {total_raw} bytes uncompressed, {total_best} with the best option "
+            f"({saving(total_raw, total_best)} saved)."
+        ))
+
+
+def saving(raw, size):
+    return f"-{100 * (raw - size) / raw:.0f}%" if raw else '-'
@@ -0,0 +1,124 @@
+import os
+import shutil
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.media import BloomFilter, count_references, find_duplicates, referenced_names, walk_files
+from core.models import StoredObject
+from core.storage import object_store
+
+
+def human(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes (or quarantines) files under MEDIA_ROOT that no FileField/ImageField refers to, "
+        "drops unreferenced objects from the object store and reports byte-identical duplicates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=24,
+                            help="Only touch orphans not modified for this long.")
+        parser.add_argument('--quarantine', help="Move orphans to this directory instead of deleting them.")
+        parser.add_argument('--bloom', action='store_true',
+                            help="Hold referenced names in a Bloom filter instead of a set (bounded memory).")
+        parser.add_argument('--bloom-error-rate', type=float, default=0.001)
+        parser.add_argument('--no-duplicates', action='store_true', help="Skip the duplicate scan.")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        root = str(settings.MEDIA_ROOT)
+        if not os.path.isdir(root):
+            self.stdout.write(f"{root} does not exist; nothing to do.")
+            return
+
+        if options['bloom']:
+            referenced = BloomFilter(count_references(), options['bloom_error_rate'])
+        else:
+            referenced = set()
+        for name in referenced_names():
+            referenced.add(name)
+
+        quarantine = options['quarantine']
+        cutoff = time.time() - options['grace_hours'] * 3600
+        exclude = [quarantine] if quarantine else ()
+        orphans = orphan_bytes = young = 0
+
+        for name, path, stat in walk_files(root, exclude=exclude):
+            if name in referenced:
+                continue
+            if stat.st_mtime > cutoff:
+                young += 1
+                continue
+            orphans += 1
+            orphan_bytes += stat.st_size
+            if options['dry_run']:
+                self.stdout.write(f"orphan: {name}")
+                continue
+            if quarantine:
+                target = os.path.join(quarantine, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(path, target)
+            else:
+                os.remove(path)
+
+        verb = 'Would remove' if options['dry_run'] else ('Quarantined' if quarantine else 'Deleted')
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {orphans} orphaned files ({human(orphan_bytes)}); "
+            f"{young} newer than {options['grace_hours']}h left alone."
+        ))
+        self.sweep_objects(referenced, options)
+
+        if options['no_duplicates']:
+            return
+        groups = find_duplicates(root, lambda name: name in referenced, exclude=exclude)
+        reclaimable = sum(g[0][2] * (len(g) - 1) for g in groups)
+        for group in groups:
+            self.stdout.write(f"duplicate ({human(group[0][2])}): " + ', '.join(name for name, _, _ in group))
+        self.stdout.write(
+            f"{len(groups)} sets of duplicate referenced files; {human(reclaimable)} reclaimable by "
+            f"content-addressed storage (core.storage.SpooledObjectStorage)."
+        )
+
+    def sweep_objects(self, referenced, options):
+        """
+        Removes StoredObject rows that nothing refers to, and their copies in
+        the object store (covers files already evicted from local disk).
+        Bucket copies are kept with --quarantine, which is meant to be undone.
+        """
+        store = None if options['quarantine'] else object_store()
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        rows = (
+            StoredObject.objects.filter(created_at__lt=cutoff)
+            .values_list('pk', 'key', 'state').iterator(chunk_size=2000)
+        )
+        removed = kept_remote = 0
+        for pk, key, state in rows:
+            if key in referenced:
+                continue
+            if state == StoredObject.UPLOADED and store is None:
+                kept_remote += 1
+                continue
+            removed += 1
+            if options['dry_run']:
+                self.stdout.write(f"unreferenced object: {key}")
+                continue
+            if state == StoredObject.UPLOADED:
+                store.delete(key)
+            StoredObject.objects.filter(pk=pk).delete()
+
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        message = f"{verb} {removed} unreferenced stored objects"
+        if kept_remote:
+            message += f"; {kept_remote} uploaded objects kept (no object store configured or --quarantine)"
+        self.stdout.write(message + '.')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+
+from core.models import StoredObject
+from core.storage import object_store, upload
+
+
+class Command(BaseCommand):
+    help = "Uploads media files that are still pending or failed to the object store."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        store = object_store()
+        if store is None:
+            raise CommandError("OBJECT_STORAGE_BUCKET is not configured.")
+
+        keys = list(
+            StoredObject.objects.exclude(state=StoredObject.UPLOADED)
+            .order_by('created_at').values_list('key', flat=True)[:options['limit']]
+        )
+        uploaded = 0
+        for key in keys:
+            if upload(key, store) == StoredObject.UPLOADED:
+                uploaded += 1
+            else:
+                self.stderr.write(f"Failed: {key}")
+        self.stdout.write(f"Uploaded {uploaded} of {len(keys)} objects to {settings.OBJECT_STORAGE_BUCKET}.")
@@ -0,0 +1,109 @@
+"""
+Helpers for walking MEDIA_ROOT and the file names the database refers to,
+used by `manage.py media_gc`.
+"""
+import hashlib
+import math
+import os
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.db import models
+
+
+class BloomFilter:
+    """
+    Fixed-size set membership with false positives but no false negatives.
+    A false positive only means an orphan is kept, so it is safe for GC.
+    """
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'little')
+        b = int.from_bytes(digest[8:], 'little') | 1
+        return ((a + i * b) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+def file_fields():
+    """
+    (model, field name) for every FileField/ImageField in installed apps.
+    """
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField) and field.concrete:
+                yield model, field.name
+
+
+def referenced_names(chunk_size=2000):
+    """
+    Streams every non-empty stored file name, one query per field.
+    """
+    for model, name in file_fields():
+        names = (
+            model._default_manager.exclude(**{name: ''}).exclude(**{f'{name}__isnull': True})
+            .values_list(name, flat=True).iterator(chunk_size=chunk_size)
+        )
+        yield from names
+
+
+def count_references():
+    return sum(
+        model._default_manager.exclude(**{name: ''}).exclude(**{f'{name}__isnull': True}).count()
+        for model, name in file_fields()
+    )
+
+
+def walk_files(root, exclude=()):
+    """
+    Yields (relative name, absolute path, os.stat_result) for every file
+    below root, skipping the given absolute directories.
+    """
+    exclude = {os.path.abspath(d) for d in exclude}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if os.path.abspath(entry.path) not in exclude:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    rel = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                    yield rel, entry.path, entry.stat(follow_symlinks=False)
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_duplicates(root, include, exclude=()):
+    """
+    Groups byte-identical files below root whose name passes `include`.
+    Two walks keep memory flat: the first only counts how many files have
+    each size, the second hashes the files whose size is shared. Returns
+    lists of (name, path, size) with two or more members.
+    """
+    sizes = Counter(stat.st_size for name, _, stat in walk_files(root, exclude) if include(name))
+
+    by_hash = defaultdict(list)
+    for name, path, stat in walk_files(root, exclude):
+        size = stat.st_size
+        if size and sizes[size] > 1 and include(name):
+            by_hash[size, file_digest(path)].append((name, path, size))
+    return [group for group in by_hash.values() if len(group) > 1]
@@ -0,0 +1,199 @@
+"""
+In-process request metrics, exported in Prometheus text format by
+core.views.metrics_view.
+
+Each worker process keeps its own counters; Prometheus scrapes every worker
+(or sums them) the same way it would for any multi-process server.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+REGISTRY = []
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+        REGISTRY.append(self)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, key)} {value}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        with self.lock:
+            for key, (counts, total, count) in sorted(self.values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    labels = _format_labels(self.labelnames, key, ('le', repr(float(bound))))
+                    lines.append(f'{self.name}_bucket{labels} {bucket_count}')
+                labels = _format_labels(self.labelnames, key, ('le', '+Inf'))
+                lines.append(f'{self.name}_bucket{labels} {count}')
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f'{self.name}_sum{labels} {total}')
+                lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+def render_prometheus():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+REQUESTS = Counter('http_requests_total', 'Requests handled.', ('endpoint', 'method', 'status'))
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Request latency.', ('endpoint', 'method'))
+DB_QUERIES = Histogram('http_request_db_queries', 'DB queries per request.', ('endpoint', 'method'), COUNT_BUCKETS)
+DB_TIME = Histogram('http_request_db_seconds', 'Time spent in DB queries per request.', ('endpoint', 'method'))
+PHASE_TIME = Histogram(
+    'http_request_phase_seconds',
+    'Time spent in named phases (serialize, decode, preprocess, inference, ...), excluding DB time.',
+    ('endpoint', 'phase'),
+)
+
+
+class RequestMetrics:
+    """
+    What one request has spent so far: DB queries and named phases.
+    """
+    def __init__(self):
+        self.queries = []
+        self.db_time = 0.0
+        self.phases = {}
+
+    def record_query(self, sql, duration):
+        self.queries.append((sql, duration))
+        self.db_time += duration
+
+    def add_phase(self, name, duration):
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def current():
+    """
+    The RequestMetrics of the request being handled, or None outside one.
+    """
+    return _current.get()
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def phase(name):
+    """
+    Times a block as a named phase of the current request. DB time spent
+    inside the block is subtracted, so e.g. "serialize" measures the
+    serializer itself rather than the lazy queryset it evaluates.
+
+    Outside a request (management commands, shell) this is a no-op.
+    """
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    db_before = metrics.db_time
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start - (metrics.db_time - db_before)
+        metrics.add_phase(name, max(elapsed, 0.0))
+
+
+class TimedSerializationMixin:
+    """
+    For generic list/retrieve views: times the serializer as the "serialize"
+    phase.
+    """
+    def list(self, request, *args, **kwargs):
+        with phase('serialize'):
+            return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        with phase('serialize'):
+            return super().retrieve(request, *args, **kwargs)
@@ -0,0 +1,82 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+request_logger = logging.getLogger('core.requests')
+slow_logger = logging.getLogger('core.slow_requests')
+
+
+class MetricsMiddleware:
+    """
+    Records per-endpoint latency, DB query count/time and phase timings into
+    core.metrics, and writes one JSON log line per request. Requests slower
+    than SLOW_REQUEST_MS are sampled (SLOW_REQUEST_SAMPLE_RATE) with their
+    full query list.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics, token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(self.time_query))
+                response = self.get_response(request)
+            duration = time.perf_counter() - start
+            self.record(request, response, duration, request_metrics)
+            return response
+        finally:
+            metrics.end_request(token)
+
+    @staticmethod
+    def time_query(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            request_metrics = metrics.current()
+            if request_metrics is not None:
+                request_metrics.record_query(sql, time.perf_counter() - start)
+
+    @staticmethod
+    def endpoint(request):
+        match = getattr(request, 'resolver_match', None)
+        return match.route if match is not None else 'unmatched'
+
+    def record(self, request, response, duration, request_metrics):
+        endpoint = self.endpoint(request)
+        method = request.method
+
+        metrics.REQUESTS.inc(endpoint=endpoint, method=method, status=response.status_code)
+        metrics.REQUEST_LATENCY.observe(duration, endpoint=endpoint, method=method)
+        metrics.DB_QUERIES.observe(len(request_metrics.queries), endpoint=endpoint, method=method)
+        metrics.DB_TIME.observe(request_metrics.db_time, endpoint=endpoint, method=method)
+        for name, seconds in request_metrics.phases.items():
+            metrics.PHASE_TIME.observe(seconds, endpoint=endpoint, phase=name)
+
+        entry = {
+            'endpoint': endpoint,
+            'method': method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'db_queries': len(request_metrics.queries),
+            'db_ms': round(request_metrics.db_time * 1000, 2),
+            'phases_ms': {name: round(s * 1000, 2) for name, s in request_metrics.phases.items()},
+        }
+        request_logger.info(json.dumps(entry))
+
+        if duration * 1000 >= settings.SLOW_REQUEST_MS and random.random() < settings.SLOW_REQUEST_SAMPLE_RATE:
+            entry['queries'] = [
+                {'sql': sql, 'ms': round(seconds * 1000, 2)} for sql, seconds in request_metrics.queries
+            ]
+            slow_logger.warning(json.dumps(entry))
@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class StoredObject(models.Model):
+    """
+    One content-addressed media file written by core.storage and its upload
+    state in the object store.
+    """
+    PENDING = 'pending'
+    UPLOADED = 'uploaded'
+    FAILED = 'failed'
+    STATE_CHOICES = [
+        (PENDING, 'Pending'),
+        (UPLOADED, 'Uploaded'),
+        (FAILED, 'Failed'),
+    ]
+
+    key = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=PENDING, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    uploaded_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.state})"
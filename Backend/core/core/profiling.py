@@ -0,0 +1,216 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when a staff user asks for it (X-Profile: 1 header or
+?profile=1) or when it falls into PROFILE_SAMPLE_RATE. The profile holds a
+call tree (pyinstrument when installed, otherwise cProfile stats), the phase
+timings and DB totals from core.metrics and, for requests that ran
+inference, an optional TensorFlow trace. Profiles are written as JSON files
+to PROFILE_DIR, keeping at most PROFILE_MAX_FILES. Staff can browse them at
+/admin/profiles/ or fetch them from /api/profiles/.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from . import metrics
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:
+    PyinstrumentProfiler = None
+
+logger = logging.getLogger(__name__)
+
+# Python allows only one active profiler per process; concurrent requests
+# that would also be profiled are simply served unprofiled.
+_profiler_lock = threading.Lock()
+
+
+def requested_by_staff(request):
+    """
+    True if the request asks to be profiled and comes from a staff user,
+    authenticated either by session or by a DRF token.
+    """
+    if request.headers.get('X-Profile') != '1' and request.GET.get('profile') != '1':
+        return False
+
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+
+    auth = request.headers.get('Authorization', '')
+    if auth.startswith('Token '):
+        from rest_framework.authtoken.models import Token
+        token = Token.objects.select_related('user').filter(key=auth[len('Token '):].strip()).first()
+        return token is not None and token.user.is_active and token.user.is_staff
+    return False
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE
+        if not (sampled or requested_by_staff(request)):
+            return self.get_response(request)
+        if not _profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.profile(request)
+        finally:
+            _profiler_lock.release()
+
+    def profile(self, request):
+        tf_trace_dir = self.start_tf_trace()
+        if PyinstrumentProfiler is not None:
+            profiler = PyinstrumentProfiler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - start
+            if PyinstrumentProfiler is not None:
+                profiler.stop()
+                call_tree = profiler.output_text(unicode=True, color=False)
+            else:
+                profiler.disable()
+                call_tree = format_cprofile(profiler)
+            self.stop_tf_trace(tf_trace_dir)
+
+        match = getattr(request, 'resolver_match', None)
+        request_metrics = metrics.current()
+        store.save({
+            'endpoint': match.route if match is not None else 'unmatched',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'phases_ms': {n: round(s * 1000, 2) for n, s in request_metrics.phases.items()} if request_metrics else {},
+            'db_queries': len(request_metrics.queries) if request_metrics else None,
+            'db_ms': round(request_metrics.db_time * 1000, 2) if request_metrics else None,
+            'profiler': 'pyinstrument' if PyinstrumentProfiler is not None else 'cProfile',
+            'call_tree': call_tree,
+            'tf_trace_dir': tf_trace_dir,
+        })
+        return response
+
+    @staticmethod
+    def start_tf_trace():
+        # Only when TensorFlow is already loaded; profiling must not import it
+        if not settings.PROFILE_TF_TRACE or 'tensorflow' not in sys.modules:
+            return None
+        tf = sys.modules['tensorflow']
+        trace_dir = os.path.join(settings.PROFILE_DIR, 'tf', uuid.uuid4().hex)
+        try:
+            tf.profiler.experimental.start(trace_dir)
+        except Exception:
+            logger.exception("Could not start the TensorFlow profiler")
+            return None
+        return trace_dir
+
+    @staticmethod
+    def stop_tf_trace(trace_dir):
+        if trace_dir is None:
+            return
+        try:
+            sys.modules['tensorflow'].profiler.experimental.stop()
+        except Exception:
+            logger.exception("Could not stop the TensorFlow profiler")
+
+
+def format_cprofile(profiler, limit=60):
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
+
+
+class ProfileStore:
+    """
+    Bounded on-disk store: one JSON file per profile, oldest files removed
+    once there are more than `max_files`.
+    """
+    def __init__(self, directory=None, max_files=None):
+        self._directory = directory
+        self._max_files = max_files
+
+    @property
+    def directory(self):
+        return str(self._directory or settings.PROFILE_DIR)
+
+    @property
+    def max_files(self):
+        return self._max_files or settings.PROFILE_MAX_FILES
+
+    def paths(self):
+        """
+        Stored profile files, oldest first (ids start with the save time).
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            e.path for e in os.scandir(self.directory) if e.is_file() and e.name.endswith('.json')
+        )
+
+    def save(self, profile):
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        profile['id'] = profile_id
+        profile['created_at'] = time.time()
+        path = os.path.join(self.directory, f'{profile_id}.json')
+        with open(path, 'w') as f:
+            json.dump(profile, f)
+        for old in self.paths()[:-self.max_files]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        return profile_id
+
+    def get(self, profile_id):
+        if not profile_id.replace('-', '').isalnum():
+            return None
+        try:
+            with open(os.path.join(self.directory, f'{profile_id}.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def slowest_by_endpoint(self, limit=5):
+        """
+        {endpoint: [summary, ...]} with the `limit` slowest stored profiles
+        per endpoint. Call trees are left out; fetch them with get().
+        """
+        grouped = {}
+        for path in self.paths():
+            try:
+                with open(path) as f:
+                    profile = json.load(f)
+            except (OSError, ValueError):
+                continue
+            profile.pop('call_tree', None)
+            grouped.setdefault(profile['endpoint'], []).append(profile)
+        return {
+            endpoint: sorted(profiles, key=lambda p: p['duration_ms'], reverse=True)[:limit]
+            for endpoint, profiles in sorted(grouped.items())
+        }
+
+
+store = ProfileStore()
@@ -0,0 +1,121 @@
+from django.db import connection, transaction
+from django.urls import URLPattern, URLResolver, get_resolver
+
+# List endpoints are audited the way a page of them is fetched.
+AUDIT_PAGE_SIZE = 25
+
+
+class KnownScan:
+    """
+    Wraps one audited queryset whose scan has been reviewed and is known to
+    be safe, with the reason. Only that query is exempt; anything else the
+    endpoint runs is still checked.
+    """
+    def __init__(self, queryset, reason):
+        self.queryset = queryset
+        self.reason = reason
+
+
+def iter_endpoints(patterns=None, prefix=''):
+    """
+    Yields (route, view_class) for every class-based view in the URLconf.
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_endpoints(pattern.url_patterns, prefix + str(pattern.pattern))
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if view_class is not None:
+                yield prefix + str(pattern.pattern), pattern.pattern.converters, view_class
+
+
+def endpoint_querysets(route, converters, view_class):
+    """
+    Returns the querysets an endpoint runs, as far as they can be built
+    without a request:
+
+    * views may define get_audit_querysets() returning a list (entries may
+      be KnownScan);
+    * otherwise get_queryset()/queryset is used, filtered on the lookup field
+      for detail routes and sliced to one page for list routes.
+    """
+    if hasattr(view_class, 'get_audit_querysets'):
+        return view_class.get_audit_querysets()
+
+    view = view_class()
+    view.request = None
+    view.args = ()
+    view.kwargs = {}
+    view.format_kwarg = None
+    if hasattr(view, 'get_queryset'):
+        queryset = view.get_queryset()
+    elif getattr(view, 'queryset', None) is not None:
+        queryset = view.queryset.all()
+    else:
+        return []
+
+    if converters:
+        lookup_field = getattr(view, 'lookup_field', 'pk')
+        return [queryset.filter(**{lookup_field: 1})]
+    return [queryset[:AUDIT_PAGE_SIZE]]
+
+
+def is_full_scan(queryset, plan):
+    """
+    Flags plans that filter or sort without index support.
+
+    A plain scan over an unfiltered table in primary-key order is expected for
+    list endpoints, so only scans that have to evaluate a WHERE clause row by
+    row, and sorts done in a temporary structure, are reported.
+    """
+    filtered = bool(queryset.query.where)
+    if connection.vendor == 'sqlite':
+        for line in plan.splitlines():
+            if 'USE TEMP B-TREE' in line:
+                return True
+            if 'SCAN ' in line and 'INDEX' not in line and 'PRIMARY KEY' not in line and filtered:
+                return True
+        return False
+    if connection.vendor == 'postgresql':
+        return 'Sort' in plan or ('Seq Scan' in plan and filtered)
+    return False
+
+
+def explain(queryset):
+    """
+    Runs EXPLAIN for the queryset. On Postgres sequential scans are disabled
+    for the duration so the planner reveals whether an index path exists even
+    on small development tables.
+    """
+    if connection.vendor == 'postgresql':
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+    return queryset.explain()
+
+
+def audit():
+    """
+    Explains every endpoint queryset. Returns a list of dicts with the route,
+    view, SQL, plan, whether it was flagged and, for a KnownScan, the reason
+    it is allowed.
+    """
+    results = []
+    for route, converters, view_class in iter_endpoints():
+        for queryset in endpoint_querysets(route, converters, view_class):
+            allowed = None
+            if isinstance(queryset, KnownScan):
+                queryset, allowed = queryset.queryset, queryset.reason
+            plan = explain(queryset)
+            results.append({
+                'route': route,
+                'view': view_class.__name__,
+                'sql': str(queryset.query),
+                'plan': plan,
+                'full_scan': is_full_scan(queryset, plan) and allowed is None,
+                'allowed': allowed,
+            })
+    return results
@@ -0,0 +1,28 @@
+"""
+JSON rendering through orjson when it is installed, with DRF's stdlib
+renderer as the fallback.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+_encoder = JSONEncoder()
+# Datetimes go through DRF's encoder too, so they keep its format
+# (millisecond precision, "Z" for UTC).
+_options = orjson and (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Same output as JSONRenderer (UTF-8, compact). Types orjson doesn't know
+    (Decimal, lazy strings, querysets...) go through DRF's encoder, and
+    indented output is left to the stdlib renderer.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=_encoder.default, option=_options)
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'core',
     'accounts',
     'article',
     'ImageUpload',
@@ -50,18 +53,114 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Plant disease prediction (ImageUpload.utils.predict)
+# Versioned models live in PLANT_MODEL_REGISTRY_DIR/<version>/; the original
+# artifact in PLANT_MODEL_DIR is version "v1". See ImageUpload.utils.registry.
+PLANT_MODEL_DIR = BASE_DIR / 'ImageUpload' / 'cnn_model'
+PLANT_MODEL_REGISTRY_DIR = Path(os.environ.get('PLANT_MODEL_REGISTRY_DIR', PLANT_MODEL_DIR / 'versions'))
+PLANT_MODEL_POLL_SECONDS = float(os.environ.get('PLANT_MODEL_POLL_SECONDS', '30'))
+# Share of requests also sent to the shadow candidate, unless SHADOW sets one
+PLANT_MODEL_SHADOW_RATE = float(os.environ.get('PLANT_MODEL_SHADOW_RATE', '0.1'))
+# Upper bound on how long a worker serves a stale label catalogue when the
+# cache is not shared between workers
+LABEL_CACHE_SECONDS = float(os.environ.get('LABEL_CACHE_SECONDS', '60'))
+PREDICTION_TOP_K = int(os.environ.get('PREDICTION_TOP_K', '3'))
+# Below this confidence (percent) a test-time augmentation pass is run
+PREDICTION_TTA_ENABLED = os.environ.get('PREDICTION_TTA_ENABLED', '1') == '1'
+PREDICTION_TTA_THRESHOLD = float(os.environ.get('PREDICTION_TTA_THRESHOLD', '60'))
+# Below this confidence (percent), after TTA, the result is "low confidence":
+# 'flag' saves it and marks the response, 'reject' asks for a new photo.
+PREDICTION_MIN_CONFIDENCE = float(os.environ.get('PREDICTION_MIN_CONFIDENCE', '40'))
+PREDICTION_LOW_CONFIDENCE_POLICY = os.environ.get('PREDICTION_LOW_CONFIDENCE_POLICY', 'flag')
+# Large JPEGs are decoded at a reduced scale, never below this many pixels a side
+PREDICTION_DECODE_SIDE = int(os.environ.get('PREDICTION_DECODE_SIDE', '1024'))
+# Crop field shots to the dominant leaf region before resizing (utils/leaf.py)
+PREDICTION_LEAF_CROP = os.environ.get('PREDICTION_LEAF_CROP', '1') == '1'
+# Photos whose decoded short side is at least TILE_MIN_SIDE are also split
+# into TILE_GRID x TILE_GRID patches, classified in the same batch
+PREDICTION_TILING = os.environ.get('PREDICTION_TILING', '1') == '1'
+PREDICTION_TILE_GRID = int(os.environ.get('PREDICTION_TILE_GRID', '2'))
+PREDICTION_TILE_MIN_SIDE = int(os.environ.get('PREDICTION_TILE_MIN_SIDE', '1000'))
+# Leaf analysis time after which tiling is skipped for the request
+PREDICTION_PREPROCESS_BUDGET_MS = float(os.environ.get('PREDICTION_PREPROCESS_BUDGET_MS', '50'))
+
+# Admission control for inference (ImageUpload/utils/admission.py). Limits are
+# (uploads per minute, burst). Buckets and slots live in each worker process:
+# with N prefork workers (gunicorn -w N) callers get N times these limits and
+# the server runs N * INFERENCE_CONCURRENCY predictions, so divide totals by N.
+# The queue and its priority lanes only form between threads of one worker;
+# with one thread per worker each worker sees a single request at a time and
+# nothing is ever queued or shed. Run threaded workers (e.g. --threads 8) with
+# INFERENCE_CONCURRENCY below the thread count.
+INFERENCE_CONCURRENCY = int(os.environ.get('INFERENCE_CONCURRENCY', '2'))
+INFERENCE_USER_LIMITS = {
+    'interactive': (30, 10),
+    'bulk': (300, 50),
+}
+INFERENCE_TYPE_LIMITS = {
+    'Farmer': (1200, 200),
+    'Government': (300, 50),
+    'Bank': (300, 50),
+    'Corporate': (300, 50),
+    'Event': (120, 30),
+    'Anonymous': (300, 50),
+}
+# Requests expected to wait longer than this for a slot are shed (503)
+INFERENCE_LATENCY_TARGET_MS = {
+    'interactive': int(os.environ.get('INFERENCE_INTERACTIVE_TARGET_MS', '5000')),
+    'bulk': int(os.environ.get('INFERENCE_BULK_TARGET_MS', '20000')),
+}
+
+# Request instrumentation (core.middleware.MetricsMiddleware)
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', '1000'))
+SLOW_REQUEST_SAMPLE_RATE = float(os.environ.get('SLOW_REQUEST_SAMPLE_RATE', '1.0'))
+# Bearer token for scraping /metrics; without it only staff sessions can read it
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Per-request profiling (core.profiling). Staff can always ask for a profile
+# with "X-Profile: 1" or ?profile=1; PROFILE_SAMPLE_RATE profiles a random
+# fraction of all requests on top of that.
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', BASE_DIR / 'profiles')
+PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', '200'))
+# Also capture a TensorFlow op trace (viewable in TensorBoard)
+PROFILE_TF_TRACE = os.environ.get('PROFILE_TF_TRACE', '0') == '1'
+
+# `manage.py test` keeps the per-request JSON log off the console
+TESTING = sys.argv[1:2] == ['test']
+REQUEST_LOG_LEVEL = os.environ.get('REQUEST_LOG_LEVEL', 'CRITICAL' if TESTING else 'INFO')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        # core.middleware already emits JSON
+        'raw': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'json_console': {'class': 'logging.StreamHandler', 'formatter': 'raw'},
+    },
+    'loggers': {
+        'core.requests': {'handlers': ['json_console'], 'level': REQUEST_LOG_LEVEL, 'propagate': False},
+        'core.slow_requests': {'handlers': ['json_console'], 'level': 'CRITICAL' if TESTING else 'WARNING', 'propagate': False},
+    },
+}
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -85,16 +184,92 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# The backend is picked from the environment so production can run on Postgres
+# while local development keeps using the bundled SQLite file.
+#   DB_ENGINE=postgres DB_NAME=satvafarm DB_USER=... DB_PASSWORD=... DB_HOST=...
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite').lower()
+
+if DB_ENGINE in ('postgres', 'postgresql'):
+    DB_POOL = os.environ.get('DB_POOL', '1') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'satvafarm'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Django refuses persistent connections together with its pool,
+            # so CONN_MAX_AGE only applies when pooling is switched off.
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
     }
+    if DB_POOL:
+        # Requires psycopg[pool]
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX', '10')),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {},
+        }
+    }
+
+# SQLite tuning: connection options here, plus the PRAGMAs core.db applies
+# to every new connection. Set SQLITE_TUNING=0 to fall back to SQLite's and
+# Django's defaults (e.g. when benchmarking the difference).
+SQLITE_TUNING = os.environ.get('SQLITE_TUNING', '1') == '1'
+if DB_ENGINE not in ('postgres', 'postgresql') and SQLITE_TUNING:
+    DATABASES['default']['OPTIONS'].update({
+        # Seconds to wait on a locked database before raising
+        # "database is locked".
+        'timeout': 20,
+        # Take the write lock at BEGIN instead of upgrading a read
+        # lock mid-transaction, which fails immediately under contention.
+        'transaction_mode': 'IMMEDIATE',
+    })
+
+# Only the PRAGMAs and values in core.db.ALLOWED_PRAGMAS are accepted
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'mmap_size': 268435456,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
 }
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads (plant photos, article images, ID proofs) go through
+# core.storage.SpooledObjectStorage: written locally under a content hash,
+# then copied to an S3-compatible bucket in the background when one is set.
+STORAGES = {
+    'default': {'BACKEND': os.environ.get('MEDIA_STORAGE_BACKEND', 'core.storage.SpooledObjectStorage')},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+OBJECT_STORAGE_BUCKET = os.environ.get('OBJECT_STORAGE_BUCKET', '')
+# e.g. http://localhost:9000 for MinIO, or file:///tmp/objects for a local stand-in
+OBJECT_STORAGE_ENDPOINT_URL = os.environ.get('OBJECT_STORAGE_ENDPOINT_URL', '')
+OBJECT_STORAGE_ACCESS_KEY = os.environ.get('OBJECT_STORAGE_ACCESS_KEY', '')
+OBJECT_STORAGE_SECRET_KEY = os.environ.get('OBJECT_STORAGE_SECRET_KEY', '')
+OBJECT_STORAGE_REGION = os.environ.get('OBJECT_STORAGE_REGION', '')
+# Base URL files are served from once uploaded (bucket URL or CDN)
+OBJECT_STORAGE_PUBLIC_URL = os.environ.get('OBJECT_STORAGE_PUBLIC_URL', '')
+# Drop the local copy once uploaded; only applies when OBJECT_STORAGE_PUBLIC_URL is set
+OBJECT_STORAGE_EVICT_LOCAL = os.environ.get('OBJECT_STORAGE_EVICT_LOCAL', '1') == '1'
+OBJECT_STORAGE_UPLOAD_WORKERS = int(os.environ.get('OBJECT_STORAGE_UPLOAD_WORKERS', '2'))
+OBJECT_STORAGE_MAX_RETRIES = int(os.environ.get('OBJECT_STORAGE_MAX_RETRIES', '3'))
+OBJECT_STORAGE_RETRY_DELAY = float(os.environ.get('OBJECT_STORAGE_RETRY_DELAY', '1'))
+
 
 
 # Password validation
@@ -116,6 +291,47 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '512'))
+# Lifetime of the precompressed article/scheme list variants
+COMPRESSION_CACHE_SECONDS = int(os.environ.get('COMPRESSION_CACHE_SECONDS', '300'))
+
+# The compressed variants and the label catalogue are invalidated by bumping a
+# stamp in the default cache. Without REDIS_URL each worker process has its own
+# LocMem cache, so after an article/scheme edit or a catalogue change other
+# workers serve stale data for up to COMPRESSION_CACHE_SECONDS (resp.
+# LABEL_CACHE_SECONDS). `check --deploy` warns about this (core.W001).
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+# OpenWeather API access and the weather prefetch (accounts.weather)
+# Required for the weather endpoints and refresh_weather; there is no default
+OPENWEATHER_API_KEY = os.environ.get('OPENWEATHER_API_KEY', '')
+WEATHER_TIMEOUT = float(os.environ.get('WEATHER_TIMEOUT', '10'))
+WEATHER_FETCH_WORKERS = int(os.environ.get('WEATHER_FETCH_WORKERS', '8'))
+# refresh_weather refetches snapshots older than this
+WEATHER_REFRESH_SECONDS = int(os.environ.get('WEATHER_REFRESH_SECONDS', '900'))
+# WeatherView fetches on demand when a snapshot is older than this
+WEATHER_MAX_AGE_SECONDS = int(os.environ.get('WEATHER_MAX_AGE_SECONDS', '3600'))
+
+# Rows fetched and serialized per step by the streaming export endpoints
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', '2000'))
+
+REST_FRAMEWORK = {
+    # orjson-backed when orjson is installed, stdlib json otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -0,0 +1,275 @@
+"""
+Media storage: content-addressed files spooled to local disk and uploaded to
+an S3-compatible object store in the background.
+
+* Uploads are written under MEDIA_ROOT as <upload_to>/<sha[:2]>/<sha><ext>,
+  so byte-identical files are stored once.
+* A StoredObject row tracks each file; a small thread pool uploads it with
+  retries, and `manage.py sync_object_storage` retries anything left over.
+* URLs point at the local copy while it exists. Once the upload is confirmed
+  the local copy is evicted (OBJECT_STORAGE_EVICT_LOCAL) and URLs switch to
+  OBJECT_STORAGE_PUBLIC_URL, so no database lookup is needed per URL. Without
+  a public URL nothing is evicted, since there would be nothing to link to.
+* Reading an evicted file downloads it from the bucket back to its local
+  path first, so .open() and .path keep working.
+* Files are never deleted through the storage API because one object can
+  back many rows. A file's reference count is the number of FileField values
+  naming its key; `manage.py media_gc` computes those and removes local
+  files, bucket objects and StoredObject rows that nothing references.
+
+Without OBJECT_STORAGE_BUCKET nothing is uploaded and this behaves like
+FileSystemStorage with content-addressed names. An endpoint URL of the form
+file:///some/dir uses a directory as a stand-in object store for tests.
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+logger = logging.getLogger(__name__)
+
+
+class S3ObjectStore:
+    def __init__(self):
+        import boto3
+
+        self.bucket = settings.OBJECT_STORAGE_BUCKET
+        self.client = boto3.client(
+            's3',
+            endpoint_url=settings.OBJECT_STORAGE_ENDPOINT_URL or None,
+            aws_access_key_id=settings.OBJECT_STORAGE_ACCESS_KEY or None,
+            aws_secret_access_key=settings.OBJECT_STORAGE_SECRET_KEY or None,
+            region_name=settings.OBJECT_STORAGE_REGION or None,
+        )
+
+    def put(self, local_path, key):
+        content_type = mimetypes.guess_type(key)[0] or 'application/octet-stream'
+        self.client.upload_file(local_path, self.bucket, key, ExtraArgs={'ContentType': content_type})
+
+    def size(self, key):
+        return self.client.head_object(Bucket=self.bucket, Key=key)['ContentLength']
+
+    def get(self, key, local_path):
+        self.client.download_file(self.bucket, key, local_path)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+
+class DirectoryObjectStore:
+    """
+    Local stand-in for an object store (OBJECT_STORAGE_ENDPOINT_URL=file:///dir).
+    """
+    def __init__(self):
+        self.root = os.path.join(settings.OBJECT_STORAGE_ENDPOINT_URL[len('file://'):], settings.OBJECT_STORAGE_BUCKET)
+
+    def put(self, local_path, key):
+        target = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(local_path, target)
+
+    def size(self, key):
+        return os.path.getsize(os.path.join(self.root, key))
+
+    def get(self, key, local_path):
+        shutil.copyfile(os.path.join(self.root, key), local_path)
+
+    def delete(self, key):
+        try:
+            os.remove(os.path.join(self.root, key))
+        except FileNotFoundError:
+            pass
+
+
+def object_store():
+    if not settings.OBJECT_STORAGE_BUCKET:
+        return None
+    if (settings.OBJECT_STORAGE_ENDPOINT_URL or '').startswith('file://'):
+        return DirectoryObjectStore()
+    return S3ObjectStore()
+
+
+class Uploader:
+    """
+    Background upload queue shared by every storage instance in the process.
+    """
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, key):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.OBJECT_STORAGE_UPLOAD_WORKERS, thread_name_prefix='media-upload',
+                )
+        return self._executor.submit(self.run, key)
+
+    def run(self, key):
+        close_old_connections()
+        try:
+            return upload(key)
+        finally:
+            close_old_connections()
+
+
+def upload(key, store=None, location=None):
+    """
+    Uploads one pending StoredObject, retrying with exponential backoff, and
+    evicts the local copy once the object store reports the right size.
+    Returns the final state.
+    """
+    from .models import StoredObject
+
+    store = store or object_store()
+    if store is None:
+        return None
+    location = location or str(settings.MEDIA_ROOT)
+    obj = StoredObject.objects.filter(key=key).first()
+    if obj is None or obj.state == StoredObject.UPLOADED:
+        return obj and obj.state
+
+    local_path = os.path.join(location, key)
+    for attempt in range(settings.OBJECT_STORAGE_MAX_RETRIES):
+        obj.attempts += 1
+        try:
+            store.put(local_path, key)
+            if store.size(key) != obj.size:
+                raise IOError(f"size mismatch after upload of {key}")
+        except Exception as e:
+            obj.last_error = str(e)
+            obj.state = StoredObject.FAILED
+            obj.save(update_fields=['attempts', 'last_error', 'state'])
+            logger.warning("Upload of %s failed (attempt %s): %s", key, obj.attempts, e)
+            time.sleep(settings.OBJECT_STORAGE_RETRY_DELAY * (2 ** attempt))
+            continue
+
+        obj.state = StoredObject.UPLOADED
+        obj.uploaded_at = timezone.now()
+        obj.last_error = ''
+        obj.save(update_fields=['attempts', 'last_error', 'state', 'uploaded_at'])
+        if evict_local():
+            try:
+                os.remove(local_path)
+            except OSError:
+                pass
+        return obj.state
+    return obj.state
+
+
+def evict_local():
+    # Evicted files are served from the public URL, so keep them without one
+    return settings.OBJECT_STORAGE_EVICT_LOCAL and bool(settings.OBJECT_STORAGE_PUBLIC_URL)
+
+
+uploader = Uploader()
+
+
+@deconstructible
+class SpooledObjectStorage(FileSystemStorage):
+    # Content-addressed objects may be shared by several rows, so deleting
+    # through the storage API is a no-op; `manage.py media_gc` counts the
+    # references and removes what nothing refers to (see the module docstring).
+    def delete(self, name):
+        pass
+
+    def content_key(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        sha = digest.hexdigest()
+        directory = os.path.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+        key = f'{sha[:2]}/{sha}{ext}'
+        return (f'{directory}/{key}' if directory else key), sha
+
+    def get_available_name(self, name, max_length=None):
+        # Same name means same content, so an existing file is simply reused
+        return name
+
+    def write(self, key, content):
+        """
+        Writes content to key through a temporary file and a rename. Two
+        uploads of the same bytes may both get here; the second rename just
+        replaces a complete file with an identical one. (FileSystemStorage's
+        exclusive create would retry get_available_name forever, since the
+        name never changes.)
+        """
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{uuid.uuid4().hex}.part'
+        try:
+            with open(tmp, 'wb') as f:
+                for chunk in content.chunks():
+                    f.write(chunk.encode() if isinstance(chunk, str) else chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp, self.file_permissions_mode)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return key
+
+    def _save(self, name, content):
+        from .models import StoredObject
+
+        key, sha = self.content_key(name, content)
+        known = StoredObject.objects.filter(key=key).exists()
+        if not super().exists(key):
+            # New content, or a known object whose local copy was evicted:
+            # the bytes are at hand, so putting them back is cheaper than a
+            # download on the next read.
+            self.write(key, content)
+        if known:
+            return key
+        StoredObject.objects.get_or_create(key=key, defaults={'sha256': sha, 'size': content.size})
+        if settings.OBJECT_STORAGE_BUCKET:
+            uploader.enqueue(key)
+        return key
+
+    def _open(self, name, mode='rb'):
+        if not super().exists(name):
+            self.materialize(name)
+        return super()._open(name, mode)
+
+    def materialize(self, name):
+        """
+        Downloads an evicted object back to its local path.
+        """
+        from .models import StoredObject
+
+        store = object_store()
+        if store is None or not StoredObject.objects.filter(key=name, state=StoredObject.UPLOADED).exists():
+            return
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{threading.get_ident()}.part'
+        try:
+            store.get(name, tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def exists(self, name):
+        if super().exists(name):
+            return True
+        from .models import StoredObject
+        return StoredObject.objects.filter(key=name, state=StoredObject.UPLOADED).exists()
+
+    def url(self, name):
+        if settings.OBJECT_STORAGE_PUBLIC_URL and not super().exists(name):
+            return f"{settings.OBJECT_STORAGE_PUBLIC_URL.rstrip('/')}/{name}"
+        return super().url(name)
@@ -0,0 +1,703 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from accounts.models import CustomUser
+from article.models import Article
+from article.serializers import ArticleSerializer
+from ImageUpload.models import PlantHealthReport
+from ImageUpload.serializers import PlantHealthReportSerializer
+from scheme.models import Scheme
+from scheme.serializers import SchemeSummarySerializer
+
+from .bench_scenarios import compare
+from .checks import check_shared_cache
+from .compression import compress, invalidate_variants, negotiate
+from . import metrics
+from .db import pragma_statements
+from .fast_serializers import FastSerializer, requested_fields
+from .models import StoredObject
+from .profiling import ProfileStore
+from .query_audit import explain, is_full_scan
+from .renderers import FastJSONRenderer
+from .storage import SpooledObjectStorage, upload, uploader
+
+
+class QueryAuditTests(TestCase):
+    def test_every_endpoint_query_is_index_backed(self):
+        out = StringIO()
+        call_command('audit_queries', fail_on_scan=True, stdout=out)
+        self.assertIn('0 flagged', out.getvalue())
+
+    def test_filter_on_unindexed_column_is_flagged(self):
+        queryset = Scheme.objects.filter(contactName='Ravi')
+        self.assertTrue(is_full_scan(queryset, explain(queryset)))
+
+    def test_indexed_feed_is_not_flagged(self):
+        queryset = Article.objects.filter(category='crops').order_by('-date')[:25]
+        self.assertFalse(is_full_scan(queryset, explain(queryset)))
+
+
+class SqlitePragmaTests(TestCase):
+    def test_configured_pragmas_are_applied(self):
+        self.assertEqual(len(pragma_statements(settings.SQLITE_PRAGMAS)), len(settings.SQLITE_PRAGMAS))
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+
+    def test_unknown_pragma_is_rejected(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "'writable_schema' is not an allowed PRAGMA"):
+            pragma_statements({'writable_schema': 'ON'})
+
+    def test_values_are_checked(self):
+        self.assertEqual(pragma_statements({'journal_mode': 'wal'}), ['PRAGMA journal_mode = wal'])
+        for pragma, value in [
+            ('journal_mode', 'WAL; DROP TABLE article_article'),
+            ('busy_timeout', '1000'),
+            ('busy_timeout', -1),
+            ('cache_size', True),
+            ('cache_size', 1.5),
+        ]:
+            with self.assertRaises(ImproperlyConfigured):
+                pragma_statements({pragma: value})
+
+
+class SpooledObjectStorageTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.objects = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.addCleanup(shutil.rmtree, self.objects)
+        self.storage = SpooledObjectStorage(location=self.media, base_url='/media/')
+        # Uploads are driven by hand instead of the background pool
+        patcher = mock.patch.object(uploader, 'enqueue')
+        self.enqueue = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def object_storage(self, public_url=''):
+        return override_settings(
+            MEDIA_ROOT=self.media,
+            OBJECT_STORAGE_BUCKET='media',
+            OBJECT_STORAGE_ENDPOINT_URL=f'file://{self.objects}',
+            OBJECT_STORAGE_PUBLIC_URL=public_url,
+            OBJECT_STORAGE_EVICT_LOCAL=True,
+            OBJECT_STORAGE_RETRY_DELAY=0,
+        )
+
+    def test_identical_content_is_stored_once(self):
+        with self.object_storage():
+            first = self.storage.save('plant_images/a.jpg', ContentFile(b'leaf'))
+            second = self.storage.save('plant_images/b.JPG', ContentFile(b'leaf'))
+            other = self.storage.save('plant_images/c.jpg', ContentFile(b'other leaf'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertRegex(first, r'^plant_images/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        self.assertEqual(StoredObject.objects.count(), 2)
+        self.assertEqual(self.enqueue.call_count, 2)
+
+    def test_upload_evicts_local_copy_behind_public_url(self):
+        with self.object_storage(public_url='https://cdn.example.com/media/'):
+            name = self.storage.save('plant_images/a.jpg', ContentFile(b'leaf'))
+            self.assertEqual(upload(name, location=self.media), StoredObject.UPLOADED)
+
+            self.assertFalse(os.path.exists(self.storage.path(name)))
+            self.assertTrue(os.path.exists(os.path.join(self.objects, 'media', name)))
+            self.assertTrue(self.storage.exists(name))
+            self.assertEqual(self.storage.url(name), f'https://cdn.example.com/media/{name}')
+
+            # Reading an evicted file fetches it back from the bucket
+            with self.storage.open(name) as f:
+                self.assertEqual(f.read(), b'leaf')
+            self.assertTrue(os.path.exists(self.storage.path(name)))
+
+    def test_upload_keeps_local_copy_without_public_url(self):
+        with self.object_storage():
+            name = self.storage.save('plant_images/a.jpg', ContentFile(b'leaf'))
+            upload(name, location=self.media)
+
+            self.assertTrue(os.path.exists(self.storage.path(name)))
+            self.assertEqual(self.storage.url(name), f'/media/{name}')
+
+    def test_saving_known_content_restores_evicted_copy(self):
+        with self.object_storage(public_url='https://cdn.example.com/media/'):
+            name = self.storage.save('plant_images/a.jpg', ContentFile(b'leaf'))
+            upload(name, location=self.media)
+            self.assertFalse(os.path.exists(self.storage.path(name)))
+
+            self.assertEqual(self.storage.save('plant_images/b.jpg', ContentFile(b'leaf')), name)
+            self.assertTrue(os.path.exists(self.storage.path(name)))
+            self.assertEqual(self.enqueue.call_count, 1)
+
+    def test_racing_identical_uploads_share_the_file(self):
+        with self.object_storage():
+            name = self.storage.save('plant_images/a.jpg', ContentFile(b'leaf'))
+            StoredObject.objects.all().delete()
+            calls = []
+
+            def available_name(name, max_length=None):
+                # FileSystemStorage used to retry this forever on the unchanged name
+                calls.append(name)
+                if len(calls) > 1:
+                    raise AssertionError("save() retried an existing content key")
+                return name
+
+            # The second upload passed the exists() check before the first wrote
+            with mock.patch.object(FileSystemStorage, 'exists', return_value=False), \
+                    mock.patch.object(self.storage, 'get_available_name', side_effect=available_name):
+                self.assertEqual(self.storage.save('plant_images/b.jpg', ContentFile(b'leaf')), name)
+
+        with open(self.storage.path(name), 'rb') as f:
+            self.assertEqual(f.read(), b'leaf')
+        self.assertEqual(os.listdir(os.path.dirname(self.storage.path(name))), [os.path.basename(name)])
+
+
+class FastSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Article.objects.create(
+            category='crops', title='Wheat sowing', image='article_images/wheat.jpg',
+            description='Seed rate and spacing.', total_mins=4, summary=None, popular_tags=None,
+        )
+        Article.objects.create(
+            category='pests', title='Aphids', image='article_images/aphids.jpg',
+            description='Scouting and sprays.', total_mins=6, summary='Spot them early.', popular_tags='pests,wheat',
+        )
+        scheme = dict(
+            organizationName='Agriculture Department', contactName='Helpdesk', contactEmail='help@agri.example.gov',
+            contactPhone='1800', description='d', eligibility='e', benefits='b', documents='d',
+            applicationProcess='a', tags='Irrigation',
+        )
+        Scheme.objects.create(title='Drip subsidy', provider='State', deadline='2030-03-31', **scheme)
+        Scheme.objects.create(title='Soil cards', provider='Centre', deadline=None, website='', **scheme)
+        PlantHealthReport.objects.create(
+            image='plant_images/a.jpg', health='Diseased', issue='Early blight', class_index=1,
+            plant='Tomato', confidence=91.25, model_version='v1', location='Anand',
+        )
+        PlantHealthReport.objects.create(image='plant_images/b.jpg', health='Healthy')
+
+    def request(self, query=''):
+        return Request(APIRequestFactory().get(f'/api/list/{query}'))
+
+    def assertSameOutput(self, serializer_class, queryset, request=None):
+        context = {'request': request} if request is not None else {}
+        expected = serializer_class(queryset, many=True, context=context).data
+        fast = FastSerializer(serializer_class, context, fields=requested_fields(request))
+        actual = fast.serialize(fast.rows(queryset))
+        self.assertEqual(actual, [dict(item) for item in expected])
+        # And byte-identical once rendered
+        self.assertEqual(FastJSONRenderer().render(actual), JSONRenderer().render(expected))
+        return actual
+
+    def test_articles(self):
+        data = self.assertSameOutput(ArticleSerializer, Article.objects.order_by('id'))
+        self.assertEqual(data[0]['image'], '/media/article_images/wheat.jpg')
+        self.assertIsNone(data[0]['summary'])
+        # With a request, file URLs are absolute
+        data = self.assertSameOutput(ArticleSerializer, Article.objects.order_by('id'), self.request())
+        self.assertEqual(data[0]['image'], 'http://testserver/media/article_images/wheat.jpg')
+
+    def test_scheme_summaries(self):
+        data = self.assertSameOutput(SchemeSummarySerializer, Scheme.objects.order_by('id'))
+        self.assertEqual(data[0]['deadline'], '2030-03-31')
+        self.assertIsNone(data[1]['deadline'])
+
+    def test_plant_health_reports(self):
+        data = self.assertSameOutput(PlantHealthReportSerializer, PlantHealthReport.objects.order_by('id'))
+        self.assertIsInstance(data[0]['created_at'], str)
+        self.assertIsNone(data[1]['confidence'])
+
+    def test_sparse_fieldsets(self):
+        request = self.request('?fields=id,title,image,nonsense')
+        data = self.assertSameOutput(ArticleSerializer, Article.objects.order_by('id'), request)
+        self.assertEqual(set(data[0]), {'id', 'title', 'image'})
+        data = self.assertSameOutput(
+            PlantHealthReportSerializer, PlantHealthReport.objects.order_by('id'), self.request('?fields=created_at'),
+        )
+        self.assertEqual(set(data[0]), {'created_at'})
+        # No known names: every field
+        data = self.assertSameOutput(SchemeSummarySerializer, Scheme.objects.order_by('id'), self.request('?fields=x'))
+        self.assertIn('deadline', data[0])
+
+
+class MediaGCTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.objects = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        self.addCleanup(shutil.rmtree, self.objects)
+        overrides = override_settings(
+            MEDIA_ROOT=self.media,
+            OBJECT_STORAGE_BUCKET='media',
+            OBJECT_STORAGE_ENDPOINT_URL=f'file://{self.objects}',
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def media_file(self, name, age_hours=48):
+        path = os.path.join(self.media, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(name.encode())
+        then = time.time() - age_hours * 3600
+        os.utime(path, (then, then))
+        return path
+
+    def bucket_object(self, key, age_hours=48):
+        path = os.path.join(self.objects, 'media', key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(key.encode())
+        StoredObject.objects.create(key=key, sha256='0' * 64, size=len(key), state=StoredObject.UPLOADED)
+        StoredObject.objects.filter(key=key).update(created_at=timezone.now() - timedelta(hours=age_hours))
+        return path
+
+    def gc(self, **options):
+        out = StringIO()
+        call_command('media_gc', stdout=out, **options)
+        return out.getvalue()
+
+    def test_only_old_unreferenced_files_are_removed(self):
+        PlantHealthReport.objects.create(image='plant_images/kept.jpg', health='Healthy')
+        kept = self.media_file('plant_images/kept.jpg')
+        young = self.media_file('plant_images/upload_in_progress.jpg', age_hours=1)
+        orphan = self.media_file('plant_images/orphan.jpg')
+
+        output = self.gc()
+
+        self.assertTrue(os.path.exists(kept))
+        self.assertTrue(os.path.exists(young))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertIn('Deleted 1 orphaned files', output)
+
+    def test_referenced_stored_objects_survive(self):
+        # Evicted: only the bucket copy and the StoredObject row exist
+        PlantHealthReport.objects.create(image='plant_images/ab/evicted.jpg', health='Healthy')
+        referenced = self.bucket_object('plant_images/ab/evicted.jpg')
+        unreferenced = self.bucket_object('plant_images/cd/gone.jpg')
+        young = self.bucket_object('plant_images/ef/new.jpg', age_hours=1)
+
+        self.gc()
+
+        self.assertEqual(
+            set(StoredObject.objects.values_list('key', flat=True)),
+            {'plant_images/ab/evicted.jpg', 'plant_images/ef/new.jpg'},
+        )
+        self.assertTrue(os.path.exists(referenced))
+        self.assertTrue(os.path.exists(young))
+        self.assertFalse(os.path.exists(unreferenced))
+
+    def test_bloom_filter_keeps_every_referenced_file(self):
+        names = [f'plant_images/{i:03}.jpg' for i in range(200)]
+        PlantHealthReport.objects.bulk_create([PlantHealthReport(image=name, health='Healthy') for name in names])
+        paths = [self.media_file(name) for name in names]
+
+        self.gc(bloom=True)
+
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+    def test_dry_run_changes_nothing(self):
+        orphan = self.media_file('plant_images/orphan.jpg')
+        unreferenced = self.bucket_object('plant_images/cd/gone.jpg')
+
+        output = self.gc(dry_run=True)
+
+        self.assertTrue(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(unreferenced))
+        self.assertTrue(StoredObject.objects.exists())
+        self.assertIn('orphan: plant_images/orphan.jpg', output)
+        self.assertIn('unreferenced object: plant_images/cd/gone.jpg', output)
+
+    def test_quarantine_moves_orphans_and_keeps_bucket_copies(self):
+        quarantine = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, quarantine)
+        orphan = self.media_file('plant_images/orphan.jpg')
+        unreferenced = self.bucket_object('plant_images/cd/gone.jpg')
+
+        self.gc(quarantine=quarantine)
+
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(os.path.join(quarantine, 'plant_images/orphan.jpg')))
+        self.assertTrue(os.path.exists(unreferenced))
+        self.assertTrue(StoredObject.objects.exists())
+
+    def test_reports_referenced_duplicates(self):
+        for name in ('a', 'b'):
+            PlantHealthReport.objects.create(image=f'plant_images/{name}.jpg', health='Healthy')
+            with open(self.media_file(f'plant_images/{name}.jpg'), 'wb') as f:
+                f.write(b'same bytes')
+
+        output = self.gc()
+
+        self.assertIn('1 sets of duplicate referenced files', output)
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class ExportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.partner = CustomUser.objects.create_user('bank', password='pw', individual_type='Bank')
+        Article.objects.bulk_create([
+            Article(
+                category='crops', title=f'Article {i}', image=f'article_images/{i}.jpg',
+                description='Body, with a comma', total_mins=i,
+            )
+            for i in range(5)
+        ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.partner)
+
+    def body(self, response):
+        data = b''.join(response.streaming_content)
+        if response.get('Content-Encoding') == 'gzip':
+            data = gzip.decompress(data)
+        return data.decode()
+
+    def test_ndjson_streams_every_row(self):
+        response = self.client.get('/api/articles/export.ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.body(response).splitlines()]
+        self.assertEqual([row['title'] for row in rows], [f'Article {i}' for i in range(5)])
+        self.assertEqual(rows[0]['image'], 'http://testserver/media/article_images/0.jpg')
+
+    def test_csv_header_follows_serializer_field_order(self):
+        response = self.client.get('/api/articles/export.csv')
+        rows = list(csv.reader(self.body(response).splitlines()))
+        self.assertEqual(rows[0], list(ArticleSerializer().fields))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][rows[0].index('description')], 'Body, with a comma')
+
+    def test_sparse_fieldset(self):
+        response = self.client.get('/api/articles/export.csv?fields=title,id')
+        rows = list(csv.reader(self.body(response).splitlines()))
+        self.assertEqual(rows[0], ['id', 'title'])
+
+    def test_gzip_round_trip(self):
+        plain = self.body(self.client.get('/api/articles/export.ndjson'))
+        response = self.client.get('/api/articles/export.ndjson', HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(self.body(response), plain)
+
+    def test_gzip_refused_with_zero_quality(self):
+        response = self.client.get('/api/articles/export.ndjson', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_unknown_format_is_404(self):
+        self.assertEqual(self.client.get('/api/articles/export.xlsx').status_code, 404)
+
+    def test_farmers_and_anonymous_users_are_refused(self):
+        farmer = CustomUser.objects.create_user('farmer', password='pw', individual_type='Farmer')
+        self.client.force_authenticate(farmer)
+        self.assertEqual(self.client.get('/api/articles/export.csv').status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/articles/export.csv').status_code, 401)
+
+
+class NegotiationTests(SimpleTestCase):
+    def negotiate(self, accept, encodings=None):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        with mock.patch.dict('core.compression.COMPRESSORS', {'br': bytes, 'zstd': bytes}):
+            return negotiate(request, encodings)
+
+    def test_server_preference_breaks_ties(self):
+        self.assertEqual(self.negotiate('gzip, br, zstd'), 'zstd')
+        self.assertEqual(self.negotiate('gzip, br'), 'br')
+
+    def test_quality_values(self):
+        self.assertEqual(self.negotiate('br;q=0.5, gzip'), 'gzip')
+        self.assertEqual(self.negotiate('*;q=0.2, br;q=0'), 'zstd')
+        self.assertIsNone(self.negotiate('gzip;q=0, identity'))
+        self.assertIsNone(self.negotiate(''))
+
+    def test_encodings_limit_the_choice(self):
+        self.assertEqual(self.negotiate('zstd, gzip;q=0.1', ('gzip',)), 'gzip')
+        self.assertIsNone(self.negotiate('zstd', ('gzip',)))
+
+    def test_unavailable_encodings_are_skipped(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='zstd, br, gzip;q=0.5')
+        with mock.patch.dict('core.compression.COMPRESSORS', {'gzip': gzip.compress}, clear=True):
+            self.assertEqual(negotiate(request), 'gzip')
+
+
+@override_settings(COMPRESSION_MIN_BYTES=512)
+class CompressTests(SimpleTestCase):
+    def test_small_and_binary_responses_are_left_alone(self):
+        small = compress(HttpResponse(b'{}' * 10, content_type='application/json'), 'gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+        image = compress(HttpResponse(b'x' * 2048, content_type='image/jpeg'), 'gzip')
+        self.assertFalse(image.has_header('Content-Encoding'))
+
+    def test_large_text_is_compressed_and_etag_weakened(self):
+        body = b'{"title": "Soil health"}' * 100
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = '"abc"'
+        compress(response, 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertEqual(gzip.decompress(response.content), body)
+
+
+class PrecompressedCacheTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Article.objects.bulk_create([
+            Article(category='crops', title=f'Article {i}', image=f'article_images/{i}.jpg',
+                    description='Rotate crops to keep the soil healthy. ' * 10, total_mins=5)
+            for i in range(5)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, accept='gzip'):
+        return self.client.get('/api/articles/', HTTP_ACCEPT_ENCODING=accept)
+
+    def titles(self, response):
+        content = response.content
+        if response.get('Content-Encoding') == 'gzip':
+            content = gzip.decompress(content)
+        return [article['title'] for article in json.loads(content)]
+
+    def test_variants_per_encoding_and_vary_header(self):
+        compressed, plain = self.get('gzip'), self.get('gzip;q=0')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(self.titles(compressed), self.titles(plain))
+        for response in (compressed, plain, self.get('gzip')):
+            self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_cached_variant_until_invalidated(self):
+        self.get()
+        # queryset.update() sends no signals, like an edit in another worker
+        # whose stamp bump this worker's LocMem cache never sees
+        Article.objects.update(title='Renamed')
+        with self.assertNumQueries(0):
+            stale = self.get()
+        self.assertNotIn('Renamed', self.titles(stale))
+
+        invalidate_variants('articles')
+        self.assertEqual(set(self.titles(self.get())), {'Renamed'})
+
+    def test_saving_an_article_invalidates(self):
+        self.get()
+        article = Article.objects.first()
+        article.title = 'Edited'
+        article.save()
+        self.assertIn('Edited', self.titles(self.get()))
+
+    @override_settings(COMPRESSION_CACHE_SECONDS=1)
+    def test_staleness_is_bounded_by_cache_seconds(self):
+        self.get()
+        Article.objects.update(title='Renamed')
+        with mock.patch('time.time', return_value=time.time() + 2):
+            self.assertEqual(set(self.titles(self.get())), {'Renamed'})
+
+    def test_deploy_check_warns_about_per_process_cache(self):
+        self.assertEqual([w.id for w in check_shared_cache(None)], ['core.W001'])
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user('ops', password='pw', is_staff=True)
+        Article.objects.create(category='crops', title='Mulching', image='article_images/m.jpg',
+                               description='Keep the soil moist.', total_mins=3)
+
+    def requests_counted(self, endpoint, status):
+        return metrics.REQUESTS.values.get((endpoint, 'GET', str(status)), 0)
+
+    def test_middleware_records_and_logs_each_request(self):
+        before = self.requests_counted('api/articles/<int:id>/', 200)
+        with self.assertLogs('core.requests', level='INFO') as logs:
+            self.client.get(f'/api/articles/{Article.objects.get().pk}/')
+        self.assertEqual(self.requests_counted('api/articles/<int:id>/', 200), before + 1)
+
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(entry['endpoint'], 'api/articles/<int:id>/')
+        self.assertEqual(entry['status'], 200)
+        self.assertGreaterEqual(entry['db_queries'], 1)
+        self.assertIn('serialize', entry['phases_ms'])
+        self.assertNotIn('queries', entry)
+
+    def test_unmatched_paths_share_one_endpoint_label(self):
+        before = self.requests_counted('unmatched', 404)
+        self.client.get('/no/such/page/')
+        self.assertEqual(self.requests_counted('unmatched', 404), before + 1)
+
+    @override_settings(SLOW_REQUEST_MS=0, SLOW_REQUEST_SAMPLE_RATE=1.0)
+    def test_slow_requests_are_logged_with_their_queries(self):
+        with self.assertLogs('core.slow_requests', level='WARNING') as logs:
+            self.client.get('/api/articles/')
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertTrue(any('article_article' in query['sql'] for query in entry['queries']))
+
+    def test_metrics_are_staff_only_without_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.force_login(self.staff)
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE http_requests_total counter', response.content.decode())
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+
+
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user('ops', password='pw', is_staff=True)
+        cls.farmer = CustomUser.objects.create_user('farmer', password='pw')
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        overrides = self.settings(PROFILE_DIR=directory, PROFILE_SAMPLE_RATE=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.store = ProfileStore()
+
+    def profiles(self):
+        return [p for profiles in self.store.slowest_by_endpoint(50).values() for p in profiles]
+
+    def test_staff_trigger_by_header_or_query_param(self):
+        self.client.force_login(self.staff)
+        self.client.get('/api/articles/')
+        self.assertEqual(self.profiles(), [])
+        self.client.get('/api/articles/', HTTP_X_PROFILE='1')
+        self.client.get('/api/scheme/', {'profile': '1'})
+        self.assertEqual(sorted(p['endpoint'] for p in self.profiles()), ['api/articles/', 'api/scheme/'])
+
+        profile = self.store.get(self.profiles()[0]['id'])
+        self.assertTrue(profile['call_tree'])
+        self.assertEqual(profile['status'], 200)
+
+    def test_staff_token_can_trigger(self):
+        token = Token.objects.create(user=self.staff)
+        self.client.get('/api/articles/', HTTP_X_PROFILE='1', HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(len(self.profiles()), 1)
+
+    def test_others_cannot_trigger(self):
+        self.client.get('/api/articles/', HTTP_X_PROFILE='1')
+        token = Token.objects.create(user=self.farmer)
+        self.client.get('/api/articles/', {'profile': '1'}, HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.force_login(self.farmer)
+        self.client.get('/api/articles/', HTTP_X_PROFILE='1')
+        self.assertEqual(self.profiles(), [])
+
+    def test_sample_rate(self):
+        with override_settings(PROFILE_SAMPLE_RATE=1.0):
+            self.client.get('/api/articles/')
+        self.assertEqual(len(self.profiles()), 1)
+
+    def test_store_keeps_newest_profiles(self):
+        store = ProfileStore(max_files=3)
+        ids = [store.save({'endpoint': 'api/articles/', 'duration_ms': i}) for i in range(5)]
+        self.assertEqual([os.path.basename(path) for path in store.paths()], [f'{i}.json' for i in ids[2:]])
+        self.assertIsNone(store.get(ids[0]))
+        self.assertIsNone(store.get('../secrets'))
+        self.assertEqual([p['duration_ms'] for p in store.slowest_by_endpoint(2)['api/articles/']], [4, 3])
+
+    def test_admin_pages_are_staff_only(self):
+        profile_id = self.store.save({
+            'endpoint': 'api/articles/', 'method': 'GET', 'path': '/api/articles/', 'status': 200,
+            'duration_ms': 12.5, 'db_queries': 1, 'db_ms': 0.4, 'phases_ms': {'serialize': 3.0},
+            'profiler': 'cProfile', 'call_tree': 'render_prometheus', 'tf_trace_dir': None,
+        })
+        self.client.force_login(self.farmer)
+        self.assertEqual(self.client.get('/admin/profiles/').status_code, 302)
+
+        self.client.force_login(self.staff)
+        listing = self.client.get('/admin/profiles/')
+        self.assertContains(listing, f'/admin/profiles/{profile_id}/')
+        self.assertContains(self.client.get(f'/admin/profiles/{profile_id}/'), 'render_prometheus')
+        self.assertEqual(self.client.get('/admin/profiles/0-missing/').status_code, 404)
+
+
+def stats(p95_ms, rps, **extra):
+    return {'p50_ms': p95_ms / 2, 'p95_ms': p95_ms, 'p99_ms': p95_ms, 'rps': rps, **extra}
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+    baseline = {
+        'micro': {'serialize_articles': stats(10, 100)},
+        'serializers': {'articles_1000_fast': stats(20, 50)},
+        'load': {'GET /api/articles/': stats(30, 200, errors=0)},
+    }
+
+    def test_within_tolerance(self):
+        results = {
+            'micro': {'serialize_articles': stats(11.9, 85)},
+            'serializers': {'articles_1000_fast': stats(20, 50)},
+            'load': {'GET /api/articles/': stats(35, 170, errors=0)},
+        }
+        self.assertEqual(compare(results, self.baseline, 0.2), [])
+
+    def test_latency_throughput_and_errors_in_every_section(self):
+        results = {
+            'micro': {'serialize_articles': stats(10, 70)},
+            'serializers': {'articles_1000_fast': stats(30, 50)},
+            'load': {'GET /api/articles/': stats(30, 200, errors=3)},
+        }
+        self.assertEqual(compare(results, self.baseline, 0.2), [
+            'micro/serialize_articles: 70 rps vs baseline 100 rps',
+            'serializers/articles_1000_fast: p95 30ms vs baseline 20ms',
+            'load/GET /api/articles/: 3 errors vs baseline 0',
+        ])
+
+    def test_skipped_entries_are_not_compared(self):
+        self.assertEqual(compare({'micro': {}}, self.baseline, 0.2), [])
+
+
+class BenchmarkSmokeTests(TransactionTestCase):
+    """
+    The whole suite at a tiny scale, against a baseline saved by the first run.
+    """
+    def test_seed_run_and_compare(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        options = {
+            'scale': 0.0002, 'repeat': 1, 'workers': 2, 'requests': 2, 'serializer_rows': [5],
+            'baseline': os.path.join(directory, 'baseline.json'), 'stdout': StringIO(), 'stderr': StringIO(),
+        }
+        call_command('benchmark', seed=True, save_baseline=True, **options)
+        with open(options['baseline']) as f:
+            baseline = json.load(f)
+        self.assertEqual(set(baseline), {'micro', 'serializers', 'load'})
+        self.assertIn('articles_5_fast', baseline['serializers'])
+        self.assertTrue(all(entry['errors'] == 0 for entry in baseline['load'].values()), baseline['load'])
+
+        out = StringIO()
+        call_command('benchmark', skip_micro=True, tolerance=1000, **{**options, 'stdout': out})
+        self.assertIn('No regressions against the baseline.', out.getvalue())
@@ -18,13 +18,24 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from core.views import (
+    metrics_view, ProfileListAPIView, ProfileDetailAPIView, profile_list_admin_view, profile_detail_admin_view,
+)
 
 urlpatterns = [
+    path('admin/profiles/', admin.site.admin_view(profile_list_admin_view), name='admin-profile-list'),
+    path(
+        'admin/profiles/<str:profile_id>/', admin.site.admin_view(profile_detail_admin_view),
+        name='admin-profile-detail',
+    ),
     path('admin/', admin.site.urls),
     path('api/', include('accounts.urls')),
     path('api/', include('article.urls')),
     path('api/', include('ImageUpload.urls')),
     path('api/', include('scheme.urls')),
+    path('metrics', metrics_view, name='metrics'),
+    path('api/profiles/', ProfileListAPIView.as_view(), name='profile-list'),
+    path('api/profiles/<str:profile_id>/', ProfileDetailAPIView.as_view(), name='profile-detail'),
     
 ]
 
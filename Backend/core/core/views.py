@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib import admin
+from django.http import HttpResponse, HttpResponseForbidden, Http404
+from django.template.response import TemplateResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .metrics import render_prometheus
+from .profiling import store
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint, for staff sessions and for scrapers sending
+    METRICS_TOKEN as "Authorization: Bearer <token>". Without a token
+    configured only staff can read it.
+    """
+    token = settings.METRICS_TOKEN
+    authorized = bool(token) and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not (authorized or request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ProfileListAPIView(APIView):
+    """
+    Slowest recent stored profiles per endpoint (staff only).
+    """
+    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', 5))
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, 50))
+        return Response(store.slowest_by_endpoint(limit))
+
+
+class ProfileDetailAPIView(APIView):
+    """
+    One stored profile including its call tree (staff only).
+    """
+    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id):
+        profile = store.get(profile_id)
+        if profile is None:
+            raise Http404
+        return Response(profile)
+
+
+def with_created(profile):
+    profile['created'] = datetime.fromtimestamp(profile['created_at'], tz=timezone.utc)
+    return profile
+
+
+def profile_list_admin_view(request):
+    """
+    Admin page listing the slowest stored profiles per endpoint.
+    """
+    endpoints = {
+        endpoint: [with_created(profile) for profile in profiles]
+        for endpoint, profiles in store.slowest_by_endpoint(10).items()
+    }
+    context = {**admin.site.each_context(request), 'title': 'Request profiles', 'endpoints': endpoints}
+    return TemplateResponse(request, 'admin/profiles/list.html', context)
+
+
+def profile_detail_admin_view(request, profile_id):
+    """
+    Admin page with one stored profile and its call tree.
+    """
+    profile = store.get(profile_id)
+    if profile is None:
+        raise Http404
+    context = {
+        **admin.site.each_context(request), 'title': f"{profile['method']} {profile['path']}",
+        'profile': with_created(profile),
+    }
+    return TemplateResponse(request, 'admin/profiles/detail.html', context)
@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Load the plant disease model before the first upload instead of during it
+if os.environ.get('PRELOAD_PLANT_MODEL', '1') == '1':
+    import logging
+    from ImageUpload.utils.predict import get_model
+
+    try:
+        get_model()
+    except Exception:
+        logging.getLogger(__name__).exception("Could not preload the plant disease model")
@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import Scheme
+from .models import Scheme, ArchivedScheme
 
 admin.site.register(Scheme)
+admin.site.register(ArchivedScheme)
 
 # Register your models here.
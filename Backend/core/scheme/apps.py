@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class SchemeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'scheme'
+
+    def ready(self):
+        from functools import partial
+        from django.db.models.signals import post_delete, post_save
+        from core.compression import invalidate_variants
+        from .models import Scheme
+
+        invalidate = partial(invalidate_variants, 'schemes')
+        post_save.connect(invalidate, sender=Scheme, weak=False, dispatch_uid='scheme_variants_saved')
+        post_delete.connect(invalidate, sender=Scheme, weak=False, dispatch_uid='scheme_variants_deleted')
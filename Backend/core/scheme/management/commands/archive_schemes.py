@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from scheme.models import Scheme, ArchivedScheme, SchemeBase
+
+ARCHIVED_FIELDS = [f.name for f in SchemeBase._meta.fields if f.name != 'id']
+
+
+class Command(BaseCommand):
+    help = "Moves schemes whose deadline passed more than --grace-days ago into the archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-days', type=int, default=30)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.localdate() - timedelta(days=options['grace_days'])
+        expired = Scheme.objects.filter(deadline__lt=cutoff).order_by('id')
+
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} schemes with a deadline before {cutoff} would be archived.")
+            return
+
+        archived = 0
+        while True:
+            with transaction.atomic():
+                batch = list(expired[:options['batch_size']])
+                if not batch:
+                    break
+                ArchivedScheme.objects.bulk_create(
+                    [ArchivedScheme(id=s.id, **{f: getattr(s, f) for f in ARCHIVED_FIELDS}) for s in batch],
+                    ignore_conflicts=True,
+                )
+                Scheme.objects.filter(id__in=[s.id for s in batch]).delete()
+            archived += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} schemes with a deadline before {cutoff}."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheme', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scheme',
+            name='deadline',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_scheme_tags(apps, schema_editor):
+    Scheme = apps.get_model('scheme', 'Scheme')
+    SchemeTag = apps.get_model('scheme', 'SchemeTag')
+    tags = []
+    for scheme_id, raw in Scheme.objects.values_list('id', 'tags').iterator():
+        names = dict.fromkeys(t.strip().lower() for t in (raw or '').split(',') if t.strip())
+        tags.extend(SchemeTag(scheme_id=scheme_id, name=name[:50]) for name in names)
+    SchemeTag.objects.bulk_create(tags, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheme', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedScheme',
+            fields=[
+                ('title', models.CharField(max_length=200)),
+                ('provider', models.CharField(db_index=True, max_length=100)),
+                ('organizationName', models.CharField(max_length=150)),
+                ('contactName', models.CharField(max_length=100)),
+                ('contactEmail', models.EmailField(max_length=254)),
+                ('contactPhone', models.CharField(max_length=20)),
+                ('deadline', models.DateField(blank=True, db_index=True, null=True)),
+                ('description', models.TextField()),
+                ('eligibility', models.TextField()),
+                ('benefits', models.TextField()),
+                ('documents', models.TextField(help_text='List required documents')),
+                ('applicationProcess', models.TextField()),
+                ('website', models.URLField(blank=True)),
+                ('tags', models.CharField(help_text='Comma-separated tags', max_length=255)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AlterField(
+            model_name='scheme',
+            name='provider',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.CreateModel(
+            name='SchemeTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('scheme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_index', to='scheme.scheme')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name', 'scheme'], name='schemetag_name_scheme_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_scheme_tags, migrations.RunPython.noop),
+    ]
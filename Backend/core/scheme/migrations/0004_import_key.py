@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheme', '0003_scheme_tags_and_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheme',
+            name='import_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
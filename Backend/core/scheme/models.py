@@ -1,14 +1,15 @@
 from django.db import models
 from django.utils.dateparse import parse_date
 
-class Scheme(models.Model):
+
+class SchemeBase(models.Model):
     title = models.CharField(max_length=200)
-    provider = models.CharField(max_length=100)
+    provider = models.CharField(max_length=100, db_index=True)
     organizationName = models.CharField(max_length=150)
     contactName = models.CharField(max_length=100)
     contactEmail = models.EmailField()
     contactPhone = models.CharField(max_length=20)
-    deadline = models.DateField(null=True, blank=True)
+    deadline = models.DateField(null=True, blank=True, db_index=True)
     description = models.TextField()
     eligibility = models.TextField()
     benefits = models.TextField()
@@ -17,8 +18,63 @@ class Scheme(models.Model):
     website = models.URLField(blank=True)
     tags = models.CharField(max_length=255, help_text="Comma-separated tags")
 
+    class Meta:
+        abstract = True
+
     def __str__(self):
         return self.title
 
+    def tag_list(self):
+        """
+        The comma-separated tags, normalised and de-duplicated.
+        """
+        return list(dict.fromkeys(t.strip().lower() for t in (self.tags or '').split(',') if t.strip()))
+
+
+class Scheme(SchemeBase):
+    # Set by bulk imports (core.ingest) to upsert on SCHEME_NATURAL_KEY
+    import_key = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.sync_tags()
+
+    def sync_tags(self):
+        """
+        Mirrors the comma-separated tags into SchemeTag so tag filters can
+        use an index instead of a LIKE over every row.
+        """
+        Scheme.sync_tags_bulk([self])
+
+    @staticmethod
+    def sync_tags_bulk(schemes):
+        SchemeTag.objects.filter(scheme__in=[s.pk for s in schemes]).delete()
+        SchemeTag.objects.bulk_create([
+            SchemeTag(scheme_id=s.pk, name=name[:50]) for s in schemes for name in s.tag_list()
+        ])
+
+
+class SchemeTag(models.Model):
+    scheme = models.ForeignKey(Scheme, on_delete=models.CASCADE, related_name='tag_index')
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', 'scheme'], name='schemetag_name_scheme_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ArchivedScheme(SchemeBase):
+    """
+    Schemes whose deadline has passed, moved out of the hot table by the
+    archive_schemes command. The primary key is the original Scheme id so
+    existing links to /api/scheme/<pk>/ keep working.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
     
 # Create your models here.
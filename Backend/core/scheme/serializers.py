@@ -1,7 +1,29 @@
 from rest_framework import serializers
-from .models import Scheme
+from .models import Scheme, ArchivedScheme
+from core.fast_serializers import SparseFieldsetMixin
 
-class SchemeSerializer(serializers.ModelSerializer):
+# Columns needed for the list view (whose cards show the description); the
+# other long text fields are only served by the detail endpoint.
+SCHEME_SUMMARY_FIELDS = ('id', 'title', 'provider', 'organizationName', 'deadline', 'website', 'tags', 'description')
+
+
+class SchemeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Scheme
+        exclude = ['import_key']
+
+
+# Natural key used to upsert bulk-imported schemes
+SCHEME_NATURAL_KEY = ('title', 'provider')
+
+
+class SchemeSummarySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Scheme
+        fields = SCHEME_SUMMARY_FIELDS
+
+
+class ArchivedSchemeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedScheme
         fields = '__all__'
@@ -1,3 +1,159 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from accounts.models import CustomUser
+
+from .models import ArchivedScheme, Scheme
+
+
+def scheme_record(**overrides):
+    record = {
+        'title': 'Drip Irrigation Subsidy',
+        'provider': 'State Agriculture Department',
+        'organizationName': 'Department of Agriculture',
+        'contactName': 'Helpdesk',
+        'contactEmail': 'help@agri.example.gov',
+        'contactPhone': '1800-000-000',
+        'deadline': '2030-03-31',
+        'description': 'Subsidy on drip irrigation kits.',
+        'eligibility': 'Small and marginal farmers.',
+        'benefits': '50% of the kit cost.',
+        'documents': 'Land record, ID proof',
+        'applicationProcess': 'Apply at the block office.',
+        'tags': 'Irrigation, Subsidy',
+    }
+    record.update(overrides)
+    return record
+
+
+class SchemeBulkIngestTests(APITestCase):
+    def setUp(self):
+        self.partner = CustomUser.objects.create_user('partner', password='pw', individual_type='Government')
+        self.client.force_authenticate(self.partner)
+
+    def test_rows_are_upserted_on_title_and_provider(self):
+        response = self.client.post('/api/scheme/bulk/', [
+            scheme_record(),
+            scheme_record(provider='NABARD'),
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        existing = Scheme.objects.get(provider='NABARD')
+
+        response = self.client.post('/api/scheme/bulk/', [
+            scheme_record(provider='NABARD', benefits='60% of the kit cost.', tags='Irrigation, Water'),
+            scheme_record(title='Soil Health Card'),
+        ], format='json')
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+        self.assertEqual(Scheme.objects.count(), 3)
+
+        updated = Scheme.objects.get(pk=existing.pk)
+        self.assertEqual(updated.benefits, '60% of the kit cost.')
+        # bulk writes skip save(), the tag index is synced by the ingestor
+        self.assertEqual(sorted(updated.tag_index.values_list('name', flat=True)), ['irrigation', 'water'])
+
+    def test_ndjson_body_with_charset_is_streamed(self):
+        body = '\n'.join([
+            json.dumps(scheme_record(benefits='first')),
+            '{not json',
+            json.dumps(scheme_record(benefits='second')),
+        ])
+        response = self.client.post(
+            '/api/scheme/bulk/', body, content_type='application/x-ndjson; charset=utf-8',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['error_count'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+        # Later rows win when a key repeats within a chunk
+        self.assertEqual(Scheme.objects.get().benefits, 'second')
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        response = self.client.post('/api/scheme/bulk/', [
+            scheme_record(contactEmail='not-an-email'),
+            scheme_record(title='Soil Health Card'),
+        ], format='json')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 1)
+        self.assertIn('contactEmail', response.data['errors'][0]['errors'])
+
+    def test_farmers_cannot_ingest(self):
+        farmer = CustomUser.objects.create_user('farmer', password='pw', individual_type='Farmer')
+        self.client.force_authenticate(farmer)
+        response = self.client.post('/api/scheme/bulk/', [scheme_record()], format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class SchemeListTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        cls.closed = Scheme.objects.create(**scheme_record(
+            title='Closed', provider='government', deadline=today - timedelta(days=1), tags='Subsidy',
+        ))
+        cls.open = Scheme.objects.create(**scheme_record(
+            title='Open', provider='bank', deadline=today, tags='Credit, Subsidy',
+        ))
+        cls.rolling = Scheme.objects.create(**scheme_record(
+            title='Rolling', provider='corporate', deadline=None, tags='Irrigation',
+        ))
+
+    def setUp(self):
+        cache.clear()
+
+    def titles(self, **params):
+        response = self.client.get('/api/scheme/', params)
+        self.assertEqual(response.status_code, 200)
+        return [scheme['title'] for scheme in response.json()['results']]
+
+    def test_summaries_carry_the_description_but_not_the_details(self):
+        scheme = self.client.get('/api/scheme/').json()['results'][0]
+        self.assertEqual(scheme['description'], 'Subsidy on drip irrigation kits.')
+        self.assertNotIn('eligibility', scheme)
+
+    def test_open_filter(self):
+        self.assertEqual(self.titles(open='1'), ['Rolling', 'Open'])
+        self.assertEqual(self.titles(), ['Rolling', 'Open', 'Closed'])
+
+    def test_provider_filter(self):
+        self.assertEqual(self.titles(provider='bank'), ['Open'])
+        self.assertEqual(self.titles(provider='bank,government'), ['Open', 'Closed'])
+
+    def test_tag_filter(self):
+        self.assertEqual(self.titles(tag=' Subsidy'), ['Open', 'Closed'])
+        self.assertEqual(self.titles(tag='credit,irrigation'), ['Rolling', 'Open'])
+        self.assertEqual(self.titles(tag='subsidy,credit'), ['Open', 'Closed'])
+        self.assertEqual(self.titles(tag='subsidy', provider='government', open='1'), [])
+
+    def test_page_size_is_clamped(self):
+        Scheme.objects.bulk_create([Scheme(**scheme_record(title=f'Scheme {i}')) for i in range(120)])
+        self.assertEqual(len(self.titles()), 20)
+        self.assertEqual(len(self.titles(page_size=2)), 2)
+        response = self.client.get('/api/scheme/', {'page_size': 500})
+        self.assertEqual(len(response.json()['results']), 100)
+        self.assertEqual(response.json()['count'], 123)
+        self.assertIn('page=2', response.json()['next'])
+
+
+class SchemeDetailTests(APITestCase):
+    def test_live_scheme(self):
+        scheme = Scheme.objects.create(**scheme_record())
+        response = self.client.get(f'/api/scheme/{scheme.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['eligibility'], 'Small and marginal farmers.')
+
+    def test_archived_scheme_keeps_its_id(self):
+        record = scheme_record(title='Expired')
+        ArchivedScheme.objects.create(id=4242, **record)
+        response = self.client.get('/api/scheme/4242/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], 4242)
+        self.assertEqual(response.data['title'], 'Expired')
+        self.assertIn('archived_at', response.data)
+
+    def test_unknown_scheme_is_404(self):
+        self.assertEqual(self.client.get('/api/scheme/999/').status_code, 404)
@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import SchemeAPIView, SchemeDetailAPIView, DashboardStatsView
+from .views import SchemeAPIView, SchemeDetailAPIView, DashboardStatsView, SchemeBulkAPIView, SchemeExportAPIView
 
 urlpatterns = [
     path('scheme/', SchemeAPIView.as_view(), name='scheme-list-create'),
+    path('scheme/bulk/', SchemeBulkAPIView.as_view(), name='scheme-bulk'),
+    path('scheme/export.<str:fmt>', SchemeExportAPIView.as_view(), name='scheme-export'),
     path('scheme/<int:pk>/', SchemeDetailAPIView.as_view(), name='scheme-detail'),
     path('dashboard/stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
 ]
\ No newline at end of file
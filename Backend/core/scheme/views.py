@@ -6,6 +6,17 @@ from scheme.models import Scheme
 from article.models import Article
 
 class DashboardStatsView(APIView):
+    @staticmethod
+    def get_audit_querysets():
+        """
+        The querysets behind the counts, for the audit_queries command.
+        """
+        return [
+            CustomUser.objects.filter(individual_type='Farmer'),
+            Scheme.objects.all(),
+            Article.objects.all(),
+        ]
+
     def get(self, request):
         try:
             # Get counts
@@ -23,15 +34,96 @@ class DashboardStatsView(APIView):
             return Response({
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-from .models import Scheme
-from .serializers import SchemeSerializer
+from .models import Scheme, ArchivedScheme, SchemeTag
+from .serializers import (
+    SchemeSerializer, SchemeSummarySerializer, ArchivedSchemeSerializer, SCHEME_SUMMARY_FIELDS, SCHEME_NATURAL_KEY,
+)
+from accounts.permissions import IsPartnerOrStaff
+from core.ingest import BulkIngestor, iter_request
+from core.export import ExportAPIView
+from core.compression import PrecompressedCacheMixin, invalidate_variants
+from core.fast_serializers import FastSerializer, requested_fields
+from core.metrics import phase
+from core.query_audit import KnownScan
 from django.http import Http404
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.pagination import PageNumberPagination
+
+
+class SchemePagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class SchemeAPIView(PrecompressedCacheMixin, APIView):
+    """
+    Paginated scheme summaries. Supports ?open=1 (deadline today or later, or
+    no deadline), ?provider=<name> and ?tag=<tag>; provider and tag also
+    take comma-separated lists (any of them matches).
+    """
+    variant_group = 'schemes'
+
+    def get_queryset(self):
+        return Scheme.objects.only(*SCHEME_SUMMARY_FIELDS).order_by('-id')
+
+    @classmethod
+    def get_audit_querysets(cls):
+        """
+        One page of each filter combination, for the audit_queries command.
+        """
+        page = SchemePagination.page_size
+        queryset = cls().get_queryset()
+        return [
+            queryset[:page],
+            # Most schemes are open, so walking the primary key finds a page of
+            # matches almost immediately; an index on deadline can't serve the OR.
+            KnownScan(
+                queryset.filter(Q(deadline__gte=timezone.localdate()) | Q(deadline__isnull=True))[:page],
+                'open schemes: pk-ordered page, the filter matches most rows',
+            ),
+            queryset.filter(provider='Government')[:page],
+            KnownScan(
+                queryset.filter(provider__in=['Government', 'Bank'])[:page],
+                'several providers: index lookups, then the matches are sorted by id',
+            ),
+            cls.filter_tags(queryset, ['subsidy'])[:page],
+            cls.filter_tags(queryset, ['subsidy', 'irrigation'])[:page],
+        ]
+
+    def filter_queryset(self, queryset):
+        params = self.request.query_params
+        if params.get('open') in ('1', 'true'):
+            queryset = queryset.filter(Q(deadline__gte=timezone.localdate()) | Q(deadline__isnull=True))
+        providers = self.param_list('provider')
+        if providers:
+            queryset = queryset.filter(provider__in=providers)
+        tags = [tag.lower() for tag in self.param_list('tag')]
+        if tags:
+            queryset = self.filter_tags(queryset, tags)
+        return queryset
+
+    def param_list(self, name):
+        return [value.strip() for value in self.request.query_params.get(name, '').split(',') if value.strip()]
+
+    @staticmethod
+    def filter_tags(queryset, tags):
+        if len(tags) == 1:
+            # Ordering on the tag row's scheme_id (same value as Scheme.id) lets
+            # the (name, scheme) index return rows already sorted.
+            return queryset.filter(tag_index__name=tags[0]).order_by('-tag_index__scheme_id')
+        # A join would repeat schemes carrying several of the tags
+        return queryset.filter(id__in=SchemeTag.objects.filter(name__in=tags).values('scheme_id'))
 
-class SchemeAPIView(APIView):
     def get(self, request):
-        schemes = Scheme.objects.all().order_by('-id')
-        serializer = SchemeSerializer(schemes, many=True)
-        return Response(serializer.data)
+        fast = FastSerializer(SchemeSummarySerializer, fields=requested_fields(request))
+        schemes = fast.rows(self.filter_queryset(self.get_queryset()))
+        paginator = SchemePagination()
+        page = paginator.paginate_queryset(schemes, request, view=self)
+        with phase('serialize'):
+            data = fast.serialize(page)
+        return paginator.get_paginated_response(data)
 
     def post(self, request):
         serializer = SchemeSerializer(data=request.data)
@@ -41,13 +133,58 @@ class SchemeAPIView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class SchemeDetailAPIView(APIView):
+    lookup_field = 'pk'
+
+    def get_queryset(self):
+        return Scheme.objects.all()
+
     def get_object(self, pk):
         try:
-            return Scheme.objects.get(pk=pk)
+            return self.get_queryset().get(pk=pk)
         except Scheme.DoesNotExist:
             raise Http404
 
     def get(self, request, pk, format=None):
-        scheme = self.get_object(pk)
-        serializer = SchemeSerializer(scheme)
-        return Response(serializer.data)
\ No newline at end of file
+        try:
+            scheme = self.get_object(pk)
+        except Http404:
+            # Expired schemes are moved to the archive but keep their id
+            archived = ArchivedScheme.objects.filter(pk=pk).first()
+            if archived is None:
+                raise
+            return Response(ArchivedSchemeSerializer(archived, context={'request': request}).data)
+        with phase('serialize'):
+            data = SchemeSerializer(scheme, context={'request': request}).data
+        return Response(data)
+
+
+def after_scheme_write(schemes):
+    # bulk_create/bulk_update send no signals
+    Scheme.sync_tags_bulk(schemes)
+    invalidate_variants('schemes')
+
+
+def scheme_ingestor(chunk_size=500):
+    return BulkIngestor(SchemeSerializer, SCHEME_NATURAL_KEY, chunk_size=chunk_size, after_write=after_scheme_write)
+
+
+class SchemeBulkAPIView(APIView):
+    """
+    Creates or updates many schemes at once. Accepts a JSON array or an NDJSON
+    body (Content-Type: application/x-ndjson); rows are matched on
+    (title, provider). Invalid rows are reported and skipped.
+    """
+    permission_classes = [IsPartnerOrStaff]
+
+    def post(self, request):
+        try:
+            records = iter_request(request)
+        except TypeError:
+            return Response({'error': 'Expected a JSON array or NDJSON body.'}, status=status.HTTP_400_BAD_REQUEST)
+        result = scheme_ingestor().ingest(records)
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class SchemeExportAPIView(ExportAPIView):
+    serializer_class = SchemeSerializer
+    filename = 'schemes'
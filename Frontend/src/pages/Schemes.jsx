@@ -6,7 +6,11 @@ import { useAuth } from '../contexts/AuthContext';
 const Schemes = () => {
   const { user } = useAuth();
   const [schemes, setSchemes] = useState([]);
-  const [allSchemes, setAllSchemes] = useState([]);
+  const [loadedSchemes, setLoadedSchemes] = useState([]);
+  const [knownTags, setKnownTags] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
+  const [totalCount, setTotalCount] = useState(0);
+  const [isLoading, setIsLoading] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
   const [isFilterOpen, setIsFilterOpen] = useState(false);
   const [activeFilters, setActiveFilters] = useState({
@@ -14,24 +18,37 @@ const Schemes = () => {
     tags: []
   });
 
-  useEffect(() => {
-    const fetchSchemes = async () => {
-      try {
-        const response = await fetch('/api/scheme/');
-        const data = await response.json();
-        setSchemes(data);
-        setAllSchemes(data);
-      } catch (error) {
-        console.error('Error fetching schemes:', error);
-      }
-    };
+  // The list is paginated ({count, next, previous, results}); provider and
+  // tag filters run on the server, and further pages load on demand.
+  const fetchPage = async (url, append) => {
+    setIsLoading(true);
+    try {
+      const response = await fetch(url);
+      const data = await response.json();
+      setLoadedSchemes(prev => (append ? [...prev, ...data.results] : data.results));
+      setKnownTags(prev => Array.from(new Set([
+        ...prev,
+        ...data.results.flatMap(scheme => scheme.tags.split(',').map(tag => tag.trim()).filter(Boolean))
+      ])).sort());
+      setNextPage(data.next ? (({ pathname, search }) => pathname + search)(new URL(data.next)) : null);
+      setTotalCount(data.count);
+    } catch (error) {
+      console.error('Error fetching schemes:', error);
+    } finally {
+      setIsLoading(false);
+    }
+  };
 
-    fetchSchemes();
-  }, []);
+  useEffect(() => {
+    const params = new URLSearchParams();
+    if (activeFilters.provider.length > 0) params.set('provider', activeFilters.provider.join(','));
+    if (activeFilters.tags.length > 0) params.set('tag', activeFilters.tags.join(','));
+    fetchPage(`/api/scheme/?${params}`, false);
+  }, [activeFilters]);
 
-  const allTags = Array.from(
-    new Set(allSchemes.flatMap(scheme => scheme.tags.split(',').map(tag => tag.trim())))
-  ).sort();
+  const loadMore = () => {
+    if (nextPage && !isLoading) fetchPage(nextPage, true);
+  };
 
   const handleSearch = (e) => {
     setSearchTerm(e.target.value);
@@ -64,31 +81,20 @@ const Schemes = () => {
     setSearchTerm('');
   };
 
+  // Search only narrows the schemes loaded so far
   useEffect(() => {
-    let filtered = allSchemes;
-    
-    if (searchTerm) {
-      const term = searchTerm.toLowerCase();
-      filtered = filtered.filter(scheme => 
-        scheme.title.toLowerCase().includes(term) || 
-        scheme.description.toLowerCase().includes(term)
-      );
+    if (!searchTerm) {
+      setSchemes(loadedSchemes);
+      return;
     }
-    
-    if (activeFilters.provider.length > 0) {
-      filtered = filtered.filter(scheme => 
-        activeFilters.provider.includes(scheme.provider)
-      );
-    }
-    
-    if (activeFilters.tags.length > 0) {
-      filtered = filtered.filter(scheme => 
-        scheme.tags.split(',').map(tag => tag.trim()).some(tag => activeFilters.tags.includes(tag))
-      );
-    }
-    
-    setSchemes(filtered);
-  }, [searchTerm, activeFilters, allSchemes]);
+    const term = searchTerm.toLowerCase();
+    setSchemes(loadedSchemes.filter(scheme =>
+      scheme.title.toLowerCase().includes(term) ||
+      scheme.organizationName.toLowerCase().includes(term) ||
+      scheme.description.toLowerCase().includes(term) ||
+      scheme.tags.toLowerCase().includes(term)
+    ));
+  }, [searchTerm, loadedSchemes]);
 
   const getProviderIcon = (provider) => {
     switch (provider) {
@@ -206,7 +212,7 @@ const Schemes = () => {
                     <div className="px-4 py-2">
                       <h3 className="text-sm font-medium text-gray-900 dark:text-white">Tags</h3>
                       <div className="mt-2 space-y-2 max-h-40 overflow-y-auto">
-                        {allTags.map((tag) => (
+                        {knownTags.map((tag) => (
                           <div key={tag} className="flex items-center">
                             <input
                               id={`filter-tag-${tag}`}
@@ -348,6 +354,22 @@ const Schemes = () => {
           </div>
         )}
       </div>
+
+      {nextPage && (
+        <div className="mt-8 flex flex-col items-center">
+          <p className="text-sm text-gray-500 dark:text-gray-400 mb-3">
+            Showing {loadedSchemes.length} of {totalCount} schemes
+          </p>
+          <button
+            type="button"
+            onClick={loadMore}
+            disabled={isLoading}
+            className="inline-flex items-center px-4 py-2 border border-gray-300 dark:border-gray-600 rounded-md shadow-sm text-sm font-medium text-gray-700 dark:text-gray-200 bg-white dark:bg-gray-700 hover:bg-gray-50 dark:hover:bg-gray-600 disabled:opacity-50"
+          >
+            {isLoading ? 'Loading...' : 'Load more schemes'}
+          </button>
+        </div>
+      )}
     </div>
   );
 };